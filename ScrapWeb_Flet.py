@@ -1,23 +1,32 @@
 #  Old By Flet
 import flet as ft
 import requests
-from bs4 import BeautifulSoup
 import os
 from weasyprint import HTML, CSS
 from urllib.parse import urljoin, urlparse
 import threading
 from datetime import datetime
 import time
-import browser_cookie3
 import json
 from pathlib import Path
 import html2text
 import re
-import zipfile
 import smtplib
 import ssl
 from email.message import EmailMessage
 import traceback
+from scrap_core import (
+    FetchEngine, DEFAULT_MAX_IN_FLIGHT, HostScheduler, HttpCache, RawStore, cache_path, cache_dir,
+    CircuitBreaker, fetch_with_retry, RetryLater, CrawlCheckpoint, latest_unfinished,
+    STATUS_RUNNING, STATUS_COMPLETED, Frontier, PriorityFrontier, default_scorers,
+    UrlCanonicalizer, RULES_FILE_NAME, RobotsRules, sitemap_seeds, SiteManifest,
+    load_browser_cookies, shared_cookie_cache, save_cookie_jar, load_cookie_jar, apply_cookies,
+    expiry_warning, COOKIES_FILE_ENV, PageClassifier, SOFT_ERROR_LABELS,
+    BrowserPool, needs_rendering, RENDERING_AVAILABLE, DEFAULT_POOL_SIZE, extract_embedded,
+    ApiReplayer, ParsedPage, ParserBackend, PARSER_CHOICES, CleaningRules, split_selectors,
+    BoilerplateLearner, SiteProfile, scope_selectors,
+    NearDuplicateIndex, ExportStore, zip_directory, content_hash
+)
 
 class WebScraperApp:
     def __init__(self):
@@ -29,6 +38,71 @@ class WebScraperApp:
         self.main_url = None
         self.total_found_links = 0
         
+        # مجدول مهذب لكل مضيف (يحتفظ بالمعدلات المكتسبة بين الجلسات)
+        self.scheduler = HostScheduler()
+        
+        # قاطع دائرة لكل مضيف يوقف الإرسال لمضيف معطل
+        self.breaker = CircuitBreaker()
+        
+        # ذاكرة HTTP لإعادة التحقق (تُفتح عند بدء الكشط داخل مجلد الحفظ)
+        self.http_cache = None
+        
+        # مخزن HTML الخام المضغوط (لإعادة التصدير بدون جلب)
+        self.raw_store = None
+        
+        # توحيد الروابط قبل إضافتها للقائمة (يُعاد إنشاؤه مع قواعد الموقع عند بدء الكشط)
+        self.canonicalizer = UrlCanonicalizer()
+        
+        # قواعد robots.txt وتواريخ lastmod من خرائط الموقع للجلسة الحالية
+        self.robots = None
+        self.sitemap_lastmod = {}
+        self.discovery_stats = {}
+        
+        # الكشط التزايدي: سجل الصفحات المحفوظة، والصفحات التي ردت 304، وملفات كل صفحة
+        self.manifest = None
+        self.not_modified = set()
+        self.page_files = {}
+        # اسم الملف ← الرابط الذي أخذه في الجلسة الحالية
+        self.file_names = {}
+        
+        # كشف صفحات الدخول والأخطاء الناعمة قبل الحفظ، وسبب فشل كل رابط مصنف
+        self.page_classifier = PageClassifier()
+        self.failure_reasons = {}
+        
+        # عدد المحاولات لكل رابط ونوع خطأ (يعود الرابط من المحرك بعد مهلة الإعادة)
+        self.retry_counts = {}
+        
+        # مجموعة متصفحات خفية لصفحات JavaScript (تُنشأ عند تفعيل الخيار فقط)
+        self.browser_pool = None
+        
+        # وضع API: قوالب واجهات JSON المكتشفة لكل نمط روابط (عند تفعيل الخيار فقط)
+        self.api_replayer = None
+        
+        # محلل HTML (lxml مع مسار selectolax السريع إن كانا مثبتين، وإلا html.parser)
+        self.parser_backend = ParserBackend()
+        self.parser_choice = "auto"
+        
+        # قواعد التنظيف المجمّعة (تُعاد من خيارات الواجهة في بداية كل كشط)
+        self.cleaning_rules = CleaningRules()
+        
+        # قالب كل موقع المتعلم من أول صفحاته (عند تفعيل الخيار فقط)
+        self.boilerplate = None
+        
+        # ملف تعريف النطاق بين الجلسات (محدد المحتوى، حاوية الروابط، المحلل، استراتيجية الجلب)
+        self.site_profile = None
+        
+        # بصمات SimHash للصفحات المصدّرة لتخطي الصفحات شبه المكررة (عند تفعيل الخيار فقط)
+        self.near_duplicates = None
+        
+        # الملفات المصدّرة بعنونة المحتوى (كل محتوى يُكتب مرة ويُربط في مجلدات الجلسات)
+        self.export_store = None
+        
+        # إعادة التصدير: HTML الصفحات من المخزن الخام بدل الجلب (عند تفعيل الخيار فقط)
+        self.reexport = False
+        
+        # عدد الصفحات المحفوظة من JSON المضمّن (__NEXT_DATA__ / JSON-LD) حسب المصدر
+        self.embedded_stats = {}
+        
         # محول HTML إلى Markdown
         self.html_converter = html2text.HTML2Text()
         self.html_converter.ignore_links = False
@@ -122,6 +196,10 @@ class WebScraperApp:
         
         page.add(main_container)
         
+        # تحميل ملف كوكيز محدد في البيئة (للتشغيل على خادم بدون متصفح)
+        if os.environ.get(COOKIES_FILE_ENV):
+            self.import_cookies_file(os.environ[COOKIES_FILE_ENV])
+        
         # تشغيل مؤقت الإحصائيات
         self.start_time = None
         self.update_timer()
@@ -206,6 +284,20 @@ class WebScraperApp:
                         margin=ft.margin.symmetric(vertical=10)
                     ),
                     
+                    # ملف كوكيز محمول (cookies.txt / JSON) للتشغيل بدون متصفح
+                    ft.Row([
+                        ft.OutlinedButton(
+                            "📥 استيراد ملف كوكيز",
+                            on_click=self.pick_cookies_file,
+                            tooltip="cookies.txt (Netscape) أو JSON"
+                        ),
+                        ft.OutlinedButton(
+                            "📤 تصدير كوكيز الجلسة",
+                            on_click=self.export_cookies,
+                            tooltip="حفظ كوكيز الجلسة لاستخدامها على خادم بدون متصفح"
+                        )
+                    ], alignment=ft.MainAxisAlignment.CENTER, spacing=15),
+                    
                     # نصائح محسنة
                     ft.Container(
                         content=ft.Column([
@@ -298,6 +390,39 @@ class WebScraperApp:
                                 ref=self.create_depth_ref()
                             ),
                             expand=1
+                        ),
+                        ft.Container(width=15),
+                        ft.Container(
+                            content=ft.Dropdown(
+                                label="⚡ الطلبات المتزامنة",
+                                options=[
+                                    ft.dropdown.Option("1", "1 (تسلسلي)"),
+                                    ft.dropdown.Option("4", "4"),
+                                    ft.dropdown.Option("8", "8 (موصى به)"),
+                                    ft.dropdown.Option("16", "16 (سريع)"),
+                                ],
+                                value=str(DEFAULT_MAX_IN_FLIGHT),
+                                border_radius=12,
+                                filled=True,
+                                bgcolor=ft.Colors.GREY_50,
+                                ref=self.create_concurrency_ref()
+                            ),
+                            expand=1
+                        ),
+                        ft.Container(width=15),
+                        ft.Container(
+                            content=ft.Dropdown(
+                                label="🧬 محلل HTML",
+                                options=[
+                                    ft.dropdown.Option(value, label) for value, label in PARSER_CHOICES.items()
+                                ],
+                                value="auto",
+                                border_radius=12,
+                                filled=True,
+                                bgcolor=ft.Colors.GREY_50,
+                                ref=self.create_parser_ref()
+                            ),
+                            expand=1
                         )
                     ]),
                     
@@ -331,6 +456,146 @@ class WebScraperApp:
                         )
                     ]),
                     
+                    # استئناف جلسة سابقة
+                    ft.Checkbox(
+                        label="♻️ استئناف آخر جلسة غير مكتملة (بدون إعادة جلب الصفحات المكتملة)",
+                        value=False,
+                        ref=self.create_resume_ref()
+                    ),
+                    
+                    # اكتشاف الصفحات من robots.txt وخريطة الموقع
+                    ft.Row([
+                        ft.Checkbox(
+                            label="🤖 احترام robots.txt (Disallow و Crawl-delay)",
+                            value=True,
+                            ref=self.create_robots_ref()
+                        ),
+                        ft.Checkbox(
+                            label="🗺️ اكتشاف الصفحات من خريطة الموقع (sitemap)",
+                            value=False,
+                            ref=self.create_sitemap_ref()
+                        ),
+                        ft.Checkbox(
+                            label="🔁 كشط تزايدي (الجديد أو المعدل فقط حسب lastmod و 304)",
+                            value=False,
+                            ref=self.create_incremental_ref()
+                        ),
+                        ft.Checkbox(
+                            label="🪞 تخطي تصدير الصفحات شبه المكررة (الترقيم، نسخ الطباعة، روابط التتبع)",
+                            value=False,
+                            ref=self.create_near_duplicates_ref()
+                        ),
+                        ft.Checkbox(
+                            label="♻️ إعادة التصدير من HTML المحفوظ بدون جلب (الصفحات غير المحفوظة تُجلب)",
+                            value=False,
+                            ref=self.create_reexport_ref()
+                        ),
+                        ft.Checkbox(
+                            label="🧭 عرض صفحات JavaScript بمتصفح خفي (عند فراغ المحتوى فقط)",
+                            value=False,
+                            ref=self.create_render_ref()
+                        ),
+                        ft.Checkbox(
+                            label="⚡ وضع API (اكتشاف طلبات JSON للصفحات واستدعاؤها مباشرة)",
+                            value=False,
+                            ref=self.create_api_replay_ref()
+                        )
+                    ], wrap=True),
+                    
+                    # أولوية الكشط والميزانية
+                    ft.ExpansionTile(
+                        title=ft.Text("🎯 أولوية الكشط والميزانية"),
+                        subtitle=ft.Text("كشط الصفحات الأهم أولاً ضمن حد للصفحات أو الوقت"),
+                        leading=ft.Icon(ft.Icons.LOW_PRIORITY_ROUNDED, color=primary_color),
+                        controls=[
+                            ft.Container(
+                                content=ft.Column([
+                                    ft.Row([
+                                        ft.Container(
+                                            content=ft.Dropdown(
+                                                label="🧭 الاستراتيجية",
+                                                options=[
+                                                    ft.dropdown.Option("bfs", "🌊 بالعرض (BFS)"),
+                                                    ft.dropdown.Option("best", "🎯 الأهم أولاً"),
+                                                ],
+                                                value="bfs",
+                                                ref=self.create_strategy_ref()
+                                            ),
+                                            expand=1
+                                        ),
+                                        ft.Container(width=15),
+                                        ft.Container(
+                                            content=ft.TextField(
+                                                label="📄 حد الصفحات",
+                                                value="0",
+                                                helper_text="0 = بدون حد",
+                                                keyboard_type=ft.KeyboardType.NUMBER,
+                                                ref=self.create_page_budget_ref()
+                                            ),
+                                            expand=1
+                                        ),
+                                        ft.Container(width=15),
+                                        ft.Container(
+                                            content=ft.TextField(
+                                                label="⏱️ حد الوقت (دقائق)",
+                                                value="0",
+                                                helper_text="0 = بدون حد",
+                                                keyboard_type=ft.KeyboardType.NUMBER,
+                                                ref=self.create_time_budget_ref()
+                                            ),
+                                            expand=1
+                                        )
+                                    ]),
+                                    ft.TextField(
+                                        label="كلمات/أنماط الصفحات المهمة",
+                                        value="idea",
+                                        hint_text="idea, /blog/\\d+",
+                                        helper_text="أفصل بفاصلة - تُطابق الرابط (regex) ونص الرابط",
+                                        ref=self.create_priority_patterns_ref()
+                                    ),
+                                    ft.TextField(
+                                        label="🔗 معاملات رابط إضافية للتجاهل",
+                                        value="",
+                                        hint_text="sid, session, lang",
+                                        helper_text="تُحذف من روابط الموقع قبل الجلب (معاملات التتبع utm_* و fbclid تُحذف دائماً)",
+                                        ref=self.create_ignore_params_ref()
+                                    )
+                                ], spacing=10),
+                                padding=15
+                            )
+                        ]
+                    ),
+                    
+                    # كشف صفحات الدخول والأخطاء
+                    ft.ExpansionTile(
+                        title=ft.Text("🛡️ كشف صفحات الدخول والأخطاء"),
+                        subtitle=ft.Text("تخطي صفحات الدخول و\"غير موجود\" التي ترجع 200 بدلاً من حفظها"),
+                        leading=ft.Icon(ft.Icons.SHIELD_ROUNDED, color=primary_color),
+                        controls=[
+                            ft.Container(
+                                content=ft.Column([
+                                    ft.TextField(
+                                        label="🔐 علامات إضافية لصفحة الدخول",
+                                        value="",
+                                        hint_text="join to read, upgrade your plan",
+                                        helper_text="أفصل بفاصلة - نص يظهر في عنوان أو محتوى صفحة الدخول لهذا الموقع",
+                                        ref=self.create_login_markers_ref()
+                                    ),
+                                    ft.Dropdown(
+                                        label="عند تكرار صفحات الدخول (انتهاء الكوكيز)",
+                                        options=[
+                                            ft.dropdown.Option("pause", "⏸ إيقاف مؤقت لتحديث الكوكيز"),
+                                            ft.dropdown.Option("stop", "⏹ إيقاف الكشط"),
+                                        ],
+                                        value="pause",
+                                        ref=self.create_login_action_ref()
+                                    )
+                                ], spacing=10),
+                                padding=15
+                            )
+                        ]
+                    ),
+                    
                     # إعدادات التنظيف الذكي
                     ft.ExpansionTile(
                         title=ft.Text("🧹 إعدادات التنظيف الذكي للمحتوى"),
@@ -374,6 +639,12 @@ class WebScraperApp:
                                             ref=self.create_remove_comments_ref()
                                         )
                                     ]),
+                                    ft.Checkbox(
+                                        label="🧠 تعلم قالب الموقع وحذف الكتل المتكررة في كل الصفحات",
+                                        value=True,
+                                        tooltip="الكتل التي تتكرر في أول صفحات الموقع (قوائم، تذييل، صناديق اشتراك) تُحذف من باقي الصفحات",
+                                        ref=self.create_boilerplate_ref()
+                                    ),
                                     ft.TextField(
                                         label="عناصر إضافية للحذف (CSS selectors)",
                                         hint_text=".ads, #popup, .banner",
@@ -652,6 +923,14 @@ class WebScraperApp:
             ),
         ], spacing=15)
         
+        # حالة الجدولة لكل مضيف (المعدل والتراجع)
+        self.host_rate_text = ft.Text(
+            "",
+            size=12,
+            color=ft.Colors.GREY_700,
+            text_align=ft.TextAlign.CENTER
+        )
+        
         return ft.Column([
             ft.Container(
                 content=ft.Column([
@@ -660,7 +939,11 @@ class WebScraperApp:
                 ], horizontal_alignment=ft.CrossAxisAlignment.CENTER, spacing=10),
                 margin=ft.margin.symmetric(vertical=15)
             ),
-            stats_cards
+            stats_cards,
+            ft.Container(
+                content=self.host_rate_text,
+                alignment=ft.alignment.center
+            )
         ], spacing=10)
     
     def create_logs_section(self, primary_color):
@@ -807,10 +1090,78 @@ class WebScraperApp:
         self.depth_dropdown = ft.Ref[ft.Dropdown]()
         return self.depth_dropdown
     
+    def create_concurrency_ref(self):
+        self.concurrency_dropdown = ft.Ref[ft.Dropdown]()
+        return self.concurrency_dropdown
+    
+    def create_parser_ref(self):
+        self.parser_dropdown = ft.Ref[ft.Dropdown]()
+        return self.parser_dropdown
+    
     def create_folder_ref(self):
         self.folder_field = ft.Ref[ft.TextField]()
         return self.folder_field
     
+    def create_resume_ref(self):
+        self.resume_checkbox = ft.Ref[ft.Checkbox]()
+        return self.resume_checkbox
+    
+    def create_robots_ref(self):
+        self.robots_checkbox = ft.Ref[ft.Checkbox]()
+        return self.robots_checkbox
+    
+    def create_sitemap_ref(self):
+        self.sitemap_checkbox = ft.Ref[ft.Checkbox]()
+        return self.sitemap_checkbox
+    
+    def create_incremental_ref(self):
+        self.incremental_checkbox = ft.Ref[ft.Checkbox]()
+        return self.incremental_checkbox
+    
+    def create_near_duplicates_ref(self):
+        self.near_duplicates_checkbox = ft.Ref[ft.Checkbox]()
+        return self.near_duplicates_checkbox
+    
+    def create_reexport_ref(self):
+        self.reexport_checkbox = ft.Ref[ft.Checkbox]()
+        return self.reexport_checkbox
+    
+    def create_render_ref(self):
+        self.render_checkbox = ft.Ref[ft.Checkbox]()
+        return self.render_checkbox
+    
+    def create_api_replay_ref(self):
+        self.api_replay_checkbox = ft.Ref[ft.Checkbox]()
+        return self.api_replay_checkbox
+    
+    def create_strategy_ref(self):
+        self.strategy_dropdown = ft.Ref[ft.Dropdown]()
+        return self.strategy_dropdown
+    
+    def create_page_budget_ref(self):
+        self.page_budget_field = ft.Ref[ft.TextField]()
+        return self.page_budget_field
+    
+    def create_time_budget_ref(self):
+        self.time_budget_field = ft.Ref[ft.TextField]()
+        return self.time_budget_field
+    
+    def create_priority_patterns_ref(self):
+        self.priority_patterns_field = ft.Ref[ft.TextField]()
+        return self.priority_patterns_field
+    
+    def create_ignore_params_ref(self):
+        self.ignore_params_field = ft.Ref[ft.TextField]()
+        return self.ignore_params_field
+    
+    def create_login_markers_ref(self):
+        self.login_markers_field = ft.Ref[ft.TextField]()
+        return self.login_markers_field
+    
+    def create_login_action_ref(self):
+        self.login_action_dropdown = ft.Ref[ft.Dropdown]()
+        return self.login_action_dropdown
+    
     def create_export_format_ref(self):
         self.export_format = ft.Ref[ft.RadioGroup]()
         return self.export_format
@@ -839,6 +1190,10 @@ class WebScraperApp:
         self.remove_comments = ft.Ref[ft.Checkbox]()
         return self.remove_comments
     
+    def create_boilerplate_ref(self):
+        self.boilerplate_checkbox = ft.Ref[ft.Checkbox]()
+        return self.boilerplate_checkbox
+    
     def create_custom_selectors_ref(self):
         self.custom_selectors = ft.Ref[ft.TextField]()
         return self.custom_selectors
@@ -887,91 +1242,33 @@ class WebScraperApp:
         self.time_display = ft.Ref[ft.Text]()
         return self.time_display
     
+    def build_cleaning_rules(self):
+        """تجميع قواعد التنظيف مرة واحدة في بداية الكشط (None عند محدد مخصص غير صالح)"""
+        options = {
+            "header": self.remove_header, "footer": self.remove_footer, "sidebar": self.remove_sidebar,
+            "ads": self.remove_ads, "social": self.remove_social, "comments": self.remove_comments,
+        }
+        groups = [group for group, ref in options.items() if ref.current and ref.current.value]
+        custom = split_selectors(self.custom_selectors.current.value if self.custom_selectors.current else "")
+        try:
+            rules = CleaningRules(groups, custom)
+        except ValueError as e:
+            self.log(f"❌ {str(e)}", ft.Colors.RED, "error")
+            return None
+        
+        self.log(f"🧹 قواعد التنظيف: {rules.selector_count} محدد", ft.Colors.BLUE)
+        return rules
+    
     def clean_content(self, soup, url):
-        """تنظيف المحتوى من العناصر غير المرغوبة"""
+        """تنظيف المحتوى من العناصر غير المرغوبة (بالقواعد المجمّعة في بداية الكشط ثم قالب الموقع المتعلم)"""
         try:
-            # العناصر المشتركة للحذف
-            common_selectors = [
-                'script', 'style', 'noscript', 'iframe', 'embed', 'object',
-                '[hidden]', '.sr-only', '.visually-hidden'
-            ]
-            
-            # حذف العناصر حسب الإعدادات
-            if hasattr(self, 'remove_header') and self.remove_header.current and self.remove_header.current.value:
-                common_selectors.extend([
-                    'header', 'nav', '.header', '.navigation', '.navbar', 
-                    '.site-header', '.main-header', '.top-bar', '#header',
-                    '.menu', '.main-menu', '.primary-menu'
-                ])
-            
-            if hasattr(self, 'remove_footer') and self.remove_footer.current and self.remove_footer.current.value:
-                common_selectors.extend([
-                    'footer', '.footer', '.site-footer', '.main-footer', 
-                    '#footer', '.page-footer', '.bottom-bar'
-                ])
-            
-            if hasattr(self, 'remove_sidebar') and self.remove_sidebar.current and self.remove_sidebar.current.value:
-                common_selectors.extend([
-                    'aside', '.sidebar', '.side-bar', '.widget-area',
-                    '#sidebar', '.secondary', '.complementary'
-                ])
-            
-            if hasattr(self, 'remove_ads') and self.remove_ads.current and self.remove_ads.current.value:
-                common_selectors.extend([
-                    '.ad', '.ads', '.advertisement', '.banner', '.promo',
-                    '.sponsor', '.google-ads', '.adsense', '[class*="ad-"]',
-                    '[id*="ad-"]', '.adsbygoogle'
-                ])
-            
-            if hasattr(self, 'remove_social') and self.remove_social.current and self.remove_social.current.value:
-                common_selectors.extend([
-                    '.social', '.share', '.sharing', '.social-media',
-                    '.share-buttons', '.social-icons', '.follow-us'
-                ])
-            
-            if hasattr(self, 'remove_comments') and self.remove_comments.current and self.remove_comments.current.value:
-                common_selectors.extend([
-                    '.comments', '.comment', '#comments', '.comment-section',
-                    '.disqus', '.fb-comments'
-                ])
-            
-            # إضافة المحددات المخصصة
-            if (hasattr(self, 'custom_selectors') and self.custom_selectors.current and 
-                self.custom_selectors.current.value):
-                custom = [s.strip() for s in self.custom_selectors.current.value.split(',') if s.strip()]
-                common_selectors.extend(custom)
-            
-            # حذف العناصر
-            for selector in common_selectors:
-                try:
-                    for element in soup.select(selector):
-                        element.decompose()
-                except Exception:
-                    continue
-            
-            # البحث عن المحتوى الرئيسي
-            main_content = None
-            
-            # محاولة العثور على المحتوى الرئيسي
-            main_selectors = [
-                'main', 'article', '.content', '.main-content', '.post-content',
-                '.entry-content', '.article-content', '#content', '.page-content',
-                '.post', '.article', '.entry', '[role="main"]'
-            ]
-            
-            for selector in main_selectors:
-                try:
-                    element = soup.select_one(selector)
-                    if element and len(element.get_text(strip=True)) > 100:
-                        main_content = element
-                        break
-                except Exception:
-                    continue
-            
-            # إذا لم نجد محتوى رئيسي، نستخدم body
-            if not main_content:
-                main_content = soup.find('body') or soup
-            
+            self.cleaning_rules.strip(soup)
+            if self.boilerplate:
+                self.boilerplate.process(url, soup)
+            if self.site_profile:
+                main_content = self.site_profile.content_node(soup, self.cleaning_rules.main_content)
+            else:
+                main_content = self.cleaning_rules.main_content(soup)
             self.log(f"🧹 تم تنظيف المحتوى من {url}", ft.Colors.BLUE, "success")
             return main_content
             
@@ -979,48 +1276,43 @@ class WebScraperApp:
             self.log(f"⚠️ خطأ في تنظيف المحتوى: {str(e)}", ft.Colors.ORANGE)
             return soup
     
-    def save_as_markdown(self, url, content, folder):
-        """حفظ المحتوى كـ Markdown"""
+    def save_as_markdown(self, url, content, folder, embedded=None, page=None):
+        """
+        حفظ المحتوى كـ Markdown (embedded: محتوى JSON مضمّن يُغني عن تحليل الصفحة،
+        page: الصفحة المحللة المشتركة مع باقي المصدّرات)
+        """
         try:
-            # تحليل HTML
-            soup = BeautifulSoup(content, 'html.parser')
-            
-            # تنظيف المحتوى
-            cleaned_soup = self.clean_content(soup, url)
-            
-            # تحويل إلى Markdown
-            markdown_content = self.html_converter.handle(str(cleaned_soup))
+            if embedded:
+                # المسار السريع: الحمولة المضمّنة مباشرة بدون تنظيف و html2text
+                markdown_content = embedded.to_markdown()
+            else:
+                # تحليل وتنظيف HTML مرة واحدة لكل المصدّرات ثم التحويل إلى Markdown
+                page = page or ParsedPage(url, content, self.parser_backend)
+                markdown_content = self.html_converter.handle(page.cleaned_html(self.clean_content))
             
             # تحسين Markdown
-            markdown_content = self.improve_markdown(markdown_content, url)
+            markdown_content = self.improve_markdown(markdown_content, url, embedded.title if embedded else None)
             
-            # إنشاء اسم الملف
-            parsed_url = urlparse(url)
-            if url == self.main_url:
-                filename = "main_page.md"
-            else:
-                path = parsed_url.path.strip('/')
-                if path:
-                    filename = path.replace('/', '_').replace('\\', '_')
-                    filename = "".join(c for c in filename if c.isalnum() or c in ['_', '-', '.'])
-                else:
-                    filename = "index"
-                filename = f"{filename}.md"
-            
-            # تجنب الأسماء المكررة
-            filepath = os.path.join(folder, filename)
-            counter = 1
-            while os.path.exists(filepath):
-                name, ext = os.path.splitext(filename)
-                filepath = os.path.join(folder, f"{name}_{counter}{ext}")
-                counter += 1
-            
-            # حفظ الملف
-            with open(filepath, 'w', encoding='utf-8') as f:
+            # اسم ملف خاص بالصفحة (السجل التزايدي يعتمد أن لكل رابط ملفاته)
+            filepath = os.path.join(folder, self.url_to_filename(url, "md"))
+            
+            # حفظ الملف مباشرة: ترويسة الصفحة (الرابط وتاريخ الكشط) تجعل كل ملف فريداً فلا فائدة من مخزن التصدير
+            # (كتابة ذرية حتى لا يُكتب عبر رابط صلب قديم بنفس الاسم)
+            tmp_path = f"{filepath}.{threading.get_ident()}.tmp"
+            with open(tmp_path, 'w', encoding='utf-8') as f:
                 f.write(markdown_content)
+            os.replace(tmp_path, filepath)
+            self.page_files.setdefault(url, []).append(os.path.basename(filepath))
+            
+            # الحقول المنظمة كما هي بجانب ملف Markdown
+            if embedded:
+                json_path = os.path.splitext(filepath)[0] + ".json"
+                payload = embedded.payload_json()
+                self.export_store.save_text(content_hash(payload), ".json", json_path, payload)
+                self.page_files[url].append(os.path.basename(json_path))
             
             file_size = os.path.getsize(filepath) / 1024  # KB
-            self.log(f"📝 تم حفظ Markdown: {os.path.basename(filepath)} ({file_size:.1f} KB)", 
+            self.log(f"📝 تم حفظ Markdown: {os.path.basename(filepath)} ({file_size:.1f} KB)",
                     ft.Colors.GREEN, "success")
             
             return True
@@ -1029,11 +1321,11 @@ class WebScraperApp:
             self.log(f"❌ خطأ في حفظ Markdown: {str(e)}", ft.Colors.RED, "error")
             return False
     
-    def improve_markdown(self, markdown_content, url):
+    def improve_markdown(self, markdown_content, url, title=None):
         """تحسين محتوى Markdown"""
         try:
             # إضافة metadata في المقدمة
-            title = self.extract_title_from_url(url)
+            title = title or self.extract_title_from_url(url)
             header = f"""---
 title: {title}
 url: {url}
@@ -1087,41 +1379,23 @@ scraped_at: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}
         except Exception:
             return "صفحة ويب"
     
-    def save_as_pdf(self, url, content, folder):
+    def save_as_pdf(self, url, content, folder, embedded=None, page=None):
         """حفظ المحتوى كـ PDF (محسن) باستخدام WeasyPrint"""
         try:
-            # تحليل وتنظيف HTML
-            soup = BeautifulSoup(content, 'html.parser')
-            cleaned_soup = self.clean_content(soup, url)
-
-            # إنشاء اسم الملف
-            parsed_url = urlparse(url)
-            if url == self.main_url:
-                filename = "main_page.pdf"
+            # HTML المنظف المشترك مع Markdown (أو HTML مبني من الحمولة المضمّنة)
+            if embedded:
+                cleaned_html = embedded.to_html()
             else:
-                path = parsed_url.path.strip('/')
-                if path:
-                    filename = path.replace('/', '_').replace('\\', '_')
-                    filename = "".join(c for c in filename if c.isalnum() or c in ['_', '-', '.'])
-                else:
-                    filename = "index"
-                filename = f"{filename}.pdf"
+                page = page or ParsedPage(url, content, self.parser_backend)
+                cleaned_html = page.cleaned_html(self.clean_content)
 
-            # تجنب الأسماء المكررة
-            filepath = os.path.join(folder, filename)
-            counter = 1
-            while os.path.exists(filepath):
-                name, ext = os.path.splitext(filename)
-                filepath = os.path.join(folder, f"{name}_{counter}{ext}")
-                counter += 1
+            # اسم ملف خاص بالصفحة (السجل التزايدي يعتمد أن لكل رابط ملفاته)
+            filepath = os.path.join(folder, self.url_to_filename(url, "pdf"))
 
             # إعدادات PDF محسنة باستخدام WeasyPrint
             page_size = self.page_size_dropdown.current.value if hasattr(self, 'page_size_dropdown') else 'A4'
             orientation = self.orientation_dropdown.current.value if hasattr(self, 'orientation_dropdown') else 'Portrait'
 
-            # تحويل HTML إلى PDF باستخدام WeasyPrint
-            html_doc = HTML(string=str(cleaned_soup))
-
             # إعدادات CSS للطباعة
             css_styles = f"""
             @page {{
@@ -1130,13 +1404,17 @@ scraped_at: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}
             }}
             """
 
-            css_doc = CSS(string=css_styles)
+            def write_pdf(path):
+                # تحويل HTML إلى PDF باستخدام WeasyPrint (فقط لمحتوى لم يُصدّر من قبل)
+                HTML(string=cleaned_html).write_pdf(path, stylesheets=[CSS(string=css_styles)])
 
-            # إنشاء ملف PDF
-            html_doc.write_pdf(filepath, stylesheets=[css_doc])
+            # PDF بمفتاح HTML المنظف والإعدادات: المحتوى المطابق (لأي رابط أو جلسة) يُربط بدون WeasyPrint
+            reused = self.export_store.save(content_hash(cleaned_html + css_styles), ".pdf", filepath, write_pdf)
+            self.page_files.setdefault(url, []).append(os.path.basename(filepath))
 
             file_size = os.path.getsize(filepath) / 1024  # KB
-            self.log(f"📄 تم حفظ PDF: {os.path.basename(filepath)} ({file_size:.1f} KB)",
+            self.log(f"📄 تم حفظ PDF: {os.path.basename(filepath)} ({file_size:.1f} KB)"
+                     + (" 🔗 مطابق لملف سابق" if reused else ""),
                     ft.Colors.GREEN, "success")
 
             return True
@@ -1146,19 +1424,20 @@ scraped_at: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}
 
         return False
     
-    def save_content(self, url, content, folder):
-        """حفظ المحتوى بالتنسيق المحدد"""
+    def save_content(self, url, content, folder, embedded=None, page=None):
+        """حفظ المحتوى بالتنسيق المحدد (تحليل وتنظيف واحد مشترك بين التنسيقات)"""
         try:
             export_format = self.export_format.current.value if hasattr(self, 'export_format') else "markdown"
+            page = page or ParsedPage(url, content, self.parser_backend)
             
             success_markdown = False
             success_pdf = False
             
             if export_format in ["markdown", "both"]:
-                success_markdown = self.save_as_markdown(url, content, folder)
+                success_markdown = self.save_as_markdown(url, content, folder, embedded, page)
             
             if export_format in ["pdf", "both"]:
-                success_pdf = self.save_as_pdf(url, content, folder)
+                success_pdf = self.save_as_pdf(url, content, folder, embedded, page)
             
             # إرجاع النجاح إذا نجح أي من التنسيقات
             if export_format == "markdown":
@@ -1237,6 +1516,15 @@ scraped_at: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}
         if hasattr(self, 'failed_count') and self.failed_count.current:
             self.failed_count.current.value = str(len(self.failed_urls))
             self.failed_count.current.update()
+        
+        if hasattr(self, 'host_rate_text'):
+            status = self.scheduler.describe()
+            for host, circuit in self.breaker.snapshot().items():
+                status += f"   🔌 {host}: دائرة {circuit['state']}"
+                if circuit["reopens_in"] > 0:
+                    status += f" ({circuit['reopens_in']} ث)"
+            self.host_rate_text.value = status
+            self.host_rate_text.update()
     
     def update_timer(self):
         """تحديث مؤقت الوقت"""
@@ -1280,54 +1568,17 @@ scraped_at: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}
         try:
             self.log(f"🔍 البحث عن cookies في {browser_type}...", ft.Colors.BLUE)
             
-            cookies_jar = None
-            
-            if browser_type == "auto":
-                browsers = [
-                    ("Chrome", browser_cookie3.chrome),
-                    ("Firefox", browser_cookie3.firefox),
-                    ("Edge", browser_cookie3.edge),
-                    ("Safari", browser_cookie3.safari),
-                    ("Opera", browser_cookie3.opera)
-                ]
-                
-                for browser_name, browser_func in browsers:
-                    try:
-                        self.log(f"🔍 فحص {browser_name}...", ft.Colors.BLUE)
-                        cookies_jar = browser_func(domain_name=domain)
-                        cookies_list = list(cookies_jar)
-                        if cookies_list:
-                            self.log(f"✅ تم العثور على {len(cookies_list)} cookie في {browser_name}!", ft.Colors.GREEN)
-                            break
-                    except Exception:
-                        continue
-            else:
-                browser_funcs = {
-                    "chrome": browser_cookie3.chrome,
-                    "firefox": browser_cookie3.firefox,
-                    "edge": browser_cookie3.edge,
-                    "safari": browser_cookie3.safari,
-                    "opera": browser_cookie3.opera
-                }
-                
-                if browser_type in browser_funcs:
-                    cookies_jar = browser_funcs[browser_type](domain_name=domain)
-            
-            if not cookies_jar:
-                return False
-            
-            cookies_list = list(cookies_jar)
+            # فحص المتصفحات بالتوازي مع ذاكرة لكل نطاق (لا يُعاد فك التشفير إلا إذا تغيرت قاعدة المتصفح)
+            hits = shared_cookie_cache.stats["hits"]
+            browser_name, cookies_list = load_browser_cookies(domain, browser_type)
             if not cookies_list:
                 return False
             
-            # إضافة cookies للجلسة
-            for cookie in cookies_list:
-                self.session.cookies.set(
-                    cookie.name, 
-                    cookie.value,
-                    domain=cookie.domain,
-                    path=cookie.path
-                )
+            source = "من الذاكرة" if shared_cookie_cache.stats["hits"] > hits else "من قاعدة المتصفح"
+            self.log(f"✅ تم العثور على {len(cookies_list)} cookie في {browser_name} ({source})", ft.Colors.GREEN)
+            
+            # إضافة cookies للجلسة (مع تاريخ انتهائها حتى يبقى عند التصدير)
+            apply_cookies(self.session, cookies_list)
             
             self.log(f"✅ تم استخراج {len(cookies_list)} cookie بنجاح", ft.Colors.GREEN, "success")
             return True
@@ -1348,32 +1599,97 @@ scraped_at: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}
         self.log("🔄 بدء عملية استخراج cookies...", ft.Colors.BLUE)
         
         if self.extract_cookies_from_browser(domain, browser_type):
-            # اختبار الاتصال
-            test_url = self.url_field.current.value.strip() if self.url_field.current.value else f"https://{domain}"
-            
-            try:
-                self.log("🧪 اختبار الوصول للصفحة...", ft.Colors.BLUE)
-                
-                headers = {
-                    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
-                }
-                response = self.session.get(test_url, headers=headers, timeout=10)
-                
-                if response.status_code == 200:
-                    self.log("✅ نجح اختبار الاتصال! جاهز للكشط", ft.Colors.GREEN, "success")
-                    self.start_btn.disabled = False
-                    self.start_btn.update()
-                    self.status_text.value = "✅ جاهز للكشط - تم التحقق من Cookies"
-                    self.status_text.color = ft.Colors.GREEN_700
-                    self.status_text.update()
-                else:
-                    self.log(f"⚠️ رمز الاستجابة: {response.status_code}", ft.Colors.ORANGE)
-                    
-            except Exception as ex:
-                self.log(f"❌ خطأ في الاختبار: {str(ex)}", ft.Colors.RED, "error")
+            self.verify_session(domain)
         else:
             self.log("❌ فشل استخراج cookies", ft.Colors.RED, "error")
     
+    def verify_session(self, domain):
+        """اختبار الوصول للصفحة بالكوكيز الحالية وتفعيل زر البدء عند النجاح"""
+        test_url = self.url_field.current.value.strip() if self.url_field.current.value else f"https://{domain}"
+        
+        try:
+            self.log("🧪 اختبار الوصول للصفحة...", ft.Colors.BLUE)
+            
+            headers = {
+                'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
+            }
+            response = self.session.get(test_url, headers=headers, timeout=10)
+            
+            if response.status_code == 200:
+                self.log("✅ نجح اختبار الاتصال! جاهز للكشط", ft.Colors.GREEN, "success")
+                self.start_btn.disabled = False
+                self.start_btn.update()
+                self.status_text.value = "✅ جاهز للكشط - تم التحقق من Cookies"
+                self.status_text.color = ft.Colors.GREEN_700
+                self.status_text.update()
+            else:
+                self.log(f"⚠️ رمز الاستجابة: {response.status_code}", ft.Colors.ORANGE)
+                
+        except Exception as ex:
+            self.log(f"❌ خطأ في الاختبار: {str(ex)}", ft.Colors.RED, "error")
+    
+    def pick_cookies_file(self, e):
+        """اختيار ملف كوكيز للاستيراد"""
+        def file_result(e: ft.FilePickerResultEvent):
+            if e.files:
+                if self.import_cookies_file(e.files[0].path):
+                    domain = self.domain_field.current.value.strip()
+                    if domain:
+                        self.verify_session(domain)
+        
+        file_picker = ft.FilePicker(on_result=file_result)
+        e.page.overlay.append(file_picker)
+        e.page.update()
+        file_picker.pick_files(allowed_extensions=["txt", "json"])
+    
+    def import_cookies_file(self, path):
+        """تحميل cookies.txt أو JSON في الجلسة مع استبعاد الكوكيز المنتهية"""
+        try:
+            cookies, expired = load_cookie_jar(path)
+        except (OSError, ValueError) as ex:
+            self.log(f"❌ تعذر قراءة ملف الكوكيز: {str(ex)}", ft.Colors.RED, "error")
+            return False
+        
+        if expired:
+            self.log(f"⏰ تم تجاهل {expired} cookie منتهية الصلاحية", ft.Colors.ORANGE, "warning")
+        if not cookies:
+            self.log("❌ لا توجد cookies صالحة في الملف", ft.Colors.RED, "error")
+            return False
+        
+        apply_cookies(self.session, cookies)
+        self.log(f"📥 تم تحميل {len(cookies)} cookie من {os.path.basename(path)}", ft.Colors.GREEN, "success")
+        warning = expiry_warning(cookies)
+        if warning:
+            self.log(warning, ft.Colors.ORANGE, "warning")
+        return True
+    
+    def export_cookies(self, e):
+        """حفظ كوكيز الجلسة كملف cookies.txt أو JSON"""
+        if not len(self.session.cookies):
+            self.log("❌ لا توجد cookies في الجلسة للتصدير", ft.Colors.RED, "error")
+            return
+        
+        def save_result(e: ft.FilePickerResultEvent):
+            if not e.path:
+                return
+            try:
+                count = save_cookie_jar(self.session.cookies, e.path)
+                self.log(f"📤 تم تصدير {count} cookie إلى: {e.path}", ft.Colors.GREEN, "success")
+            except OSError as ex:
+                self.log(f"❌ خطأ في تصدير الكوكيز: {str(ex)}", ft.Colors.RED, "error")
+        
+        file_picker = ft.FilePicker(on_result=save_result)
+        e.page.overlay.append(file_picker)
+        e.page.update()
+        file_picker.save_file(file_name="cookies.txt", allowed_extensions=["txt", "json"])
+    
+    def stored_page(self, url):
+        """إعادة التصدير: آخر HTML محفوظ للصفحة يُحلل ويُصدّر بالإعدادات الحالية بدون طلب"""
+        stored = self.raw_store.get_url(url)
+        if stored:
+            self.log(f"♻️ من المخزن الخام بدون جلب: {url}", ft.Colors.BLUE)
+        return stored
+    
     def get_page_content(self, url):
         """جلب محتوى الصفحة مع معالجة متقدمة"""
         try:
@@ -1386,11 +1702,71 @@ scraped_at: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}
                 'Upgrade-Insecure-Requests': '1',
             }
             
-            response = self.session.get(url, headers=headers, timeout=15)
-            response.raise_for_status()
-            
-            return response.text
+            # وضع API: صفحة من نمط معروف تُجلب كـ JSON مباشرة بدل HTML
+            if self.api_replayer and url != self.main_url:
+                replayed = self.api_replayer.fetch(url)
+                if replayed:
+                    if self.raw_store:
+                        self.raw_store.put(url, replayed)
+                    return replayed
+            
+            # طلب شرطي إذا كانت الصفحة محفوظة من جلسة سابقة
+            cached = self.http_cache.lookup(url) if self.http_cache else None
+            if cached:
+                headers.update(cached.conditional_headers())
+            
+            # إعادة المحاولة مع تراجع أُسّي حسب نوع الخطأ (ما دامت دائرة المضيف مغلقة)
+            host = urlparse(url).netloc
+            response = fetch_with_retry(
+                lambda: self.session.get(url, headers=headers, timeout=15),
+                can_retry=lambda: not self.breaker.is_open(host),
+                on_retry=lambda kind, attempt, delay: self.log(
+                    f"🔁 إعادة المحاولة {attempt} ({kind}) بعد {delay:.1f} ث: {url}",
+                    ft.Colors.ORANGE, "warning"
+                ),
+                retries=self.retry_counts.pop(url, None)
+            )
             
+            revalidated = response.status_code == 304 and cached
+            if revalidated:
+                content = self.http_cache.revalidated(cached, response)
+                self.not_modified.add(url)
+            else:
+                response.raise_for_status()
+                content = response.text
+            
+            # محتوى يُبنى بـ JavaScript: إعادة عرض الصفحة بمتصفح خفي من المجموعة
+            # (ملف تعريف الموقع يحسم الفحص: كل صفحاته تحتاج متصفحاً، أو لا تحتاجه أبداً - مع فحص عينة للمراجعة)
+            # يسبق فحص الأخطاء المقنّعة: هياكل JS المتطابقة تبدو صفحة مكررة قبل عرضها
+            if self.browser_pool:
+                check = lambda: needs_rendering(content, backend=self.parser_backend)
+                if self.site_profile.needs_render(check) if self.site_profile else check():
+                    content = self.render_page(url) or content
+            
+            if not revalidated:
+                # صفحة دخول أو "غير موجود" بحالة 200 (بعد العرض): لا تُخزن ولا تُحفظ
+                kind = self.page_classifier.classify(url, content, response.url)
+                if kind:
+                    self.failure_reasons[url] = kind
+                    self.log(f"🛡️ تم تخطي {url}: {SOFT_ERROR_LABELS[kind]}", ft.Colors.ORANGE, "warning")
+                    return None
+            
+            # وضع API: اكتشاف واجهة JSON لنمط هذه الصفحة (مرة واحدة لكل نمط)
+            if self.api_replayer and url != self.main_url:
+                if self.api_replayer.learn(url, content):
+                    self.log(f"⚡ تم اكتشاف واجهة JSON لصفحات مثل: {url}", ft.Colors.GREEN, "success")
+            
+            # حفظ المحتوى الخام في المخزن الدائم (وبصمته مع محددات ذاكرة HTTP بدل نسخة ثانية منه)
+            digest = self.raw_store.put(url, content) if self.raw_store else None
+            if self.http_cache and not revalidated:
+                self.http_cache.store(url, response, digest)
+            
+            return content
+            
+        except RetryLater as retry:
+            # المحرك يعيد الرابط عبر مجدول المضيف بعد المهلة (بدون انتظار في خيط الجلب)
+            self.retry_counts[url] = retry.retries
+            raise
         except requests.exceptions.Timeout:
             self.log(f"⏰ انتهت مهلة الاتصال: {url}", ft.Colors.ORANGE, "error")
         except requests.exceptions.RequestException as e:
@@ -1400,55 +1776,103 @@ scraped_at: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}
         
         return None
     
-    def extract_links(self, html, base_url, element_id):
-        """استخراج الروابط المتقدم"""
-        soup = BeautifulSoup(html, 'html.parser')
+    def near_duplicate_of(self, url, embedded, page):
+        """الصفحة الأصلية إذا كان نص هذه الصفحة المنظف يكاد يطابقها، وإلا None"""
+        if not self.near_duplicates:
+            return None
+        try:
+            text = embedded.to_markdown() if embedded else page.cleaned(self.clean_content).get_text(" ", strip=True)
+        except Exception:
+            return None
+        return self.near_duplicates.check(url, text)
+    
+    def link_scope_selectors(self, element_id):
+        """محددات حاوية الروابط بالترتيب: المحفوظ في ملف تعريف الموقع أولاً"""
+        selectors = scope_selectors(element_id)
+        stored = self.site_profile.link_scope(element_id) if self.site_profile else None
+        if stored:
+            selectors = [stored] + [selector for selector in selectors if selector != stored]
+        return selectors
+    
+    def remember_link_scope(self, element_id, selector):
+        if self.site_profile:
+            self.site_profile.remember_scope(element_id, selector)
+    
+    def extract_links(self, html, base_url, element_id, anchors=None, embedded=None, page=None):
+        """
+        استخراج الروابط المتقدم (anchors: قاموس يُملأ بنص كل رابط إن مُرر)
+        embedded: روابط الحمولة المضمّنة تُغني عن تحليل الصفحات الفرعية
+        page: الصفحة المحللة المشتركة (تُقرأ روابطها قبل تنظيفها)
+        """
         links = []
         
         # تحديد منطقة البحث
-        if base_url == self.main_url:
-            self.log(f"🏠 كشط الصفحة الرئيسية - العنصر: {element_id}", ft.Colors.BLUE)
-            
-            # البحث بـ ID أولاً
-            element = soup.find(id=element_id)
-            if not element:
-                # البحث بـ class
-                element = soup.find(class_=element_id)
-                if not element:
-                    # البحث بـ CSS selector
+        if embedded and embedded.links and base_url != self.main_url:
+            self.log(f"🧩 روابط من البيانات المضمّنة في الصفحة", ft.Colors.BLUE)
+            candidates = embedded.links
+        else:
+            is_main = base_url == self.main_url
+            if is_main:
+                self.log(f"🏠 كشط الصفحة الرئيسية - العنصر: {element_id}", ft.Colors.BLUE)
+            else:
+                self.log(f"📄 كشط صفحة فرعية", ft.Colors.BLUE)
+            
+            # المسار السريع (selectolax) بدون بناء شجرة BeautifulSoup
+            # (حاوية الروابط بالمحدد المحفوظ في ملف تعريف الموقع أولاً ثم id ثم class ثم CSS)
+            scopes = self.link_scope_selectors(element_id) if is_main else None
+            candidates = self.parser_backend.find_links(
+                html, selectors=scopes, on_scope=lambda selector: self.remember_link_scope(element_id, selector)
+            )
+            if candidates is not None:
+                if is_main and not candidates:
+                    self.log(f"⚠️ لم يتم العثور على العنصر أو روابطه: {element_id}", ft.Colors.ORANGE)
+                    return links
+        
+        if candidates is None:
+            soup = page.soup if page else self.parser_backend.make_soup(html)
+            if base_url == self.main_url:
+                # المحدد المحفوظ ثم ID ثم class ثم CSS selector
+                element = None
+                for selector in self.link_scope_selectors(element_id):
                     try:
-                        element = soup.select_one(element_id)
+                        element = soup.select_one(selector)
                     except Exception:
-                        pass
-                    
-                    if not element:
-                        self.log(f"⚠️ لم يتم العثور على العنصر: {element_id}", ft.Colors.ORANGE)
-                        return links
-            
-            search_area = element
-        else:
-            self.log(f"📄 كشط صفحة فرعية", ft.Colors.BLUE)
-            search_area = soup
+                        continue
+                    if element:
+                        self.remember_link_scope(element_id, selector)
+                        break
+                
+                if not element:
+                    self.log(f"⚠️ لم يتم العثور على العنصر: {element_id}", ft.Colors.ORANGE)
+                    return links
+                
+                search_area = element
+            else:
+                search_area = soup
+            candidates = (
+                (link_tag.get('href', '').strip(), link_tag.get_text(" ", strip=True))
+                for link_tag in search_area.find_all('a', href=True)
+            )
         
-        # استخراج الروابط
-        for link_tag in search_area.find_all('a', href=True):
-            href = link_tag.get('href', '').strip()
+        # استخراج الروابط (مجموعة للفحص السريع مع الحفاظ على ترتيب الظهور)
+        seen_links = set()
+        for href, anchor_text in candidates:
             if not href or href.startswith('#') or href.startswith('javascript:') or href.startswith('mailto:'):
                 continue
             
-            # تحويل إلى رابط كامل
+            # تحويل إلى رابط كامل ثم توحيده (الأنكور، / النهائية، معاملات التتبع، ترتيب المعاملات...)
             full_url = urljoin(base_url, href)
+            clean_url = self.canonicalizer.record(full_url)
             
             # التحقق من النطاق
-            if urlparse(full_url).netloc == urlparse(base_url).netloc:
-                # تنظيف الرابط
-                clean_url = full_url.split('#')[0]  # إزالة الأنكور
-                clean_url = clean_url.rstrip('/')  # إزالة / في النهاية
-                
-                if clean_url not in links and clean_url != base_url:
+            if urlparse(clean_url).netloc == urlparse(base_url).netloc:
+                if clean_url not in seen_links and clean_url != base_url:
+                    seen_links.add(clean_url)
                     links.append(clean_url)
+                    if anchors is not None:
+                        anchors[clean_url] = anchor_text or ""
         
-        unique_links = list(set(links))
+        unique_links = links
         self.total_found_links += len(unique_links)
         self.log(f"📎 تم العثور على {len(unique_links)} رابط جديد", ft.Colors.BLUE)
         
@@ -1470,36 +1894,161 @@ scraped_at: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}
             # إنشاء المجلد
             os.makedirs(folder, exist_ok=True)
             
-            # إنشاء مجلد فرعي بالتاريخ والوقت
-            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+            # قواعد توحيد الروابط (العامة + الخاصة بالمواقع + معاملات المستخدم)
             domain = urlparse(url).netloc.replace('www.', '')
-            session_folder = os.path.join(folder, f"{domain}_{timestamp}")
-            os.makedirs(session_folder, exist_ok=True)
+            self.canonicalizer = self.build_canonicalizer(folder, domain)
+            
+            # ذاكرة HTTP الدائمة (مشتركة بين جميع الجلسات في نفس المجلد)
+            self.raw_store = RawStore(cache_dir(folder, "raw"))
+            self.http_cache = HttpCache(
+                cache_path(folder, "http_cache.sqlite"),
+                self.raw_store,
+                key=self.canonicalizer.canonicalize
+            )
+            self.export_store = ExportStore(cache_dir(folder, "exports"))
+            pruned = self.export_store.prune()
+            if pruned:
+                self.log(f"🧹 حُذف {pruned} ملف مصدّر لم تعد أي جلسة تستخدمه", ft.Colors.BLUE)
+            
+            checkpoints_dir = cache_dir(folder, "checkpoints")
             
-            self.main_url = url
             self.scraped_urls.clear()
+            self.breaker.reset()
             self.failed_urls.clear()
+            self.failure_reasons.clear()
+            self.retry_counts.clear()
+            self.embedded_stats = {}
             self.total_found_links = 0
+            self.page_classifier = PageClassifier(
+                login_markers=[m.strip() for m in (self.login_markers_field.current.value or "").split(",")]
+            )
+            
+            # استئناف آخر جلسة غير مكتملة لنفس النطاق إن طُلب ذلك
+            checkpoint = None
+            resume_state = None
+            if self.resume_checkbox.current and self.resume_checkbox.current.value:
+                checkpoint = latest_unfinished(checkpoints_dir, f"{domain}_")
+                resume_state = checkpoint.load() if checkpoint else None
+                if not resume_state:
+                    self.log("ℹ️ لا توجد جلسة غير مكتملة لهذا النطاق، سيتم بدء جلسة جديدة", ft.Colors.ORANGE)
+            
+            if resume_state:
+                session_folder = resume_state["session_folder"]
+                url = resume_state["main_url"]
+                max_depth = resume_state["max_depth"]
+                self.scraped_urls.update(resume_state["scraped"])
+                self.failed_urls.update(resume_state["failed"])
+                self.total_found_links = resume_state["total_found_links"]
+                self.log(f"♻️ استئناف الجلسة: {len(self.scraped_urls)} صفحة مكتملة، "
+                         f"{len(resume_state['frontier'])} في الانتظار", ft.Colors.GREEN)
+            else:
+                url = self.canonicalizer.canonicalize(url)
+                # إنشاء مجلد فرعي بالتاريخ والوقت
+                timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+                session_folder = os.path.join(folder, f"{domain}_{timestamp}")
+                checkpoint = CrawlCheckpoint(
+                    os.path.join(checkpoints_dir, f"{domain}_{timestamp}.json.gz")
+                )
+            os.makedirs(session_folder, exist_ok=True)
+            
+            self.main_url = url
             
             export_format = self.export_format.current.value
             self.log(f"🚀 بدء الكشط المتقدم من: {url}", ft.Colors.GREEN)
             self.log(f"📁 مجلد الحفظ: {session_folder}", ft.Colors.BLUE)
             self.log(f"📤 تنسيق التصدير: {export_format}", ft.Colors.BLUE)
             
-            # قائمة انتظار مع مستوى العمق
-            urls_queue = [(url, 0)]  # (url, depth)
-            processed_count = 0
+            # سجل الصفحات المحفوظة في الجلسات السابقة (أساس الكشط التزايدي)
+            incremental = bool(self.incremental_checkbox.current and self.incremental_checkbox.current.value)
+            self.reexport = bool(self.reexport_checkbox.current and self.reexport_checkbox.current.value)
+            self.manifest = SiteManifest(cache_path(folder, "manifests", f"{domain}.json.gz")).load()
+            self.not_modified.clear()
+            self.page_files.clear()
+            self.file_names.clear()
+            
+            # ما تعلمناه عن الموقع في الجلسات السابقة
+            self.site_profile = SiteProfile(cache_path(folder, "profiles", f"{domain}.json")).load()
+            if self.site_profile.data["updated_at"]:
+                self.log(f"📇 ملف تعريف الموقع: {self.site_profile.summary()}", ft.Colors.BLUE)
+            
+            # قواعد robots.txt وروابط خرائط الموقع (قبل أي جلب)
+            seeds = self.discover_site(url, max_depth, skip_sitemaps=bool(resume_state), force_sitemaps=incremental)
+            if incremental and not resume_state:
+                seeds = self.carry_forward_unchanged(seeds, session_folder)
+            
+            # استراتيجية قائمة الانتظار والميزانية
+            frontier_factory = self.build_frontier_factory()
+            if frontier_factory is None:
+                self.stop_scraping(None)
+                return
+            self.cleaning_rules = self.build_cleaning_rules()
+            if self.cleaning_rules is None:
+                self.stop_scraping(None)
+                return
+            learn_template = self.boilerplate_checkbox.current and self.boilerplate_checkbox.current.value
+            self.boilerplate = BoilerplateLearner() if learn_template else None
+            if self.boilerplate:
+                self.boilerplate.preload(self.site_profile.boilerplate)
+            skip_near_duplicates = self.near_duplicates_checkbox.current and self.near_duplicates_checkbox.current.value
+            self.near_duplicates = NearDuplicateIndex() if skip_near_duplicates else None
+            max_pages = self.parse_budget(self.page_budget_field)
+            time_budget = self.parse_budget(self.time_budget_field) * 60
+            if max_pages or time_budget:
+                self.log(f"💰 الميزانية: {max_pages or '∞'} صفحة، {time_budget // 60 or '∞'} دقيقة", ft.Colors.BLUE)
+            
+            # محرك الجلب المتزامن
+            max_in_flight = int(self.concurrency_dropdown.current.value or DEFAULT_MAX_IN_FLIGHT)
+            engine = FetchEngine(
+                self.session,
+                self.get_page_content,
+                max_in_flight=max_in_flight,
+                scheduler=self.scheduler,
+                breaker=self.breaker,
+                frontier_factory=frontier_factory,
+                local_page=self.stored_page if self.reexport else None
+            )
+            self.log(f"⚡ الطلبات المتزامنة: {max_in_flight}", ft.Colors.BLUE)
+            # اختيار المستخدم، و"تلقائي" يعتمد ما قرره الوضع التلقائي سابقاً لهذا الموقع
+            self.parser_choice = self.parser_dropdown.current.value or "auto"
+            if self.parser_choice == "auto" and self.site_profile.parser:
+                self.parser_backend = ParserBackend(self.site_profile.parser)
+            else:
+                self.parser_backend = ParserBackend(self.parser_choice)
+            self.log(f"🧬 محلل HTML: {self.parser_backend.name}", ft.Colors.BLUE)
+            
+            # متصفحات خفية للصفحات التي يبنيها JavaScript (لا تُشغّل إلا عند أول صفحة تحتاجها)
+            if self.render_checkbox.current and self.render_checkbox.current.value:
+                if RENDERING_AVAILABLE:
+                    self.browser_pool = BrowserPool(
+                        size=min(max_in_flight, DEFAULT_POOL_SIZE),
+                        user_agent=self.session.headers.get("User-Agent")
+                    )
+                else:
+                    self.log("⚠️ selenium غير مثبت - سيتم تجاهل عرض صفحات JavaScript", ft.Colors.ORANGE, "warning")
             
-            while urls_queue and self.is_scraping and not self.is_paused:
-                current_url, depth = urls_queue.pop(0)
-                
-                # فحص العمق المحدد
-                if max_depth != "unlimited" and depth >= int(max_depth):
-                    continue
-                
-                if current_url in self.scraped_urls:
-                    continue
-                
+            # وضع API: الاكتشاف من HTML وملفات JS (ومن طلبات المتصفح الخفي إن كان مفعلاً)
+            if self.api_replay_checkbox.current and self.api_replay_checkbox.current.value:
+                self.api_replayer = ApiReplayer(
+                    self.session, self.browser_pool, scheduler=self.scheduler, breaker=self.breaker
+                )
+                self.api_replayer.preload(self.site_profile.api_routes)
+            processed_count = resume_state["processed_count"] if resume_state else 0
+            
+            def save_checkpoint(frontier, status=STATUS_RUNNING):
+                checkpoint.save({
+                    "status": status,
+                    "main_url": url,
+                    "max_depth": max_depth,
+                    "session_folder": session_folder,
+                    "frontier": frontier,
+                    "scraped": list(self.scraped_urls),
+                    "failed": list(self.failed_urls),
+                    "total_found_links": self.total_found_links,
+                    "processed_count": processed_count,
+                })
+            
+            def handle_page(current_url, depth, content):
+                nonlocal processed_count
                 processed_count += 1
                 self.scraped_urls.add(current_url)
                 
@@ -1509,56 +2058,255 @@ scraped_at: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}
                 
                 self.log(f"🔍 معالجة [{processed_count}]: {current_url}", ft.Colors.BLUE)
                 
-                # جلب المحتوى
-                content = self.get_page_content(current_url)
                 if not content:
                     self.failed_urls.add(current_url)
                     self.update_stats()
-                    continue
+                    if self.page_classifier.should_halt():
+                        self.halt_on_login_wall()
+                    return []
                 
-                # حفظ المحتوى
-                if self.save_content(current_url, content, session_folder):
-                    self.log(f"💾 تم حفظ المحتوى بنجاح", ft.Colors.GREEN, "success")
-                else:
-                    self.failed_urls.add(current_url)
+                # تحليل الصفحة مرة واحدة: الروابط (مع نصوصها لتقييم الأولوية) تُستخرج قبل أن يحذف التنظيف عناصرها
+                page = ParsedPage(current_url, content, self.parser_backend)
+                
+                # محتوى JSON مضمّن (__NEXT_DATA__ / JSON-LD) يُغني عن الصفحة للحفظ والروابط،
+                # إلا إذا كان نص محتواها الرئيسي أطول منه بوضوح
+                embedded = extract_embedded(content, current_url)
+                if embedded and not embedded.covers(page.main_text_chars()):
+                    embedded = None
+                if embedded:
+                    self.embedded_stats[embedded.source] = self.embedded_stats.get(embedded.source, 0) + 1
+                anchors = {}
+                new_links = self.extract_links(content, current_url, element_id, anchors, embedded, page)
                 
-                # استخراج الروابط
-                new_links = self.extract_links(content, current_url, element_id)
+                # الكشط التزايدي: صفحة لم تتغير (304) تُنقل ملفاتها من الجلسة السابقة بدل إعادة التحويل
+                # (إلا إذا شغل ملف آخر مكانها فتُحفظ من جديد)
+                not_modified = (incremental and current_url in self.not_modified
+                                and self.manifest.has_files(current_url)
+                                and self.manifest.carry_forward(current_url, session_folder, "304"))
+                duplicate_of = None if not_modified else self.near_duplicate_of(current_url, embedded, page)
+                if not_modified:
+                    self.log(f"♻️ لم تتغير الصفحة (304)، نُقلت من الجلسة السابقة", ft.Colors.BLUE)
                 
-                # إضافة الروابط الجديدة للقائمة
-                for link in new_links:
-                    if link not in self.scraped_urls and not any(link == item[0] for item in urls_queue):
-                        urls_queue.append((link, depth + 1))
+                # صفحة شبه مكررة: تُربط بأصلها في التقرير بدل تحويلها وضغطها مرة أخرى
+                elif duplicate_of:
+                    self.log(f"🪞 صفحة شبه مكررة لـ {duplicate_of} - تم تخطي التصدير", ft.Colors.BLUE)
+                
+                # حفظ المحتوى
+                else:
+                    export_started = time.perf_counter()
+                    if self.save_content(current_url, content, session_folder, embedded, page):
+                        self.log(f"💾 تم حفظ المحتوى بنجاح", ft.Colors.GREEN, "success")
+                        files = self.page_files.pop(current_url, [])
+                        if self.near_duplicates:
+                            self.near_duplicates.note_export(
+                                time.perf_counter() - export_started,
+                                sum(os.path.getsize(os.path.join(session_folder, name)) for name in files)
+                            )
+                        self.manifest.record(current_url, session_folder, files, self.sitemap_lastmod.get(current_url))
+                    else:
+                        self.failed_urls.add(current_url)
                 
                 # تحديث الإحصائيات
                 self.update_stats()
                 
-                # تأخير مهذب
-                time.sleep(2)
+                return [(link, anchors.get(link)) for link in new_links if link not in self.scraped_urls]
+            
+            engine.crawl(
+                [] if resume_state else [url],
+                handle_page,
+                max_depth=None if max_depth == "unlimited" else int(max_depth),
+                should_stop=lambda: not self.is_scraping,
+                should_pause=lambda: self.is_paused,
+                frontier=[tuple(item) for item in resume_state["frontier"]] if resume_state else seeds,
+                visited=self.scraped_urls | self.failed_urls,
+                checkpoint=save_checkpoint,
+                max_pages=max_pages or None,
+                time_budget=time_budget or None,
+                allow=self.robots.allowed if self.robots else None
+            )
+            self.log(f"⏱️ مدة الجلب: {engine.stats['elapsed']:.1f} ثانية", ft.Colors.BLUE)
+            if engine.stats["host_down"]:
+                self.log(f"🔌 {engine.stats['host_down']} رابط لم يُجلب لتوقف المضيف", ft.Colors.ORANGE, "warning")
+            if engine.stats["disallowed"]:
+                self.log(f"🤖 {engine.stats['disallowed']} رابط تم تخطيه حسب robots.txt", ft.Colors.BLUE)
+            self.discovery_stats["disallowed"] = engine.stats["disallowed"]
+            self.manifest.save()
+            self.remember_site_profile()
+            if incremental:
+                self.log(f"🔁 الكشط التزايدي: {self.manifest.summary()}", ft.Colors.BLUE)
+            if self.failure_reasons:
+                self.log(f"🛡️ صفحات تم تخطيها: {self.page_classifier.summary()}", ft.Colors.ORANGE, "warning")
+            self.log(f"🔗 توحيد الروابط: {self.canonicalizer.summary()}", ft.Colors.BLUE)
+            self.log(f"♻️ ذاكرة HTTP: {self.http_cache.summary()}", ft.Colors.BLUE)
+            self.log(f"🗃️ مخزن HTML الخام: {self.raw_store.summary()}", ft.Colors.BLUE)
+            if self.browser_pool:
+                self.log(f"🧭 المتصفح الخفي: {self.browser_pool.summary()}", ft.Colors.BLUE)
+            if self.api_replayer:
+                self.log(f"⚡ وضع API: {self.api_replayer.summary()}", ft.Colors.BLUE)
+            if self.boilerplate:
+                self.log(f"🧠 قالب الموقع: {self.boilerplate.summary()}", ft.Colors.BLUE)
+            if self.near_duplicates and self.near_duplicates.canonical:
+                self.log(f"🪞 {self.near_duplicates.summary()}", ft.Colors.BLUE)
+            if self.export_store.stats["reused"]:
+                self.log(f"🔗 الملفات المصدّرة: {self.export_store.summary()}", ft.Colors.BLUE)
+            if self.embedded_stats:
+                embedded_summary = "، ".join(f"{count} من {source}" for source, count in self.embedded_stats.items())
+                self.log(f"🧩 صفحات من البيانات المضمّنة: {embedded_summary}", ft.Colors.BLUE)
             
             # النتائج النهائية
             if self.is_scraping:
+                save_checkpoint([], STATUS_COMPLETED)
                 self.log("🎉 اكتملت عملية الكشط بنجاح!", ft.Colors.GREEN, "success")
                 self.log(f"📊 النتائج النهائية: {len(self.scraped_urls)} صفحة، {len(self.failed_urls)} فاشلة", ft.Colors.BLUE)
                 
                 # حفظ تقرير
                 self.save_report(session_folder)
                 self.save_index_file(session_folder)
-                    # ضغط المجلد بعد الكشط
-                    zip_path = self.zip_folder(session_folder)
-                    # إرسال الملف المضغوط إلى البريد الإلكتروني
-                    self.send_email_with_attachment(zip_path)
-                    # إضافة صف للجدول الملخص
-                    project_name = os.path.basename(session_folder)
-                    date_str = datetime.now().strftime('%Y-%m-%d %H:%M')
-                    self.add_summary_entry(project_name, zip_path, date_str)
+                # ضغط المجلد بعد الكشط
+                zip_path = self.zip_folder(session_folder)
+                # إرسال الملف المضغوط إلى البريد الإلكتروني
+                self.send_email_with_attachment(zip_path)
+                # إضافة صف للجدول الملخص
+                project_name = os.path.basename(session_folder)
+                date_str = datetime.now().strftime('%Y-%m-%d %H:%M')
+                self.add_summary_entry(project_name, zip_path, date_str)
             
         except Exception as e:
             self.log(f"💥 خطأ كارثي: {str(e)}", ft.Colors.RED, "error")
         
         finally:
+            if self.http_cache:
+                self.http_cache.close()
+                self.http_cache = None
+            if self.raw_store:
+                self.raw_store.close()
+                self.raw_store = None
+            if self.browser_pool:
+                self.browser_pool.close()
+                self.browser_pool = None
+            self.api_replayer = None
             self.stop_scraping(None)
     
+    def remember_site_profile(self):
+        """حفظ ما نجح في هذه الجلسة في ملف تعريف الموقع"""
+        profile = self.site_profile
+        profile.remember_parser(self.parser_backend, self.parser_choice)
+        profile.remember_fetch()
+        if self.api_replayer:
+            profile.remember_api_routes(self.api_replayer.export_routes())
+        if self.boilerplate:
+            profile.remember_boilerplate(self.boilerplate.export())
+        try:
+            profile.save()
+        except OSError as e:
+            self.log(f"⚠️ تعذر حفظ ملف تعريف الموقع: {str(e)}", ft.Colors.ORANGE, "warning")
+            return
+        self.log(f"📇 ملف تعريف الموقع: {profile.summary()}", ft.Colors.BLUE)
+    
+    def render_page(self, url):
+        """HTML الصفحة من المتصفح الخفي، أو None (مع تعطيل العرض إذا تعذر تشغيل المتصفح)"""
+        pool = self.browser_pool
+        try:
+            html = pool.render(url, self.session.cookies)
+        except Exception as e:
+            self.log(f"⚠️ تعذر تشغيل المتصفح الخفي، سيتم الاكتفاء بالجلب العادي: {str(e)}", ft.Colors.ORANGE, "warning")
+            self.browser_pool = None
+            pool.close()
+            return None
+        if html:
+            self.log(f"🧭 تم عرض الصفحة بمتصفح خفي: {url}", ft.Colors.BLUE)
+        return html
+    
+    def discover_site(self, url, max_depth, skip_sitemaps=False, force_sitemaps=False):
+        """
+        قراءة robots.txt (Crawl-delay للمجدول، Disallow للفلتر) ثم روابط خرائط الموقع بعمق 1
+        (العمق الأقصى 1 يقتصر على صفحة البداية فلا تُضاف روابط الخريطة للقائمة)
+        """
+        self.robots = None
+        self.sitemap_lastmod = {}
+        self.discovery_stats = {}
+        host = urlparse(url).netloc
+        
+        if self.robots_checkbox.current and self.robots_checkbox.current.value:
+            self.robots = RobotsRules.fetch(self.session, url)
+            delay = self.robots.crawl_delay
+            self.discovery_stats["crawl_delay"] = delay
+            if delay:
+                self.scheduler.set_crawl_delay(host, delay)
+                self.log(f"🤖 robots.txt: Crawl-delay = {delay} ث", ft.Colors.BLUE)
+        
+        use_sitemap = force_sitemaps or (self.sitemap_checkbox.current and self.sitemap_checkbox.current.value)
+        if skip_sitemaps or not use_sitemap:
+            return []
+        
+        self.log("🗺️ قراءة خرائط الموقع...", ft.Colors.BLUE)
+        self.sitemap_lastmod, reader = sitemap_seeds(
+            self.session, url, self.robots, self.canonicalizer.record
+        )
+        self.sitemap_lastmod.pop(url, None)
+        for sitemap_url, error in reader.errors:
+            self.log(f"⚠️ تعذرت قراءة الخريطة {sitemap_url}: {error}", ft.Colors.ORANGE, "warning")
+        if max_depth != "unlimited" and int(max_depth) <= 1:
+            self.discovery_stats["sitemap"] = dict(reader.stats, seeded=0)
+            self.log(f"🗺️ خرائط الموقع: {reader.summary()}، لم يُضف شيء للقائمة (العمق الأقصى 1)",
+                     ft.Colors.ORANGE, "warning")
+            return []
+        self.discovery_stats["sitemap"] = dict(reader.stats, seeded=len(self.sitemap_lastmod))
+        self.log(f"🗺️ خرائط الموقع: {reader.summary()}، {len(self.sitemap_lastmod)} رابط أُضيف للقائمة", ft.Colors.GREEN)
+        return [(link, 1) for link in self.sitemap_lastmod]
+    
+    def carry_forward_unchanged(self, seeds, session_folder):
+        """روابط الخريطة التي لم يتغير lastmod لها تُنقل من الجلسة السابقة ولا تُجلب"""
+        remaining = []
+        for link, depth in seeds:
+            if (self.manifest.is_unchanged(link, self.sitemap_lastmod.get(link))
+                    and self.manifest.carry_forward(link, session_folder, "lastmod")):
+                self.scraped_urls.add(link)
+            else:
+                remaining.append((link, depth))
+        if len(remaining) < len(seeds):
+            self.log(f"🔁 {len(seeds) - len(remaining)} صفحة لم تتغير منذ الجلسة السابقة، "
+                     f"{len(remaining)} للجلب", ft.Colors.GREEN)
+        return remaining
+    
+    def build_canonicalizer(self, folder, domain):
+        """محول الروابط: قواعد canonical_rules.json في مجلد الذاكرة + المعاملات المدخلة للموقع الحالي"""
+        try:
+            canonicalizer = UrlCanonicalizer.from_file(cache_path(folder, RULES_FILE_NAME))
+        except (OSError, ValueError) as e:
+            self.log(f"⚠️ تعذر قراءة قواعد توحيد الروابط: {str(e)}", ft.Colors.ORANGE, "warning")
+            canonicalizer = UrlCanonicalizer()
+        
+        value = self.ignore_params_field.current.value if self.ignore_params_field.current else ""
+        params = [param.strip() for param in (value or "").split(',') if param.strip()]
+        if params:
+            canonicalizer.add_site_rules(domain, {"extra_strip_params": params})
+            self.log(f"🔗 معاملات متجاهلة لـ {domain}: {', '.join(params)}", ft.Colors.BLUE)
+        return canonicalizer
+    
+    def build_frontier_factory(self):
+        """إنشاء قائمة الانتظار حسب الاستراتيجية المختارة (None عند نمط غير صالح)"""
+        if not self.strategy_dropdown.current or self.strategy_dropdown.current.value != "best":
+            return Frontier
+        
+        value = self.priority_patterns_field.current.value or ""
+        terms = [term.strip() for term in value.split(',') if term.strip()]
+        try:
+            scorers = default_scorers(priority_patterns=terms, keywords=terms)
+        except re.error as e:
+            self.log(f"❌ نمط أولوية غير صالح: {str(e)}", ft.Colors.RED, "error")
+            return None
+        
+        self.log(f"🎯 الكشط حسب الأهمية: {', '.join(terms) or 'الإعدادات الافتراضية'}", ft.Colors.BLUE)
+        return lambda depth_limit: PriorityFrontier(depth_limit, scorers)
+    
+    def parse_budget(self, field_ref):
+        """قراءة قيمة ميزانية رقمية (0 عند الفراغ أو القيمة غير الصالحة)"""
+        try:
+            return max(0, int((field_ref.current.value or "0").strip()))
+        except (AttributeError, ValueError):
+            return 0
+    
     def save_report(self, folder):
         """حفظ تقرير مفصل"""
         try:
@@ -1575,9 +2323,33 @@ scraped_at: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}
                     "total_found_links": self.total_found_links,
                     "success_rate": f"{(len(self.scraped_urls)/(len(self.scraped_urls)+len(self.failed_urls))*100):.1f}%" if (len(self.scraped_urls)+len(self.failed_urls)) > 0 else "N/A"
                 },
+                "canonicalization": self.canonicalizer.stats,
+                "discovery": self.discovery_stats,
+                "incremental": self.manifest.stats if self.manifest else None,
+                "soft_errors": self.page_classifier.stats,
+                "embedded_data": self.embedded_stats,
+                "boilerplate": self.boilerplate.stats if self.boilerplate else None,
+                "near_duplicates": {
+                    "stats": self.near_duplicates.stats,
+                    "pages": self.near_duplicates.canonical
+                } if self.near_duplicates else None,
+                "site_profile": {
+                    "stats": self.site_profile.stats,
+                    "content_selector": self.site_profile.content_selector,
+                    "fetch": self.site_profile.fetch,
+                    "parser": self.site_profile.parser
+                } if self.site_profile else None,
+                "api_replay": {
+                    "stats": self.api_replayer.stats,
+                    "routes": self.api_replayer.learned()
+                } if self.api_replayer else None,
+                "http_cache": self.http_cache.stats if self.http_cache else None,
+                "raw_store": self.raw_store.stats if self.raw_store else None,
+                "export_store": self.export_store.stats if self.export_store else None,
                 "urls": {
                     "scraped_urls": list(self.scraped_urls),
-                    "failed_urls": list(self.failed_urls)
+                    "failed_urls": list(self.failed_urls),
+                    "failure_reasons": self.failure_reasons
                 },
                 "settings": {
                     "cleaning_enabled": True,
@@ -1602,19 +2374,35 @@ scraped_at: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}
             export_format = self.export_format.current.value if hasattr(self, 'export_format') else "markdown"
             
             if export_format in ["markdown", "both"]:
+                # ملفات Markdown المحفوظة فعلاً في الجلسة (من سجل الصفحات): الفاشلة وشبه المكررة ليست فيه
+                saved = {}
+                for url, files in self.manifest.session_files(folder).items():
+                    markdown_files = [name for name in files if name.endswith(".md")]
+                    if markdown_files:
+                        saved[url] = markdown_files[0]
+                exported = sorted(saved)
+                # الصفحات شبه المكررة لم تُصدّر: تُربط بملف الصفحة الأصلية في قسم خاص
+                duplicates = self.near_duplicates.canonical if self.near_duplicates else {}
                 index_content = f"""# فهرس المحتوى المكشوط
 
 **المصدر:** {self.main_url}  
 **تاريخ الكشط:** {datetime.now().strftime('%d/%m/%Y الساعة %H:%M')}  
-**عدد الصفحات:** {len(self.scraped_urls)}
+**عدد الصفحات:** {len(exported)}
 
 ## الصفحات المكشوطة:
 
 """
                 
-                for i, url in enumerate(sorted(self.scraped_urls), 1):
-                    filename = self.url_to_filename(url, "md")
-                    index_content += f"{i}. [{url}](./{filename})\n"
+                for i, url in enumerate(exported, 1):
+                    index_content += f"                . [{url}](./{saved[url]})\n"
+                
+                if duplicates:
+                    index_content += f"\n## الصفحات شبه المكررة - لم تُصدّر ({len(duplicates)}):\n\n"
+                    for url, original in sorted(duplicates.items()):
+                        if original in saved:
+                            index_content += f"- {url} ← نسخة من [{original}](./{saved[original]})\n"
+                        else:
+                            index_content += f"- {url} ← نسخة من {original}\n"
                 
                 if self.failed_urls:
                     index_content += f"\n## الصفحات الفاشلة ({len(self.failed_urls)}):\n\n"
@@ -1630,18 +2418,24 @@ scraped_at: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}
             self.log(f"❌ خطأ في إنشاء ملف الفهرس: {str(e)}", ft.Colors.RED, "error")
     
     def url_to_filename(self, url, extension):
-        """تحويل URL إلى اسم ملف"""
+        """
+        اسم ملف الصفحة من مسار الرابط (نفس الاسم للرابط في كل جلسة)
+        رابط آخر بنفس الاسم في الجلسة (مثل /a/b و /a_b أو اختلاف الاستعلام) يُضاف له جزء من بصمة الرابط
+        """
         if url == self.main_url:
-            return f"main_page.{extension}"
+            name = "main_page"
         else:
             parsed_url = urlparse(url)
             path = parsed_url.path.strip('/')
-            if path:
-                filename = path.replace('/', '_').replace('\\', '_')
-                filename = "".join(c for c in filename if c.isalnum() or c in ['_', '-', '.'])
-            else:
-                filename = "index"
-            return f"{filename}.{extension}"
+            name = "".join(c for c in path.replace('/', '_').replace('\\', '_') if c.isalnum() or c in ['_', '-', '.'])
+            name = name or "index"
+            if parsed_url.query:
+                name = f"{name}_{content_hash(url)[:8]}"
+        owner = self.file_names.setdefault(name, url)
+        if owner != url:
+            name = f"{name}_{content_hash(url)[:8]}"
+            self.file_names.setdefault(name, url)
+        return f"{name}.{extension}"
     
     def start_scraping(self, e):
         """بدء الكشط"""
@@ -1685,6 +2479,16 @@ scraped_at: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}
         self.pause_btn.update()
         self.status_text.update()
     
+    def halt_on_login_wall(self):
+        """صفحات دخول متتالية = انتهت الكوكيز غالباً: إيقاف مؤقت (أو كامل) بدل حفظ صفحات الدخول"""
+        self.page_classifier.reset_streak()
+        self.log("🔐 عدة صفحات دخول متتالية - يبدو أن الكوكيز انتهت، حدّثها من المتصفح أو استورد ملف كوكيز",
+                 ft.Colors.RED, "error")
+        if self.login_action_dropdown.current and self.login_action_dropdown.current.value == "stop":
+            self.stop_scraping(None)
+        elif not self.is_paused:
+            self.pause_scraping(None)
+    
     def stop_scraping(self, e):
         """إيقاف الكشط"""
         self.is_scraping = False
@@ -1722,19 +2526,15 @@ scraped_at: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}
             base, ext = os.path.splitext(zip_path)
             i = 1
             while os.path.exists(zip_path):
-                zip_path = f"{base}_{i}{ext}"
+                zip_path = f"{base}_                {ext}"
                 i += 1
             
-            # إنشاء الملف المضغوط
-            with zipfile.ZipFile(zip_path, "w", compression=zipfile.ZIP_DEFLATED) as zf:
-                for root, dirs, files in os.walk(folder_path):
-                    for file in files:
-                        full_path = os.path.join(root, file)
-                        # الحفاظ على المسار النسبي داخل الملف المضغوط
-                        rel_path = os.path.relpath(full_path, os.path.dirname(folder_path))
-                        zf.write(full_path, arcname=rel_path)
+            # إنشاء الملف المضغوط (PDF يُخزن بدون إعادة ضغط، والملفات المربوطة تُضغط مرة)
+            zip_stats = zip_directory(folder_path, zip_path)
             
-            self.log(f"🗜️ تم إنشاء الأرشيف: {os.path.basename(zip_path)}", ft.Colors.BLUE, "success")
+            self.log(f"🗜️ تم إنشاء الأرشيف: {os.path.basename(zip_path)} "
+                     f"({zip_stats['deflated']} مضغوط، {zip_stats['stored']} مخزن كما هو، "
+                     f"{zip_stats['repeated']} مكرر بدون إعادة قراءة)", ft.Colors.BLUE, "success")
             return zip_path
             
         except Exception as e:
@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""
+قياس أداء قائمة انتظار الكشط: القائمة القديمة (list.pop(0) + any) مقابل Frontier
+يحاكي كشط BFS على رسم روابط صناعي حتى مليون رابط
+
+التشغيل:
+    python benchmarks/bench_frontier.py
+    python benchmarks/bench_frontier.py --sizes 1000 10000 100000 1000000 --legacy-max 20000
+"""
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from scrap_core.frontier import Frontier
+
+# عدد الروابط الفرعية لكل صفحة + روابط راجعة مكررة (للتنقل والترقيم)
+FANOUT = 10
+
+
+def page_links(i, n):
+    """روابط صفحة i: أبناء جدد + روابط راجعة لصفحات سابقة (تكرار كما في المواقع الحقيقية)"""
+    links = [f"https://example.com/p/{child}" for child in range(i * FANOUT + 1, i * FANOUT + FANOUT + 1) if child < n]
+    links.append(f"https://example.com/p/{i // 2}")
+    links.append(f"https://example.com/p/{max(0, i - 1)}")
+    return links
+
+
+def page_index(url):
+    return int(url.rsplit("/", 1)[1])
+
+
+def legacy_crawl(n):
+    """نفس منطق scraping_worker القديم"""
+    urls_queue = [("https://example.com/p/0", 0)]
+    scraped_urls = set()
+    while urls_queue:
+        current_url, depth = urls_queue.pop(0)
+        if current_url in scraped_urls:
+            continue
+        scraped_urls.add(current_url)
+        for link in page_links(page_index(current_url), n):
+            if link not in scraped_urls and not any(link == item[0] for item in urls_queue):
+                urls_queue.append((link, depth + 1))
+    return len(scraped_urls)
+
+
+def frontier_crawl(n):
+    """نفس الكشط باستخدام Frontier"""
+    frontier = Frontier()
+    frontier.push("https://example.com/p/0", 0)
+    processed = 0
+    while frontier:
+        url, depth = frontier.pop()
+        processed += 1
+        for link in page_links(page_index(url), n):
+            frontier.push(link, depth + 1)
+    return processed
+
+
+def timed(func, n):
+    started = time.perf_counter()
+    count = func(n)
+    return count, time.perf_counter() - started
+
+
+def main():
+    parser = argparse.ArgumentParser(description="قياس أداء قائمة انتظار الكشط")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 100000, 1000000])
+    parser.add_argument("--legacy-max", type=int, default=20000,
+                        help="أكبر حجم يُشغل عليه المنطق القديم (تربيعي)")
+    args = parser.parse_args()
+
+    print(f"{'URLs':>10} | {'legacy (s)':>12} | {'Frontier (s)':>12} | {'Frontier µs/URL':>15} | speedup")
+    print("-" * 72)
+    for n in args.sizes:
+        count, frontier_time = timed(frontier_crawl, n)
+        assert count == n, (count, n)
+        if n <= args.legacy_max:
+            legacy_count, legacy_time = timed(legacy_crawl, n)
+            assert legacy_count == n, (legacy_count, n)
+            legacy_text = f"{legacy_time:12.3f}"
+            speedup = f"{legacy_time / frontier_time:.0f}x"
+        else:
+            legacy_text = f"{'skipped':>12}"
+            speedup = "-"
+        print(f"{n:>10} | {legacy_text} | {frontier_time:12.3f} | "
+              f"{frontier_time / n * 1e6:15.2f} | {speedup}")
+
+
+if __name__ == "__main__":
+    main()
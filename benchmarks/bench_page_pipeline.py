@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+"""
+قياس وقت المعالج لكل صفحة: المسار القديم (تحليل في extract_links و save_as_markdown و save_as_pdf
+مع تنظيف لكل تنسيق) مقابل ParsedPage (تحليل واحد وتنظيف واحد مشترك) لتنسيق "both"
+توليد PDF نفسه (WeasyPrint) مستبعد لأنه متماثل في المسارين؛ يُقاس ما قبله: التحليل والتنظيف والتسلسل
+
+التشغيل:
+    python benchmarks/bench_page_pipeline.py
+    python benchmarks/bench_page_pipeline.py --pages 50 --paragraphs 40 200
+"""
+
+import argparse
+import os
+import sys
+import time
+from urllib.parse import urljoin
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bs4 import BeautifulSoup
+
+from scrap_core.page import ParsedPage
+
+try:
+    import html2text
+except ImportError:
+    html2text = None
+
+# نفس محددات clean_content الافتراضية (الترويسة والتذييل والشريط الجانبي والإعلانات والمشاركة والتعليقات)
+REMOVE_SELECTORS = [
+    'script', 'style', 'noscript', 'iframe', 'embed', 'object', '[hidden]', '.sr-only', '.visually-hidden',
+    'header', 'nav', '.header', '.navigation', '.navbar', '.site-header', '.main-header', '.top-bar', '#header',
+    '.menu', '.main-menu', '.primary-menu',
+    'footer', '.footer', '.site-footer', '.main-footer', '#footer', '.page-footer', '.bottom-bar',
+    'aside', '.sidebar', '.side-bar', '.widget-area', '#sidebar', '.secondary', '.complementary',
+    '.ad', '.ads', '.advertisement', '.banner', '.promo', '.sponsor', '.google-ads', '.adsense',
+    '[class*="ad-"]', '[id*="ad-"]', '.adsbygoogle',
+    '.social', '.share', '.sharing', '.social-media', '.share-buttons', '.social-icons', '.follow-us',
+    '.comments', '.comment', '#comments', '.comment-section', '.disqus', '.fb-comments',
+]
+MAIN_SELECTORS = [
+    'main', 'article', '.content', '.main-content', '.post-content', '.entry-content', '.article-content',
+    '#content', '.page-content', '.post', '.article', '.entry', '[role="main"]',
+]
+
+
+def make_page(paragraphs):
+    """صفحة صناعية بحجم مقالة حقيقية: قائمة تنقل، مقالة، شريط جانبي، تعليقات، سكربتات"""
+    nav = "".join(f'<li><a href="/section/{i}">Section {i}</a></li>' for i in range(40))
+    body = "".join(
+        f'<p>Paragraph {i} with <a href="/post/{i}">a link</a>, <strong>bold</strong> and <em>text</em> '
+        f'{"lorem ipsum dolor sit amet " * 8}</p>'
+        for i in range(paragraphs)
+    )
+    sidebar = "".join(f'<div class="widget"><a href="/tag/{i}">Tag {i}</a></div>' for i in range(30))
+    comments = "".join(f'<div class="comment"><p>Comment {i} {"nice post " * 10}</p></div>' for i in range(20))
+    scripts = "".join(f"<script>var x{i} = {'{'}a: {i}{'}'};</script>" for i in range(15))
+    return (f"<html><head><title>Bench</title>{scripts}<style>body{{}}</style></head><body>"
+            f"<header><nav><ul>{nav}</ul></nav></header>"
+            f"<main><article><h1>Title</h1>{body}</article></main>"
+            f"<aside class='sidebar'>{sidebar}</aside><section id='comments'>{comments}</section>"
+            f"<div class='ad-banner'>ad</div><footer>Footer {'links ' * 30}</footer></body></html>")
+
+
+def clean(soup, url):
+    for selector in REMOVE_SELECTORS:
+        for element in soup.select(selector):
+            element.decompose()
+    for selector in MAIN_SELECTORS:
+        element = soup.select_one(selector)
+        if element and len(element.get_text(strip=True)) > 100:
+            return element
+    return soup.find('body') or soup
+
+
+def links(soup, base_url):
+    found = []
+    for tag in soup.find_all('a', href=True):
+        found.append((urljoin(base_url, tag['href']), tag.get_text(" ", strip=True)))
+    return found
+
+
+def to_markdown(html):
+    if html2text is None:
+        return html
+    converter = html2text.HTML2Text()
+    converter.body_width = 0
+    return converter.handle(html)
+
+
+def legacy_pipeline(url, html):
+    """save_as_markdown ثم save_as_pdf ثم extract_links: ثلاث تحليلات وتنظيفان"""
+    markdown = to_markdown(str(clean(BeautifulSoup(html, 'html.parser'), url)))
+    pdf_html = str(clean(BeautifulSoup(html, 'html.parser'), url))
+    found = links(BeautifulSoup(html, 'html.parser'), url)
+    return markdown, pdf_html, found
+
+
+def shared_pipeline(url, html):
+    """ParsedPage: الروابط أولاً ثم تنظيف واحد وتسلسل واحد لكل المصدّرات"""
+    page = ParsedPage(url, html)
+    found = links(page.soup, url)
+    markdown = to_markdown(page.cleaned_html(clean))
+    pdf_html = page.cleaned_html(clean)
+    return markdown, pdf_html, found
+
+
+def cpu_per_page(func, pages, html):
+    started = time.process_time()
+    for i in range(pages):
+        result = func(f"https://example.com/post/{i}", html)
+    return (time.process_time() - started) / pages, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="قياس تحليل الصفحة مرة واحدة مقابل المسار القديم")
+    parser.add_argument("--pages", type=int, default=20, help="عدد الصفحات لكل قياس")
+    parser.add_argument("--paragraphs", type=int, nargs="+", default=[20, 80, 200],
+                        help="عدد فقرات المقالة (حجم الصفحة)")
+    args = parser.parse_args()
+
+    if html2text is None:
+        print("⚠️ html2text غير مثبت - يُقاس التحليل والتنظيف فقط")
+    print(f"{'page KB':>8} | {'legacy ms/page':>14} | {'shared ms/page':>14} | {'CPU saved':>10} | speedup")
+    print("-" * 66)
+    for paragraphs in args.paragraphs:
+        html = make_page(paragraphs)
+        legacy_time, legacy_result = cpu_per_page(legacy_pipeline, args.pages, html)
+        shared_time, shared_result = cpu_per_page(shared_pipeline, args.pages, html)
+        # نفس المخرجات في المسارين
+        assert legacy_result[1] == shared_result[1] and legacy_result[2] == shared_result[2]
+        print(f"{len(html) / 1024:8.0f} | {legacy_time * 1000:14.1f} | {shared_time * 1000:14.1f} | "
+              f"{(legacy_time - shared_time) * 1000:8.1f}ms | {legacy_time / shared_time:.2f}x")
+
+
+if __name__ == "__main__":
+    main()
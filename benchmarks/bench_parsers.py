@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+"""
+مقارنة محللات HTML على مجموعة صفحات محفوظة: html.parser مقابل lxml (BeautifulSoup) مقابل selectolax
+يقيس سرعة التحليل الكامل واستخراج الروابط وقياس نص المحتوى الرئيسي، ويتحقق من تطابق المخرجات
+مع html.parser (المرجع)
+
+مصادر الصفحات (--corpus):
+- مجلد مخزن HTML الخام (‎.scrap_cache/raw داخل مجلد الحفظ) - الصفحات التي كُشطت فعلاً
+- أو مجلد ملفات ‎.html
+- بدون --corpus تُستخدم صفحات صناعية من bench_page_pipeline
+
+التشغيل:
+    python benchmarks/bench_parsers.py --corpus ~/ScrapedContent/.scrap_cache/raw
+    python benchmarks/bench_parsers.py --corpus ./saved_pages --limit 500 --repeat 3
+"""
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from scrap_core.parsers import ParserBackend, LXML_AVAILABLE, SELECTOLAX_AVAILABLE
+from scrap_core.raw_store import RawStore
+from scrap_core.renderer import MAIN_SELECTORS
+
+
+def load_corpus(path, limit):
+    """[(الرابط، HTML)] من مخزن خام أو مجلد ملفات HTML أو صفحات صناعية"""
+    if not path:
+        from bench_page_pipeline import make_page
+        return [(f"https://example.com/post/{i}", make_page(20 + i * 10)) for i in range(20)]
+    if os.path.exists(os.path.join(path, "index.sqlite")):
+        store = RawStore(path)
+        try:
+            return list(store.iter_pages(limit))
+        finally:
+            store.close()
+    pages = []
+    for root, _, files in os.walk(path):
+        for name in sorted(files):
+            if name.lower().endswith((".html", ".htm")):
+                with open(os.path.join(root, name), encoding="utf-8", errors="replace") as f:
+                    pages.append((os.path.join(root, name), f.read()))
+                if limit and len(pages) >= limit:
+                    return pages
+    return pages
+
+
+def soup_links(backend, html):
+    soup = backend.make_soup(html)
+    return [(tag.get("href", "").strip(), tag.get_text(" ", strip=True)) for tag in soup.find_all("a", href=True)]
+
+
+def soup_main_length(backend, html):
+    soup = backend.make_soup(html)
+    for tag in soup(["script", "style", "noscript", "template"]):
+        tag.decompose()
+    container = None
+    for selector in MAIN_SELECTORS:
+        container = soup.select_one(selector)
+        if container:
+            break
+    container = container or soup.body or soup
+    return len(container.get_text(" ", strip=True))
+
+
+def timed(func, pages, repeat):
+    """(MB/ثانية، ms/صفحة، النتائج) لأسرع تكرار"""
+    total_bytes = sum(len(html) for _, html in pages)
+    best, results = None, None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        results = [func(html) for _, html in pages]
+        elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+    return total_bytes / (1024 * 1024) / best, best / len(pages) * 1000, results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="مقارنة محللات HTML على مجموعة صفحات")
+    parser.add_argument("--corpus", help="مجلد المخزن الخام أو مجلد ملفات HTML")
+    parser.add_argument("--limit", type=int, default=0, help="أقصى عدد صفحات (0 = الكل)")
+    parser.add_argument("--repeat", type=int, default=3, help="عدد التكرارات (يُؤخذ الأسرع)")
+    args = parser.parse_args()
+
+    pages = load_corpus(args.corpus, args.limit)
+    if not pages:
+        print("❌ لا توجد صفحات في المجموعة")
+        return
+    print(f"📚 {len(pages)} صفحة، {sum(len(h) for _, h in pages) / (1024 * 1024):.1f} MB")
+    print(f"lxml: {'✅' if LXML_AVAILABLE else '❌'}   selectolax: {'✅' if SELECTOLAX_AVAILABLE else '❌'}\n")
+
+    reference = ParserBackend("html.parser")
+    backends = [("html.parser", reference)]
+    if LXML_AVAILABLE:
+        backends.append(("lxml", ParserBackend("lxml")))
+    fast = ParserBackend("auto") if SELECTOLAX_AVAILABLE else None
+
+    tasks = [
+        ("parse", lambda backend: (lambda html: backend.make_soup(html) and None), None),
+        ("links", lambda backend: (lambda html: soup_links(backend, html)),
+         lambda html: fast.find_links(html)),
+        ("main text", lambda backend: (lambda html: soup_main_length(backend, html)),
+         lambda html: fast.main_text_length(html, MAIN_SELECTORS)),
+    ]
+
+    print(f"{'task':<10} | {'backend':<12} | {'MB/s':>7} | {'ms/page':>8} | {'speedup':>7} | identical to html.parser")
+    print("-" * 80)
+    for task, make_soup_func, fast_func in tasks:
+        rows = [(name, make_soup_func(backend)) for name, backend in backends]
+        if fast_func and fast:
+            rows.append(("selectolax", fast_func))
+        baseline_ms, baseline_results = None, None
+        for name, func in rows:
+            throughput, ms, results = timed(func, pages, args.repeat)
+            if baseline_ms is None:
+                baseline_ms, baseline_results = ms, results
+            same = sum(1 for a, b in zip(results, baseline_results) if a == b)
+            identical = "-" if task == "parse" else f"{same}/{len(pages)} ({same / len(pages):.0%})"
+            print(f"{task:<10} | {name:<12} | {throughput:7.1f} | {ms:8.2f} | {baseline_ms / ms:6.1f}x | {identical}")
+        print("-" * 80)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,121 @@
+"""
+النواة المشتركة لـ Web Scraper Pro
+تستخدمها واجهة Flet ونسختا Streamlit
+"""
+
+from .engine import FetchEngine, DEFAULT_MAX_IN_FLIGHT
+from .politeness import HostScheduler
+from .http_cache import HttpCache, cache_key
+from .canonical import UrlCanonicalizer, SiteRules, canonicalize, RULES_FILE_NAME
+from .paths import cache_path, cache_dir
+from .raw_store import RawStore, content_hash
+from .retry import RetryLater, RetryPolicy, fetch_with_retry
+from .circuit_breaker import CircuitBreaker
+from .frontier import Frontier
+from .sitemap import RobotsRules, SitemapReader, discover_sitemaps, sitemap_seeds, parse_lastmod
+from .priority import (
+    PriorityFrontier, default_scorers, depth_scorer, pattern_scorer,
+    anchor_text_scorer, inlink_scorer
+)
+from .manifest import SiteManifest
+from .browser_cookies import BrowserCookieCache, load_browser_cookies, shared_cookie_cache
+from .cookie_jar import (
+    save_cookie_jar, load_cookie_jar, cookie_jar_bytes, load_cookie_bytes, apply_cookies,
+    expiry_warning, COOKIES_FILE_ENV
+)
+from .soft_errors import PageClassifier, LOGIN_WALL, SOFT_404, REPEATED_PAGE, SOFT_ERROR_LABELS
+from .renderer import BrowserPool, needs_rendering, RENDERING_AVAILABLE, DEFAULT_POOL_SIZE
+from .embedded_data import EmbeddedPage, extract_embedded
+from .api_replay import ApiReplayer, replay_document, page_shape
+from .page import ParsedPage
+from .parsers import ParserBackend, PARSER_CHOICES, LXML_AVAILABLE, SELECTOLAX_AVAILABLE, scope_selectors
+from .cleaning import CleaningRules, split_selectors, CLEANING_GROUPS
+from .content_score import best_content, score_nodes
+from .boilerplate import BoilerplateLearner, block_digests
+from .site_profile import SiteProfile, FETCH_STATIC, FETCH_RENDER
+from .near_duplicates import NearDuplicateIndex, simhash, hamming
+from .export_store import ExportStore, zip_directory, COMPRESSED_EXTENSIONS
+from .checkpoint import CrawlCheckpoint, latest_unfinished, STATUS_RUNNING, STATUS_COMPLETED
+
+__all__ = [
+    "FetchEngine",
+    "DEFAULT_MAX_IN_FLIGHT",
+    "HostScheduler",
+    "HttpCache",
+    "cache_key",
+    "UrlCanonicalizer",
+    "SiteRules",
+    "canonicalize",
+    "RULES_FILE_NAME",
+    "cache_path",
+    "cache_dir",
+    "RawStore",
+    "content_hash",
+    "RetryLater",
+    "RetryPolicy",
+    "fetch_with_retry",
+    "CircuitBreaker",
+    "Frontier",
+    "RobotsRules",
+    "SitemapReader",
+    "discover_sitemaps",
+    "sitemap_seeds",
+    "parse_lastmod",
+    "PriorityFrontier",
+    "default_scorers",
+    "depth_scorer",
+    "pattern_scorer",
+    "anchor_text_scorer",
+    "inlink_scorer",
+    "SiteManifest",
+    "BrowserCookieCache",
+    "load_browser_cookies",
+    "shared_cookie_cache",
+    "save_cookie_jar",
+    "load_cookie_jar",
+    "cookie_jar_bytes",
+    "load_cookie_bytes",
+    "apply_cookies",
+    "expiry_warning",
+    "COOKIES_FILE_ENV",
+    "PageClassifier",
+    "LOGIN_WALL",
+    "SOFT_404",
+    "REPEATED_PAGE",
+    "SOFT_ERROR_LABELS",
+    "BrowserPool",
+    "needs_rendering",
+    "RENDERING_AVAILABLE",
+    "DEFAULT_POOL_SIZE",
+    "EmbeddedPage",
+    "extract_embedded",
+    "ApiReplayer",
+    "replay_document",
+    "page_shape",
+    "ParsedPage",
+    "ParserBackend",
+    "PARSER_CHOICES",
+    "LXML_AVAILABLE",
+    "SELECTOLAX_AVAILABLE",
+    "scope_selectors",
+    "CleaningRules",
+    "split_selectors",
+    "CLEANING_GROUPS",
+    "best_content",
+    "score_nodes",
+    "BoilerplateLearner",
+    "block_digests",
+    "SiteProfile",
+    "FETCH_STATIC",
+    "FETCH_RENDER",
+    "NearDuplicateIndex",
+    "simhash",
+    "hamming",
+    "ExportStore",
+    "zip_directory",
+    "COMPRESSED_EXTENSIONS",
+    "CrawlCheckpoint",
+    "latest_unfinished",
+    "STATUS_RUNNING",
+    "STATUS_COMPLETED",
+]
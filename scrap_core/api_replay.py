@@ -0,0 +1,283 @@
+"""
+اكتشاف واجهات JSON التي تستدعيها الصفحة ثم استدعاؤها مباشرة للصفحات المشابهة
+أول صفحة من كل نمط روابط (مثل /idea/<slug>) تُجلب كـ HTML ويُبحث فيها عن مصدر JSON لمحتواها:
+مسار بيانات Next.js، روابط API في HTML وملفات JS، أو طلبات XHR/fetch في المتصفح الخفي
+بعد التحقق من القالب تُجلب باقي صفحات النمط كـ JSON صغير عبر نفس جلسة requests
+"""
+
+import hashlib
+import html
+import json
+import re
+import threading
+from urllib.parse import urljoin, urlsplit
+
+import requests
+
+from .embedded_data import EmbeddedPage, NEXT_DATA_SCRIPT
+
+# روابط تشبه واجهات JSON داخل HTML أو JS (نص بين علامات اقتباس)
+ENDPOINT_PATTERN = re.compile(
+    r"""["'`]((?:https?://[^"'`\s<>]+)?/(?:api|v\d+|_next/data|wp-json|rest|graphql|data)/[^"'`\s<>]*)["'`]""",
+    re.IGNORECASE
+)
+SCRIPT_SRC = re.compile(r"<script[^>]+src\s*=\s*[\"']([^\"']+\.js[^\"']*)[\"']", re.IGNORECASE)
+
+# عنوان الصفحة وعنوانها الرئيسي (للتحقق من أن الاستجابة تخص الصفحة)
+TITLE_PATTERN = re.compile(r"<(title|h1)[^>]*>(.*?)</\1>", re.IGNORECASE | re.DOTALL)
+TITLE_SEPARATORS = re.compile(r"\s+[|\u2013\u2014\u00b7-]\s+")
+TAGS = re.compile(r"<[^>]+>")
+MIN_TITLE_CHARS = 8
+
+# حدود الاكتشاف لكل نمط روابط
+MAX_BUNDLES = 8
+MAX_BUNDLE_BYTES = 2 * 1024 * 1024
+MAX_PROBES = 20
+
+# عدد الإخفاقات المتتالية قبل التخلي عن قالب والعودة لجلب HTML
+MAX_FAILURES = 3
+
+JSON_HEADERS = {"Accept": "application/json, text/plain, */*", "X-Requested-With": "XMLHttpRequest"}
+
+# طلبات fetch/XHR التي نفذتها الصفحة في المتصفح
+XHR_SCRIPT = (
+    "return performance.getEntriesByType('resource')"
+    ".filter(e => e.initiatorType === 'fetch' || e.initiatorType === 'xmlhttprequest')"
+    ".map(e => e.name);"
+)
+
+
+def _split(url):
+    """(المضيف، المسار الأب، آخر جزء) - مثل ('site.com', '/idea/', 'ai-book')"""
+    parts = urlsplit(url)
+    path = parts.path.rstrip("/")
+    slug = path.rsplit("/", 1)[-1]
+    return parts.netloc, path[:len(path) - len(slug)], slug
+
+
+def page_shape(url):
+    """نمط الرابط: الصفحات التي تشترك في المضيف والمسار الأب تُجلب بنفس القالب"""
+    host, parent, slug = _split(url)
+    return (host, parent) if slug else None
+
+
+def expand(template, url):
+    """رابط الواجهة لصفحة: {slug} آخر جزء من المسار، {path} المسار كاملاً"""
+    _, _, slug = _split(url)
+    path = urlsplit(url).path.rstrip("/")
+    return urljoin(url, template.replace("{slug}", slug).replace("{path}", path))
+
+
+def page_markers(url, html_text=None):
+    """نصوص تخص الصفحة: آخر جزء من الرابط (بشرطاته ومسافاته) وعنوانها وعنوانها الرئيسي"""
+    _, _, slug = _split(url)
+    markers = [slug, slug.replace("-", " ").replace("_", " ")] if len(slug) >= 3 else []
+    for _, title in TITLE_PATTERN.findall(html_text or ""):
+        title = html.unescape(TAGS.sub("", title)).strip()
+        # "عنوان المقال | اسم الموقع": كل جزء على حدة
+        markers.extend(part for part in TITLE_SEPARATORS.split(title) if len(part) >= MIN_TITLE_CHARS)
+    return [marker.lower() for marker in markers]
+
+
+def mentions_page(data, url, html_text=None):
+    """هل تذكر الاستجابة الصفحة نفسها؟ (واجهات البحث والإعدادات والقوائم العامة لا تذكرها)"""
+    text = json.dumps(data, ensure_ascii=False).lower()
+    return any(marker in text for marker in page_markers(url, html_text))
+
+
+def _digest(data):
+    return hashlib.blake2b(json.dumps(data, sort_keys=True).encode("utf-8"), digest_size=16).digest()
+
+
+def replay_document(data, endpoint):
+    """
+    تغليف استجابة JSON كمستند بنفس شكل __NEXT_DATA__ حتى يعالجها مسار البيانات المضمّنة
+    (الحفظ والروابط) بدون أي تحليل HTML
+    """
+    payload = data if isinstance(data, dict) and "pageProps" in data else {"pageProps": data}
+    body = json.dumps({"props": payload}, ensure_ascii=False).replace("</", "<\\/")
+    return (f'<html><head><script id="__NEXT_DATA__" type="application/json" '
+            f'data-endpoint="{html.escape(endpoint)}">{body}</script></head><body></body></html>')
+
+
+class ApiReplayer:
+    """قوالب واجهات JSON لكل نمط روابط، مع الاكتشاف والتحقق والاستدعاء المباشر"""
+
+    def __init__(self, session, browser_pool=None, timeout=15, scheduler=None, breaker=None):
+        """scheduler / breaker: مجدول المضيفين وقاطع الدائرة لطلبات الاكتشاف (كطلبات الصفحات)"""
+        self.session = session
+        self.browser_pool = browser_pool
+        self.timeout = timeout
+        self.scheduler = scheduler
+        self.breaker = breaker
+        self._lock = threading.Lock()
+        # النمط ← القالب (None = لا توجد واجهة صالحة، لا يُعاد الاكتشاف)
+        self.routes = {}
+        self._failures = {}
+        # النمط ← (أول رابط، بصمة استجابته): صفحة أخرى بنفس الاستجابة تعني أن القالب لا يخص الصفحات
+        self._reference = {}
+        self.stats = {"routes": 0, "replayed": 0, "fallbacks": 0, "rejected": 0}
+
+    def _discovery_get(self, url, **kwargs):
+        """طلب اكتشاف إضافي: ينتظر دوره في مجدول المضيف، ولا يُرسل إن كانت دائرة المضيف مفتوحة (None)"""
+        host = urlsplit(url).netloc
+        if self.breaker and self.breaker.is_open(host):
+            return None
+        if self.scheduler:
+            self.scheduler.wait(host)
+        return self.session.get(url, timeout=self.timeout, **kwargs)
+
+    def _get_json(self, endpoint, discovery=False):
+        """
+        استجابة JSON للواجهة أو None
+        discovery: طلب اكتشاف (استدعاء الصفحة نفسها بالقالب أخذ دوره في محرك الجلب بدلاً من HTML)
+        """
+        if discovery:
+            response = self._discovery_get(endpoint, headers=JSON_HEADERS)
+        else:
+            response = self.session.get(endpoint, headers=JSON_HEADERS, timeout=self.timeout)
+        if response is None or response.status_code != 200:
+            return None
+        try:
+            return response.json()
+        except ValueError:
+            return None
+
+    def _usable(self, data, url):
+        """الاستجابة تحمل محتوى الصفحة فعلاً (وليست إعدادات أو قائمة فارغة)"""
+        if not isinstance(data, (dict, list)):
+            return False
+        return EmbeddedPage("api", data, url).has_content
+
+    def fetch(self, url):
+        """مستند الصفحة من واجهتها إن عُرف قالب لنمطها، وإلا None (يُجلب HTML كالمعتاد)"""
+        shape = page_shape(url)
+        template = self.routes.get(shape) if shape else None
+        if not template:
+            return None
+        endpoint = expand(template, url)
+        try:
+            data = self._get_json(endpoint)
+        except requests.exceptions.RequestException:
+            data = None
+        if data is not None and self._usable(data, url):
+            digest = _digest(data)
+            with self._lock:
+                reference = self._reference.setdefault(shape, (url, digest))
+                if reference[0] != url and reference[1] == digest:
+                    # صفحتان مختلفتان بنفس الاستجابة: واجهة عامة (بحث، إعدادات، قائمة) وليست محتوى الصفحة
+                    self.routes[shape] = None
+                    self.stats["rejected"] += 1
+                    return None
+                self._failures[shape] = 0
+                self.stats["replayed"] += 1
+            return replay_document(data, endpoint)
+
+        with self._lock:
+            self.stats["fallbacks"] += 1
+            self._failures[shape] = self._failures.get(shape, 0) + 1
+            if self._failures[shape] >= MAX_FAILURES:
+                # القالب لم يعد صالحاً لهذا النمط
+                self.routes[shape] = None
+        return None
+
+    def _templates(self, url, text):
+        """قوالب مرشحة من نص (HTML أو JS) لصفحة url"""
+        _, _, slug = _split(url)
+        templates = []
+        for match in ENDPOINT_PATTERN.finditer(text):
+            candidate = match.group(1)
+            if "${" in candidate:
+                # قالب JS حرفي: `/api/ideas/${slug}`
+                templates.append(candidate.split("${", 1)[0] + "{slug}")
+            elif len(slug) >= 3 and slug in candidate:
+                templates.append(candidate.replace(slug, "{slug}"))
+            elif candidate.endswith(("/", "=")):
+                templates.append(candidate + "{slug}")
+        return templates
+
+    def _candidates(self, url, html_text):
+        """مصادر الاكتشاف بترتيب التكلفة: Next.js، ثم HTML، ثم المتصفح، ثم ملفات JS"""
+        match = NEXT_DATA_SCRIPT.search(html_text)
+        if match:
+            try:
+                build_id = json.loads(match.group(1)).get("buildId")
+            except (ValueError, AttributeError):
+                build_id = None
+            if build_id:
+                yield f"/_next/data/{build_id}{{path}}.json"
+
+        yield from self._templates(url, html_text)
+
+        if self.browser_pool:
+            try:
+                requested = self.browser_pool.run(url, lambda driver: driver.execute_script(XHR_SCRIPT),
+                                                  self.session.cookies) or []
+            except Exception:
+                requested = []
+            _, _, slug = _split(url)
+            for endpoint in requested:
+                if len(slug) >= 3 and slug in endpoint:
+                    yield endpoint.replace(slug, "{slug}")
+
+        host = urlsplit(url).netloc
+        bundles = [urljoin(url, src) for src in SCRIPT_SRC.findall(html_text)]
+        for bundle in [b for b in bundles if urlsplit(b).netloc == host][:MAX_BUNDLES]:
+            try:
+                response = self._discovery_get(bundle)
+            except requests.exceptions.RequestException:
+                continue
+            if response is not None and response.status_code == 200 and len(response.content) <= MAX_BUNDLE_BYTES:
+                yield from self._templates(url, response.text)
+
+    def learn(self, url, html_text):
+        """
+        اكتشاف قالب لنمط الصفحة مرة واحدة (أول صفحة تُجلب منه كـ HTML)
+        يرجع القالب أو None
+        """
+        shape = page_shape(url)
+        if not shape:
+            return None
+        with self._lock:
+            if shape in self.routes:
+                return self.routes[shape]
+            # حجز النمط حتى لا تكتشفه عدة خيوط معاً
+            self.routes[shape] = None
+
+        tried = set()
+        for template in self._candidates(url, html_text):
+            if template in tried:
+                continue
+            tried.add(template)
+            if len(tried) > MAX_PROBES:
+                break
+            try:
+                data = self._get_json(expand(template, url), discovery=True)
+            except requests.exceptions.RequestException:
+                continue
+            if data is not None and self._usable(data, url) and mentions_page(data, url, html_text):
+                with self._lock:
+                    self.routes[shape] = template
+                    self._failures[shape] = 0
+                    self._reference[shape] = (url, _digest(data))
+                    self.stats["routes"] += 1
+                return template
+        return None
+
+    def export_routes(self):
+        """القوالب الصالحة كقائمة [المضيف، المسار الأب، القالب] قابلة للحفظ في ملف تعريف الموقع"""
+        return [[host, parent, template] for (host, parent), template in self.routes.items() if template]
+
+    def preload(self, routes):
+        """قوالب من جلسة سابقة (export_routes) تُستخدم مباشرة بدون اكتشاف"""
+        with self._lock:
+            for host, parent, template in routes:
+                self.routes.setdefault((host, parent), template)
+
+    def learned(self):
+        """القوالب الصالحة: {'site.com/idea/': '/api/ideas/{slug}'}"""
+        return {host + parent: template for (host, parent), template in self.routes.items() if template}
+
+    def summary(self):
+        return (f"{self.stats['routes']} واجهة مكتشفة، {self.stats['replayed']} صفحة جُلبت كـ JSON، "
+                f"{self.stats['fallbacks']} عودة لـ HTML، {self.stats['rejected']} واجهة مرفوضة (نفس الاستجابة لصفحات مختلفة)")
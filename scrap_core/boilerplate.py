@@ -0,0 +1,155 @@
+"""
+تعلم قالب الموقع (الترويسة والتذييل والأشرطة الجانبية وصناديق الاشتراك...) من الصفحات الأولى للكشط
+كل كتلة HTML تُختصر ببصمة من وسمها ونصها وبصمات أبنائها (بدون الخصائص لأن الـ class قد يتغير)؛
+الكتل التي تتكرر في أغلب صفحات العينة تُعد قالباً، وبعدها تُحذف من كل صفحة ببحث في set بدل محددات مُخمنة
+"""
+
+import hashlib
+import re
+from collections import Counter
+from urllib.parse import urlsplit
+
+from bs4 import NavigableString, Tag
+from bs4.element import PreformattedString
+
+# عدد الصفحات الأولى لكل موقع التي يُتعلم منها القالب (لا يُحذف منها شيء بعد)
+DEFAULT_SAMPLE_PAGES = 6
+
+# الكتلة قالب إذا ظهرت في هذه النسبة من صفحات العينة (وفي صفحتين على الأقل)
+MIN_SHARE = 0.6
+
+# الوسوم التي تُعد كتلاً قابلة للحذف، وأقل طول نص للكتلة
+BLOCK_TAGS = {
+    "div", "section", "aside", "nav", "header", "footer", "ul", "ol", "dl",
+    "table", "form", "p", "figure", "blockquote",
+}
+MIN_BLOCK_CHARS = 20
+
+# لا تُحذف كتلة تحمل أكثر من هذه النسبة من نص الصفحة (حماية من صفحات متطابقة تقريباً)
+MAX_PAGE_SHARE = 0.5
+
+SPACES = re.compile(r"\s+")
+DIGITS = re.compile(r"\d+")
+
+
+def _normalize(text):
+    """نص مقارن: مسافات موحدة والأرقام مُقنّعة (عدادات، تواريخ، سنة حقوق النشر)"""
+    return DIGITS.sub("0", SPACES.sub(" ", text).strip())
+
+
+def block_digests(root):
+    """
+    مرور واحد (ترتيب لاحق): {id(عقدة): (البصمة، طول النص)} لكل وسم
+    بصمة العقدة = blake2b(الوسم + نصها المباشر + بصمات أبنائها بالترتيب)
+    """
+    digests = {}
+    stack = [(root, False)]
+    while stack:
+        node, done = stack.pop()
+        if not done:
+            stack.append((node, True))
+            stack.extend((child, False) for child in node.contents if isinstance(child, Tag))
+            continue
+        parts = [node.name.encode()]
+        total = 0
+        for child in node.contents:
+            if isinstance(child, Tag):
+                digest, length = digests[id(child)]
+                parts.append(digest)
+                total += length
+            elif isinstance(child, NavigableString) and not isinstance(child, PreformattedString):
+                text = _normalize(child)
+                if text:
+                    parts.append(text.encode("utf-8"))
+                    total += len(text)
+        digests[id(node)] = (hashlib.blake2b(b"\x00".join(parts), digest_size=8).digest(), total)
+    return digests
+
+
+class BoilerplateLearner:
+    """
+    قالب كل موقع (حسب النطاق): عدّ الكتل في صفحات العينة ثم تجميد مجموعة بصمات القالب
+    process(url, soup) تُستدعى على الشجرة بعد حذف المحددات وقبل اختيار المحتوى الرئيسي
+    """
+
+    def __init__(self, sample_pages=DEFAULT_SAMPLE_PAGES, min_share=MIN_SHARE):
+        self.sample_pages = max(2, sample_pages)
+        self.min_share = min_share
+        self._sites = {}
+        self.stats = {"sampled": 0, "learned_blocks": 0, "pages_cleaned": 0,
+                      "blocks_removed": 0, "chars_removed": 0}
+
+    def _site(self, url):
+        host = urlsplit(url).netloc.lower()
+        if host not in self._sites:
+            self._sites[host] = {"pages": 0, "counts": Counter(), "learned": None}
+        return self._sites[host]
+
+    def learned(self, url):
+        """بصمات قالب موقع الرابط (None أثناء التعلم)"""
+        return self._site(url)["learned"]
+
+    def export(self):
+        """بصمات القالب لكل موقع اكتمل تعلمه: {المضيف: [hex...]} (لملف تعريف الموقع)"""
+        return {host: sorted(digest.hex() for digest in site["learned"])
+                for host, site in self._sites.items() if site["learned"] is not None}
+
+    def preload(self, learned):
+        """بصمات من جلسة سابقة (export): المواقع المعروفة تُنظف من أول صفحة بدون عينة"""
+        for host, digests in learned.items():
+            site = self._sites.setdefault(host, {"pages": 0, "counts": Counter(), "learned": None})
+            if site["learned"] is None:
+                site["learned"] = {bytes.fromhex(digest) for digest in digests}
+                site["counts"] = None
+
+    def process(self, url, soup):
+        """ملاحظة صفحة من العينة أو حذف كتل القالب منها - يرجع عدد الكتل المحذوفة"""
+        site = self._site(url)
+        digests = block_digests(soup)
+        if site["learned"] is None:
+            self._observe(site, soup, digests)
+            return 0
+        return self._strip(site["learned"], soup, digests)
+
+    def _observe(self, site, soup, digests):
+        seen = {
+            digests[id(element)][0]
+            for element in soup.find_all(list(BLOCK_TAGS))
+            if digests[id(element)][1] >= MIN_BLOCK_CHARS
+        }
+        site["counts"].update(seen)
+        site["pages"] += 1
+        self.stats["sampled"] += 1
+        if site["pages"] >= self.sample_pages:
+            needed = max(2, self.min_share * site["pages"])
+            site["learned"] = {digest for digest, count in site["counts"].items() if count >= needed}
+            site["counts"] = None
+            self.stats["learned_blocks"] += len(site["learned"])
+
+    def _strip(self, learned, soup, digests):
+        if not learned:
+            return 0
+        page_chars = digests[id(soup)][1]
+        doomed = []
+        stack = [soup]
+        while stack:
+            for child in stack.pop().contents:
+                if not isinstance(child, Tag):
+                    continue
+                digest, length = digests[id(child)]
+                if (child.name in BLOCK_TAGS and digest in learned
+                        and length >= MIN_BLOCK_CHARS and length <= page_chars * MAX_PAGE_SHARE):
+                    doomed.append((child, length))
+                else:
+                    stack.append(child)
+        for element, length in doomed:
+            element.decompose()
+            self.stats["chars_removed"] += length
+        self.stats["blocks_removed"] += len(doomed)
+        self.stats["pages_cleaned"] += 1
+        return len(doomed)
+
+    def summary(self):
+        return (f"{self.stats['learned_blocks']} كتلة قالب متعلمة من {self.stats['sampled']} صفحة، "
+                f"حُذفت {self.stats['blocks_removed']} كتلة ({self.stats['chars_removed']} حرف) "
+                f"من {self.stats['pages_cleaned']} صفحة")
@@ -0,0 +1,132 @@
+"""
+استخراج كوكيز المتصفحات بالتوازي مع ذاكرة لكل نطاق
+فك تشفير قاعدة كوكيز المتصفح يستغرق ثوانٍ، لذلك تُحفظ النتيجة في الذاكرة
+ولا يُعاد الاستخراج إلا إذا تغير وقت تعديل قاعدة بيانات المتصفح أو انتهت صلاحية الكوكيز
+(لا تُكتب الكوكيز المفكوكة على القرص)
+"""
+
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+try:
+    import browser_cookie3
+except ImportError:
+    browser_cookie3 = None
+
+# ترتيب الأفضلية في الوضع التلقائي
+BROWSER_ORDER = ("chrome", "firefox", "edge", "safari", "opera")
+
+BROWSER_LABELS = {
+    "chrome": "Chrome",
+    "firefox": "Firefox",
+    "edge": "Edge",
+    "safari": "Safari",
+    "opera": "Opera",
+}
+
+
+def _browser_class(name):
+    return getattr(browser_cookie3, BROWSER_LABELS[name])
+
+
+class CookieEntry:
+    """نتيجة استخراج متصفح واحد لنطاق واحد مع وقت تعديل قاعدة بياناته"""
+
+    def __init__(self, browser, cookie_file, mtime, cookies):
+        self.browser = browser
+        self.cookie_file = cookie_file
+        self.mtime = mtime
+        self.cookies = cookies
+
+    def live_cookies(self, now=None):
+        """الكوكيز التي لم تنتهِ صلاحيتها"""
+        now = now or time.time()
+        return [cookie for cookie in self.cookies if not cookie.is_expired(now)]
+
+    def is_valid(self):
+        """
+        صالحة ما دامت قاعدة المتصفح لم تتغير ولم تنتهِ كل كوكيزها
+        (Safari لا يكشف مسار ملفه، فيُكتفى بصلاحية الكوكيز)
+        """
+        if self.cookie_file:
+            try:
+                if os.path.getmtime(self.cookie_file) != self.mtime:
+                    return False
+            except OSError:
+                return False
+        return not self.cookies or bool(self.live_cookies())
+
+
+class BrowserCookieCache:
+    """ذاكرة كوكيز المتصفحات لكل (نطاق، متصفح) مع فحص المتصفحات بالتوازي"""
+
+    def __init__(self, browsers=BROWSER_ORDER):
+        self.browsers = tuple(browsers)
+        self._entries = {}
+        self._lock = threading.Lock()
+        self.stats = {"hits": 0, "misses": 0}
+
+    def _probe(self, domain, browser):
+        """كوكيز متصفح واحد: من الذاكرة إن كانت صالحة، وإلا من قاعدة بياناته"""
+        with self._lock:
+            entry = self._entries.get((domain, browser))
+        if entry and entry.is_valid():
+            with self._lock:
+                self.stats["hits"] += 1
+            return entry
+
+        cookie_file = entry.cookie_file if entry else None
+        reader = _browser_class(browser)(cookie_file=cookie_file, domain_name=domain)
+        # قارئ Safari يحتفظ بمحتوى الملف داخلياً بدون الخاصية cookie_file
+        cookie_file = getattr(reader, "cookie_file", None)
+        mtime = os.path.getmtime(cookie_file) if cookie_file else None
+        cookies = list(reader.load())
+        entry = CookieEntry(browser, cookie_file, mtime, cookies)
+        with self._lock:
+            self._entries[(domain, browser)] = entry
+            self.stats["misses"] += 1
+        return entry
+
+    def get(self, domain, browser="auto"):
+        """
+        كوكيز النطاق من متصفح محدد أو من أول متصفح (حسب الأفضلية) يحملها
+        ترجع (اسم المتصفح، قائمة الكوكيز غير المنتهية) أو (None, []) - أخطاء المتصفح المحدد تُرفع كما هي
+        """
+        if browser_cookie3 is None:
+            raise ImportError("browser_cookie3 غير مثبت")
+
+        if browser != "auto":
+            entry = self._probe(domain, browser)
+            return BROWSER_LABELS[browser], entry.live_cookies()
+
+        # فحص كل المتصفحات بالتوازي ثم اختيار أول نتيجة غير فارغة حسب الأفضلية
+        executor = ThreadPoolExecutor(max_workers=len(self.browsers), thread_name_prefix="cookies")
+        try:
+            futures = [(name, executor.submit(self._probe, domain, name)) for name in self.browsers]
+            for name, future in futures:
+                try:
+                    cookies = future.result().live_cookies()
+                except Exception:
+                    continue
+                if cookies:
+                    return BROWSER_LABELS[name], cookies
+            return None, []
+        finally:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    def invalidate(self, domain=None):
+        """حذف نتائج نطاق (أو كل النطاقات) لإجبار إعادة الاستخراج"""
+        with self._lock:
+            for key in [key for key in self._entries if domain is None or key[0] == domain]:
+                del self._entries[key]
+
+
+# ذاكرة مشتركة على مستوى العملية (تبقى بين إعادات تشغيل سكربت Streamlit)
+shared_cookie_cache = BrowserCookieCache()
+
+
+def load_browser_cookies(domain, browser="auto"):
+    """اختصار للذاكرة المشتركة"""
+    return shared_cookie_cache.get(domain, browser)
@@ -0,0 +1,165 @@
+"""
+توحيد الروابط (canonicalization) قبل إضافتها لقائمة الانتظار وقبل البحث في الذاكرة
+حتى لا تُجلب نفس الصفحة مرتين بسبب ترتيب المعاملات أو معاملات التتبع أو حالة الأحرف
+"""
+
+import fnmatch
+import json
+import os
+import threading
+from urllib.parse import urlsplit, urlunsplit, parse_qsl, urlencode
+
+DEFAULT_PORTS = {"http": 80, "https": 443}
+
+# معاملات التتبع التي لا تغير محتوى الصفحة (تدعم * كنمط)
+TRACKING_PARAMS = (
+    "utm_*", "fbclid", "gclid", "dclid", "msclkid", "yclid", "mc_cid", "mc_eid",
+    "igshid", "_ga", "_gl", "ref", "ref_src", "ref_url", "spm",
+)
+
+# أسماء صفحات الفهرس التي تكافئ المجلد نفسه
+INDEX_PAGES = ("index.html", "index.htm", "index.php", "default.aspx", "default.asp")
+
+# اسم ملف القواعد الخاصة بكل موقع داخل مجلد الذاكرة
+RULES_FILE_NAME = "canonical_rules.json"
+
+
+class SiteRules:
+    """قواعد توحيد موقع واحد"""
+
+    def __init__(self, strip_params=TRACKING_PARAMS, keep_params=None,
+                 index_pages=INDEX_PAGES, lowercase_path=False, sort_query=True):
+        """
+        strip_params: معاملات تُحذف (أنماط fnmatch)
+        keep_params: إن حُددت يُحتفظ بهذه المعاملات فقط ويُحذف الباقي
+        lowercase_path: للمواقع التي لا تفرق بين حالة الأحرف في المسار
+        """
+        self.strip_params = tuple(param.lower() for param in strip_params)
+        self.keep_params = {param.lower() for param in keep_params} if keep_params is not None else None
+        self.index_pages = tuple(page.lower() for page in index_pages)
+        self.lowercase_path = lowercase_path
+        self.sort_query = sort_query
+
+    def merged(self, overrides):
+        """قواعد جديدة = هذه القواعد مع تعديلات موقع (extra_strip_params تُضاف للقائمة)"""
+        return SiteRules(
+            strip_params=tuple(overrides.get("strip_params", self.strip_params))
+            + tuple(overrides.get("extra_strip_params", ())),
+            keep_params=overrides.get("keep_params", self.keep_params),
+            index_pages=overrides.get("index_pages", self.index_pages),
+            lowercase_path=overrides.get("lowercase_path", self.lowercase_path),
+            sort_query=overrides.get("sort_query", self.sort_query),
+        )
+
+    def keeps(self, name):
+        name = name.lower()
+        if self.keep_params is not None:
+            return name in self.keep_params
+        return not any(fnmatch.fnmatchcase(name, pattern) for pattern in self.strip_params)
+
+
+class UrlCanonicalizer:
+    """يحول الروابط لصيغة موحدة ويحصي الجلبات المكررة التي تم تجنبها"""
+
+    def __init__(self, rules=None, site_rules=None):
+        """
+        rules: القواعد الافتراضية (SiteRules)
+        site_rules: قاموس {مضيف: تعديلات} يطابق المضيف ونطاقاته الفرعية
+        """
+        self.rules = rules or SiteRules()
+        self.site_rules = {}
+        for host, overrides in (site_rules or {}).items():
+            self.add_site_rules(host, overrides)
+        self._lock = threading.Lock()
+        # الصيغ القديمة التي رأيناها، والروابط الموحدة المقابلة لها
+        self._variants = set()
+        self._canonical = set()
+        self.stats = {"links": 0, "rewritten": 0, "duplicates_avoided": 0}
+
+    @classmethod
+    def from_file(cls, path):
+        """تحميل قواعد المواقع من ملف JSON إن وُجد: {"example.com": {"extra_strip_params": ["sid"]}}"""
+        site_rules = {}
+        if os.path.exists(path):
+            with open(path, "r", encoding="utf-8") as f:
+                site_rules = json.load(f)
+        return cls(site_rules=site_rules)
+
+    def add_site_rules(self, host, overrides):
+        host = host.lower()
+        self.site_rules[host[4:] if host.startswith("www.") else host] = self.rules.merged(overrides)
+
+    def rules_for(self, host):
+        """أدق قواعد مطابقة للمضيف (example.com تنطبق على blog.example.com)"""
+        host = host[4:] if host.startswith("www.") else host
+        while host:
+            if host in self.site_rules:
+                return self.site_rules[host]
+            host = host.partition(".")[2]
+        return self.rules
+
+    def canonicalize(self, url):
+        """الصيغة الموحدة: مخطط ومضيف بأحرف صغيرة، بدون منفذ افتراضي أو أنكور أو / نهائية
+        أو صفحة فهرس أو معاملات تتبع، مع ترتيب المعاملات"""
+        parts = urlsplit(url.strip())
+        scheme = parts.scheme.lower()
+        host = (parts.hostname or "").lower()
+        rules = self.rules_for(host)
+        try:
+            port = parts.port
+        except ValueError:
+            port = None
+        if port and port != DEFAULT_PORTS.get(scheme):
+            host = f"{host}:{port}"
+        if parts.username:
+            host = f"{parts.username}@{host}"
+
+        path = parts.path or "/"
+        if rules.lowercase_path:
+            path = path.lower()
+        head, _, last = path.rpartition("/")
+        if last.lower() in rules.index_pages:
+            path = head + "/"
+        path = path.rstrip("/")
+
+        query = parts.query
+        if query:
+            params = [(name, value) for name, value in parse_qsl(query, keep_blank_values=True)
+                      if rules.keeps(name)]
+            if rules.sort_query:
+                params.sort()
+            query = urlencode(params, doseq=True)
+
+        return urlunsplit((scheme, host, path, query, ""))
+
+    __call__ = canonicalize
+
+    def record(self, url):
+        """توحيد رابط مكتشف مع الإحصاء: صيغة جديدة لرابط موحد معروف = جلب مكرر تم تجنبه"""
+        canonical = self.canonicalize(url)
+        # الصيغة التي كان التنظيف القديم (حذف الأنكور و / النهائية) سيجلبها
+        legacy = url.split("#")[0].rstrip("/")
+        with self._lock:
+            self.stats["links"] += 1
+            if legacy not in self._variants:
+                self._variants.add(legacy)
+                if canonical != legacy:
+                    self.stats["rewritten"] += 1
+                if canonical in self._canonical:
+                    self.stats["duplicates_avoided"] += 1
+                else:
+                    self._canonical.add(canonical)
+        return canonical
+
+    def summary(self):
+        return (f"{self.stats['duplicates_avoided']} جلب مكرر تم تجنبه، "
+                f"{self.stats['rewritten']} رابط أعيدت صياغته")
+
+
+# المحوّل الافتراضي (بدون قواعد مواقع)
+_default = UrlCanonicalizer()
+
+
+def canonicalize(url):
+    """توحيد رابط بالقواعد الافتراضية"""
+    return _default.canonicalize(url)
@@ -0,0 +1,65 @@
+"""
+نقاط استئناف الكشط: حفظ قائمة الانتظار والروابط المكشوطة والفاشلة على القرص
+بصيغة JSON مضغوطة حتى يُستأنف الكشط بعد إعادة تشغيل العملية
+"""
+
+import gzip
+import json
+import os
+import time
+
+CHECKPOINT_SUFFIX = ".json.gz"
+
+# الحفظ كل عدد من الثواني أو كل عدد من الصفحات (أيهما أسبق)
+CHECKPOINT_INTERVAL = 10.0
+CHECKPOINT_EVERY = 20
+
+STATUS_RUNNING = "running"
+STATUS_COMPLETED = "completed"
+
+
+class CrawlCheckpoint:
+    """ملف نقطة استئناف واحد لجلسة كشط"""
+
+    def __init__(self, path):
+        self.path = path
+
+    def save(self, state):
+        """كتابة ذرية (ملف مؤقت ثم استبدال) حتى لا يتلف الملف عند انقطاع العملية"""
+        state = dict(state, saved_at=time.time())
+        tmp_path = self.path + ".tmp"
+        with gzip.open(tmp_path, "wt", encoding="utf-8") as f:
+            json.dump(state, f, ensure_ascii=False, separators=(",", ":"))
+        os.replace(tmp_path, self.path)
+
+    def load(self):
+        """قراءة الحالة المحفوظة (None إذا لم توجد أو كانت تالفة)"""
+        try:
+            with gzip.open(self.path, "rt", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def is_unfinished(self):
+        state = self.load()
+        return bool(state) and state.get("status") != STATUS_COMPLETED
+
+
+def latest_unfinished(directory, prefix=""):
+    """أحدث نقطة استئناف غير مكتملة في المجلد تبدأ باسم معين"""
+    if not os.path.isdir(directory):
+        return None
+    candidates = sorted(
+        (
+            os.path.join(directory, name)
+            for name in os.listdir(directory)
+            if name.startswith(prefix) and name.endswith(CHECKPOINT_SUFFIX)
+        ),
+        key=os.path.getmtime,
+        reverse=True
+    )
+    for path in candidates:
+        checkpoint = CrawlCheckpoint(path)
+        if checkpoint.is_unfinished():
+            return checkpoint
+    return None
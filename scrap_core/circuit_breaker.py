@@ -0,0 +1,135 @@
+"""
+قاطع دائرة لكل مضيف: يوقف إرسال الطلبات لمضيف معطل بدلاً من استهلاك ميزانية الكشط
+"""
+
+import threading
+import time
+from urllib.parse import urlparse
+
+# عدد الأخطاء المتتالية لفتح الدائرة
+FAILURE_THRESHOLD = 5
+
+# مدة الإغلاق الأولى (ثوانٍ) وتتضاعف مع كل فتح متتالٍ
+BASE_COOLDOWN = 30.0
+MAX_COOLDOWN = 300.0
+
+# بعد هذا العدد من مرات الفتح المتتالية يُعتبر المضيف متوقفاً نهائياً
+MAX_TRIPS = 5
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+DEAD = "dead"
+
+
+class HostCircuit:
+    """حالة الدائرة لمضيف واحد"""
+
+    def __init__(self):
+        self.state = CLOSED
+        self.failures = 0
+        self.trips = 0
+        self.open_until = 0.0
+        self.probing = False
+
+
+class CircuitBreaker:
+    """قاطع دائرة لكل مضيف (مغلق ← مفتوح ← نصف مفتوح ← مغلق)"""
+
+    def __init__(self, failure_threshold=FAILURE_THRESHOLD, base_cooldown=BASE_COOLDOWN,
+                 max_trips=MAX_TRIPS):
+        self.failure_threshold = failure_threshold
+        self.base_cooldown = base_cooldown
+        self.max_trips = max_trips
+        self.hosts = {}
+        self._lock = threading.Lock()
+
+    def reset(self):
+        """بداية كشط جديد: كل المضيفين مغلقون (المضيف المتوقف في كشط سابق يُجرب من جديد)"""
+        with self._lock:
+            self.hosts.clear()
+
+    def _host(self, host):
+        circuit = self.hosts.get(host)
+        if circuit is None:
+            circuit = self.hosts[host] = HostCircuit()
+        return circuit
+
+    def allow(self, host):
+        """هل يُسمح بإرسال طلب للمضيف الآن؟ (يسمح بطلب تجريبي واحد بعد انتهاء المهلة)"""
+        with self._lock:
+            circuit = self._host(host)
+            if circuit.state == CLOSED:
+                return True
+            if circuit.state == DEAD:
+                return False
+            if circuit.state == OPEN and time.monotonic() >= circuit.open_until:
+                circuit.state = HALF_OPEN
+                circuit.probing = False
+            if circuit.state == HALF_OPEN and not circuit.probing:
+                circuit.probing = True
+                return True
+            return False
+
+    def is_open(self, host):
+        """هل الدائرة مفتوحة (أو متوقفة نهائياً)؟ بدون استهلاك الطلب التجريبي"""
+        with self._lock:
+            return self._host(host).state in (OPEN, DEAD)
+
+    def is_dead(self, host):
+        """هل توقف المضيف نهائياً؟"""
+        with self._lock:
+            return self._host(host).state == DEAD
+
+    def observe_response(self, response, *args, **kwargs):
+        """تحديث الدائرة حسب رمز الاستجابة (5xx فشل، 429 محايد، وما عداه نجاح)"""
+        host = urlparse(response.url).netloc
+        if response.status_code >= 500:
+            self.record_error(host)
+        elif response.status_code != 429:
+            self.record_success(host)
+        return response
+
+    def record_success(self, host):
+        with self._lock:
+            circuit = self._host(host)
+            if circuit.state == DEAD:
+                return
+            circuit.state = CLOSED
+            circuit.failures = 0
+            circuit.trips = 0
+            circuit.probing = False
+
+    def record_error(self, host):
+        with self._lock:
+            circuit = self._host(host)
+            if circuit.state == DEAD:
+                return
+            circuit.failures += 1
+            if circuit.state == HALF_OPEN or circuit.failures >= self.failure_threshold:
+                self._trip(circuit)
+
+    def _trip(self, circuit):
+        circuit.trips += 1
+        circuit.failures = 0
+        circuit.probing = False
+        if circuit.trips >= self.max_trips:
+            circuit.state = DEAD
+            return
+        cooldown = min(MAX_COOLDOWN, self.base_cooldown * (2 ** (circuit.trips - 1)))
+        circuit.state = OPEN
+        circuit.open_until = time.monotonic() + cooldown
+
+    def snapshot(self):
+        """حالة الدوائر غير المغلقة للعرض"""
+        now = time.monotonic()
+        with self._lock:
+            return {
+                host: {
+                    "state": circuit.state,
+                    "reopens_in": round(max(0.0, circuit.open_until - now), 1),
+                    "trips": circuit.trips,
+                }
+                for host, circuit in self.hosts.items()
+                if circuit.state != CLOSED
+            }
@@ -0,0 +1,153 @@
+"""
+قواعد تنظيف المحتوى مُجمّعة مرة واحدة لكل عملية كشط
+كان clean_content يعيد بناء قائمة المحددات لكل صفحة ثم يستدعي soup.select لكل محدد (قرابة 50 مروراً على الشجرة)
+الآن: المحددات البسيطة (وسم، class، معرف، وجود خاصية) تُطابق بجداول set، والباقي بمحدد soupsieve واحد مُجمّع،
+وكل العناصر المطلوب حذفها تُجمع في مرور واحد على الشجرة
+"""
+
+import re
+
+import soupsieve
+from bs4 import Tag
+
+from .content_score import best_content
+
+# تُحذف دائماً
+ALWAYS_REMOVE = [
+    'script', 'style', 'noscript', 'iframe', 'embed', 'object',
+    '[hidden]', '.sr-only', '.visually-hidden'
+]
+
+# مجموعات الحذف حسب خيارات الواجهة
+CLEANING_GROUPS = {
+    "header": [
+        'header', 'nav', '.header', '.navigation', '.navbar',
+        '.site-header', '.main-header', '.top-bar', '#header',
+        '.menu', '.main-menu', '.primary-menu'
+    ],
+    "footer": [
+        'footer', '.footer', '.site-footer', '.main-footer',
+        '#footer', '.page-footer', '.bottom-bar'
+    ],
+    "sidebar": [
+        'aside', '.sidebar', '.side-bar', '.widget-area',
+        '#sidebar', '.secondary', '.complementary'
+    ],
+    "ads": [
+        '.ad', '.ads', '.advertisement', '.banner', '.promo',
+        '.sponsor', '.google-ads', '.adsense', '[class*="ad-"]',
+        '[id*="ad-"]', '.adsbygoogle'
+    ],
+    "social": [
+        '.social', '.share', '.sharing', '.social-media',
+        '.share-buttons', '.social-icons', '.follow-us'
+    ],
+    "comments": [
+        '.comments', '.comment', '#comments', '.comment-section',
+        '.disqus', '.fb-comments'
+    ],
+}
+
+# أقل طول نص لقبول حاوية كمحتوى رئيسي
+MIN_MAIN_CHARS = 100
+
+SIMPLE_TAG = re.compile(r'^[a-zA-Z][\w-]*$')
+SIMPLE_CLASS = re.compile(r'^\.(-?[_a-zA-Z][\w-]*)$')
+SIMPLE_ID = re.compile(r'^#([\w-]+)$')
+SIMPLE_ATTR = re.compile(r'^\[([\w-]+)\]$')
+
+
+def split_selectors(text):
+    """محددات مخصصة مفصولة بفواصل كما تُكتب في الواجهة"""
+    return [s.strip() for s in (text or "").split(',') if s.strip()]
+
+
+def invalid_selectors(selectors):
+    """المحددات التي لا يقبلها soupsieve"""
+    invalid = []
+    for selector in selectors:
+        try:
+            soupsieve.compile(selector)
+        except Exception:
+            invalid.append(selector)
+    return invalid
+
+
+class SelectorSet:
+    """مجموعة محددات تُطابق عنصراً واحداً دفعة واحدة"""
+
+    def __init__(self, selectors):
+        self.tags, self.classes, self.ids, self.attrs = set(), set(), set(), set()
+        rest = []
+        for selector in selectors:
+            if SIMPLE_TAG.match(selector):
+                self.tags.add(selector.lower())
+            elif SIMPLE_CLASS.match(selector):
+                self.classes.add(selector[1:])
+            elif SIMPLE_ID.match(selector):
+                self.ids.add(selector[1:])
+            elif SIMPLE_ATTR.match(selector):
+                self.attrs.add(selector[1:-1].lower())
+            else:
+                rest.append(selector)
+        self.compiled = soupsieve.compile(", ".join(rest)) if rest else None
+
+    def matches(self, element):
+        if element.name in self.tags:
+            return True
+        if self.classes:
+            classes = element.get("class")
+            if classes:
+                if isinstance(classes, str):
+                    classes = classes.split()
+                if not self.classes.isdisjoint(classes):
+                    return True
+        if self.ids and element.get("id") in self.ids:
+            return True
+        if self.attrs and not self.attrs.isdisjoint(element.attrs):
+            return True
+        return self.compiled is not None and self.compiled.match(element)
+
+
+class CleaningRules:
+    """
+    إعدادات التنظيف لعملية كشط واحدة: المجموعات المفعلة + المحددات المخصصة
+    ValueError عند وجود محددات مخصصة غير صالحة (بدل تجاهلها بصمت في كل صفحة)
+    """
+
+    def __init__(self, groups=(), custom_selectors=()):
+        custom_selectors = list(custom_selectors)
+        invalid = invalid_selectors(custom_selectors)
+        if invalid:
+            raise ValueError(f"محددات CSS غير صالحة: {', '.join(invalid)}")
+
+        selectors = list(ALWAYS_REMOVE)
+        for group in groups:
+            selectors.extend(CLEANING_GROUPS.get(group, []))
+        selectors.extend(custom_selectors)
+        self.selector_count = len(selectors)
+        self.remove = SelectorSet(selectors)
+
+    def strip(self, soup):
+        """حذف كل العناصر المطابقة في مرور واحد (لا يُنزل داخل عنصر محذوف) - يرجع عدد المحذوف"""
+        doomed = []
+        stack = [soup]
+        while stack:
+            for child in stack.pop().contents:
+                if not isinstance(child, Tag):
+                    continue
+                if self.remove.matches(child):
+                    doomed.append(child)
+                else:
+                    stack.append(child)
+        for element in doomed:
+            element.decompose()
+        return len(doomed)
+
+    def main_content(self, soup):
+        """الحاوية ذات أعلى تقييم (كثافة النص والروابط) - انظر content_score"""
+        return best_content(soup, MIN_MAIN_CHARS)
+
+    def apply(self, soup):
+        self.strip(soup)
+        return self.main_content(soup)
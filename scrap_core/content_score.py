@@ -0,0 +1,116 @@
+"""
+اختيار المحتوى الرئيسي بتقييم العقد على طريقة Readability بدل تجربة المحددات بالترتيب
+كانت الحلقة القديمة تستدعي get_text لكل مرشح وتأخذ أول عنصر نصه أطول من 100 حرف (غالباً main أو .content
+بكل ما فيها، أو أول .post في قائمة مقالات). الآن مرور واحد من الأسفل للأعلى يجمع لكل عقدة طول النص
+وطول نص الروابط وعدد الفواصل، وكل فقرة تضيف نقاطها لأبيها (كاملة) وجدها (النصف)، ثم تُضرب النتيجة
+في (1 - كثافة الروابط) فتخسر القوائم والتنقل وتفوز الحاوية التي تجمع الفقرات
+"""
+
+import re
+
+from bs4 import NavigableString, Tag
+from bs4.element import PreformattedString
+
+# عقد تُقيّم كفقرات، و div/section نصها المباشر طويل (مواقع لا تستخدم <p>)
+PARAGRAPH_TAGS = {"p", "pre", "td", "blockquote"}
+TEXT_BLOCK_TAGS = {"div", "section"}
+MIN_PARAGRAPH_CHARS = 25
+
+# الوزن الابتدائي للمرشح حسب الوسم (قيم Readability)
+TAG_WEIGHTS = {
+    "div": 5, "article": 10, "main": 10, "pre": 3, "td": 3, "blockquote": 3,
+    "address": -3, "ol": -3, "ul": -3, "dl": -3, "dd": -3, "dt": -3, "li": -3, "form": -3,
+    "h1": -5, "h2": -5, "h3": -5, "h4": -5, "h5": -5, "h6": -5, "th": -5,
+}
+
+# تلميحات class/id
+POSITIVE_HINTS = re.compile(r"article|body|content|entry|main|page|post|text|blog|story", re.I)
+NEGATIVE_HINTS = re.compile(
+    r"comment|meta|footer|footnote|sidebar|sponsor|share|social|related|widget|menu|nav|banner|promo|"
+    r"\bad\b|ads|masthead|breadcrumb|pagination|popup|cookie", re.I
+)
+HINT_WEIGHT = 25
+
+
+def hint_weight(element):
+    """+25/-25 حسب class و id (و role=main)"""
+    classes = element.get("class") or []
+    if isinstance(classes, str):
+        classes = [classes]
+    hints = " ".join(classes) + " " + (element.get("id") or "")
+    weight = 0
+    if hints.strip():
+        if NEGATIVE_HINTS.search(hints):
+            weight -= HINT_WEIGHT
+        if POSITIVE_HINTS.search(hints):
+            weight += HINT_WEIGHT
+    if element.get("role") == "main":
+        weight += HINT_WEIGHT
+    return weight
+
+
+def score_nodes(root):
+    """
+    مرور واحد (ترتيب لاحق) على الشجرة
+    يرجع {id(عقدة): (العقدة، النتيجة النهائية، طول النص)} للعقد التي تلقت نقاط فقرات
+    """
+    text_len, link_len, commas = {}, {}, {}
+    scores, nodes = {}, {}
+    # الأب والجد لكل عقدة في المسار الحالي (بدل .parent الذي قد يشير خارج root)
+    stack = [(root, False, None, None)]
+    while stack:
+        node, done, parent, grandparent = stack.pop()
+        key = id(node)
+        if not done:
+            stack.append((node, True, parent, grandparent))
+            for child in node.contents:
+                if isinstance(child, Tag):
+                    stack.append((child, False, node, parent))
+            continue
+
+        total = links = comma_count = own = 0
+        for child in node.contents:
+            if isinstance(child, Tag):
+                child_key = id(child)
+                total += text_len[child_key]
+                links += link_len[child_key]
+                comma_count += commas[child_key]
+            elif isinstance(child, NavigableString) and not isinstance(child, PreformattedString):
+                text = child.strip()
+                own += len(text)
+                comma_count += text.count(",") + text.count("،")
+        total += own
+        if node.name == "a":
+            links = total
+        text_len[key], link_len[key], commas[key] = total, links, comma_count
+
+        is_paragraph = node.name in PARAGRAPH_TAGS or (node.name in TEXT_BLOCK_TAGS and own >= MIN_PARAGRAPH_CHARS)
+        if not is_paragraph or total < MIN_PARAGRAPH_CHARS:
+            continue
+        points = 1 + comma_count + min(total // 100, 3)
+        for ancestor, share in ((parent, 1.0), (grandparent, 0.5)):
+            if ancestor is None or ancestor is root:
+                continue
+            ancestor_key = id(ancestor)
+            if ancestor_key not in scores:
+                nodes[ancestor_key] = ancestor
+                scores[ancestor_key] = TAG_WEIGHTS.get(ancestor.name, 0) + hint_weight(ancestor)
+            scores[ancestor_key] += points * share
+
+    result = {}
+    for key, node in nodes.items():
+        total = text_len[key]
+        link_density = link_len[key] / total if total else 1.0
+        result[key] = (node, scores[key] * (1 - link_density), total)
+    return result
+
+
+def best_content(root, min_chars=100):
+    """العقدة ذات أعلى نتيجة (نصها أطول من min_chars)، أو body/الجذر إن لم توجد"""
+    best, best_score = None, None
+    for node, score, total in score_nodes(root).values():
+        if total > min_chars and (best_score is None or score > best_score):
+            best, best_score = node, score
+    if best is not None:
+        return best
+    return root.find("body") or root
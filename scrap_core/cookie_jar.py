@@ -0,0 +1,150 @@
+"""
+استيراد وتصدير كوكيز الجلسة كملف cookies.txt (صيغة Netscape/Mozilla) أو JSON
+للتشغيل على الخوادم بدون متصفح (مثل Render): تُصدّر الكوكيز من جهاز فيه متصفح
+ثم تُحمّل عند بدء التشغيل فتبدأ الجلسة مسجلة الدخول مباشرة
+"""
+
+import json
+import os
+import tempfile
+import time
+from http.cookiejar import Cookie, MozillaCookieJar, LoadError
+
+# متغير البيئة الذي يحدد ملف الكوكيز المحمّل تلقائياً عند بدء التشغيل
+COOKIES_FILE_ENV = "SCRAP_COOKIES_FILE"
+
+# التحذير عندما تقترب صلاحية الكوكيز من الانتهاء (بالثواني)
+EXPIRY_WARNING = 24 * 3600
+
+
+def _is_json(path):
+    return path.lower().endswith(".json")
+
+
+def make_cookie(name, value, domain, path="/", secure=False, expires=None, http_only=False):
+    """إنشاء Cookie بنفس الحقول التي تحفظها المتصفحات"""
+    domain = domain or ""
+    return Cookie(
+        version=0, name=name, value=value,
+        port=None, port_specified=False,
+        domain=domain, domain_specified=bool(domain), domain_initial_dot=domain.startswith("."),
+        path=path or "/", path_specified=True,
+        secure=bool(secure), expires=int(expires) if expires else None,
+        discard=not expires, comment=None, comment_url=None,
+        rest={"HttpOnly": None} if http_only else {},
+    )
+
+
+def cookie_to_dict(cookie):
+    return {
+        "name": cookie.name,
+        "value": cookie.value,
+        "domain": cookie.domain,
+        "path": cookie.path,
+        "secure": cookie.secure,
+        "expires": cookie.expires,
+        "httpOnly": cookie.has_nonstandard_attr("HttpOnly"),
+    }
+
+
+def cookie_from_dict(data):
+    """يقبل صيغة هذا الملف وصيغ إضافات المتصفح الشائعة (expirationDate، hostOnly)"""
+    expires = data.get("expires", data.get("expirationDate"))
+    if data.get("session"):
+        expires = None
+    domain = data.get("domain", "")
+    if data.get("hostOnly") is False and domain and not domain.startswith("."):
+        domain = "." + domain
+    return make_cookie(
+        data["name"], data.get("value", ""), domain,
+        path=data.get("path", "/"), secure=data.get("secure", False),
+        expires=expires, http_only=data.get("httpOnly", False),
+    )
+
+
+def save_cookie_jar(cookies, path):
+    """حفظ الكوكيز (jar أو قائمة) حسب امتداد الملف: ‎.json أو cookies.txt"""
+    cookies = list(cookies)
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    if _is_json(path):
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump([cookie_to_dict(cookie) for cookie in cookies], f, ensure_ascii=False, indent=2)
+    else:
+        jar = MozillaCookieJar(path)
+        for cookie in cookies:
+            jar.set_cookie(cookie)
+        jar.save(ignore_discard=True, ignore_expires=True)
+    return len(cookies)
+
+
+def cookie_jar_bytes(cookies, filename="cookies.txt"):
+    """محتوى ملف الكوكيز كبايتات (للتنزيل من المتصفح) بنفس صيغة save_cookie_jar"""
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, os.path.basename(filename))
+        save_cookie_jar(cookies, path)
+        with open(path, "rb") as f:
+            return f.read()
+
+
+def load_cookie_bytes(data, filename):
+    """قراءة ملف كوكيز مرفوع (بايتات) بنفس قواعد load_cookie_jar"""
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, os.path.basename(filename))
+        with open(path, "wb") as f:
+            f.write(data)
+        return load_cookie_jar(path)
+
+
+def load_cookie_jar(path, now=None):
+    """
+    قراءة ملف كوكيز واستبعاد المنتهي منها
+    ترجع (قائمة الكوكيز الصالحة، عدد المنتهية) - ValueError عند صيغة غير صالحة
+    """
+    now = now or time.time()
+    if _is_json(path):
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        if isinstance(data, dict):
+            data = data.get("cookies", [])
+        try:
+            cookies = [cookie_from_dict(item) for item in data]
+        except (KeyError, TypeError) as e:
+            raise ValueError(f"صيغة JSON غير صالحة للكوكيز: {e}")
+    else:
+        jar = MozillaCookieJar(path)
+        try:
+            jar.load(ignore_discard=True, ignore_expires=True)
+        except LoadError as e:
+            raise ValueError(str(e))
+        cookies = list(jar)
+
+    live = [cookie for cookie in cookies if not cookie.is_expired(now)]
+    return live, len(cookies) - len(live)
+
+
+def apply_cookies(session, cookies):
+    """إضافة الكوكيز لجلسة requests مع الحفاظ على تاريخ انتهائها"""
+    count = 0
+    for cookie in cookies:
+        session.cookies.set_cookie(cookie)
+        count += 1
+    return count
+
+
+def earliest_expiry(cookies):
+    """أقرب تاريخ انتهاء بين الكوكيز الدائمة (None إذا كانت كلها كوكيز جلسة)"""
+    expiries = [cookie.expires for cookie in cookies if cookie.expires]
+    return min(expiries) if expiries else None
+
+
+def expiry_warning(cookies, now=None):
+    """نص تحذير إذا كانت بعض الكوكيز ستنتهي قريباً، وإلا None"""
+    expires = earliest_expiry(cookies)
+    if expires is None:
+        return None
+    remaining = expires - (now or time.time())
+    if remaining > EXPIRY_WARNING:
+        return None
+    return f"⏳ بعض الكوكيز تنتهي خلال {max(0, remaining) / 3600:.1f} ساعة - يُفضل تصديرها من جديد"
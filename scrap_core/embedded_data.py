@@ -0,0 +1,273 @@
+"""
+مسار سريع للصفحات التي تضمّن محتواها كـ JSON داخل HTML
+(‎<script id="__NEXT_DATA__"> في مواقع Next.js وكتل JSON-LD)
+يُقرأ الـ JSON بتعبير نمطي بدون تحليل DOM، ويُحوّل مباشرة إلى Markdown/HTML مع روابطه
+فيتخطى تنظيف الصفحة و html2text، ويحفظ الحقول المنظمة كما هي
+"""
+
+import html
+import json
+import re
+from urllib.parse import urljoin
+
+NEXT_DATA = "next_data"
+JSON_LD = "json_ld"
+
+NEXT_DATA_SCRIPT = re.compile(
+    r"<script[^>]*\bid\s*=\s*[\"']__NEXT_DATA__[\"'][^>]*>(.*?)</script>", re.IGNORECASE | re.DOTALL
+)
+JSON_LD_SCRIPT = re.compile(
+    r"<script[^>]*\btype\s*=\s*[\"']application/ld\+json[\"'][^>]*>(.*?)</script>", re.IGNORECASE | re.DOTALL
+)
+TAGS = re.compile(r"<[^>]+>")
+HTML_FRAGMENT = re.compile(r"<(p|br|div|span|h\d|ul|li|a|strong|em)\b", re.IGNORECASE)
+SPACES = re.compile(r"[ \t]+")
+
+# أقل طول لنص المتن (articleBody / text / body...) ليُعتمد بدل تحليل الصفحة
+# (JSON-LD غالباً بيانات وصفية فقط: العنوان والوصف والكاتب والتواريخ)
+MIN_TEXT_CHARS = 200
+
+# تُفضّل الصفحة إذا كان نص محتواها الرئيسي أطول من نص الحمولة بهذه النسبة
+DOM_RATIO = 2
+
+# النص الأطول من هذا (وفيه مسافات) فقرة، والأقصر حقل قصير
+PROSE_CHARS = 60
+
+# حقول تقنية لا تُعرض
+SKIP_KEYS = {
+    "id", "_id", "uuid", "__typename", "buildid", "locale", "locales", "defaultlocale",
+    "isfallback", "gssp", "gip", "appgip", "scriptloader", "runtimeconfig", "dehydratedstate",
+    "@context", "@id", "image", "images", "thumbnail", "logo", "icon", "avatar", "width", "height",
+    "createdat", "updatedat", "etag", "hash", "token", "csrf", "csrftoken",
+}
+
+# حقول عنوان الكائن
+TITLE_KEYS = ("title", "headline", "name")
+
+# حقول النص الأساسي: تُعرض فقرتها تحت عنوان الكائن مباشرة بدون عنوان للحقل
+BODY_KEYS = {"body", "content", "text", "articlebody", "description", "summary", "html"}
+
+# حقول المتن الفعلي (بدون الوصف والملخص)؛ نصها وما بداخلها يُعد متناً
+CONTENT_KEYS = {"body", "content", "text", "articlebody", "html", "markdown"}
+
+# حقول وصفية لا تُعد فقرتها متناً حتى في حمولات Next.js والواجهات
+META_KEYS = {"description", "summary", "excerpt", "abstract", "subtitle", "seo", "meta", "metadata", "og"}
+
+# امتدادات الملفات التي ليست صفحات
+ASSET_EXTENSIONS = (
+    ".png", ".jpg", ".jpeg", ".gif", ".webp", ".avif", ".svg", ".ico", ".css", ".js", ".json",
+    ".woff", ".woff2", ".ttf", ".mp4", ".webm", ".mp3", ".pdf", ".zip",
+)
+
+# حدود العمق وعدد عناصر القوائم حتى لا تنفجر الحمولات الضخمة
+MAX_DEPTH = 8
+MAX_ITEMS = 200
+
+
+def _label(key):
+    """camelCase / snake_case ← عنوان مقروء"""
+    words = re.sub(r"([a-z])([A-Z])", r"\1 \2", key.lstrip("@_")).replace("_", " ").replace("-", " ")
+    return words.strip().capitalize()
+
+
+def _clean_text(value):
+    """نص الحقل؛ الحقول التي تحتوي HTML تُجرّد من الوسوم"""
+    if HTML_FRAGMENT.search(value):
+        value = re.sub(r"<br\s*/?>|</p>|</li>|</h\d>", "\n", value, flags=re.IGNORECASE)
+        value = html.unescape(TAGS.sub("", value))
+    return SPACES.sub(" ", value).strip()
+
+
+def _looks_like_url(value):
+    if not value or " " in value or len(value) > 2000:
+        return False
+    return value.startswith(("http://", "https://")) or (value.startswith("/") and not value.startswith("//"))
+
+
+def _is_asset(value):
+    return value.lower().split("?", 1)[0].endswith(ASSET_EXTENSIONS)
+
+
+def _load_json(text):
+    try:
+        return json.loads(text)
+    except ValueError:
+        return None
+
+
+class EmbeddedPage:
+    """محتوى صفحة مستخرج من JSON مضمّن: أقسام للعرض، وروابط مع نصوصها، والحمولة الأصلية"""
+
+    def __init__(self, source, payload, base_url):
+        self.source = source
+        self.payload = payload
+        self.base_url = base_url
+        self.title = None
+        self.links = []
+        self._seen_links = set()
+        # (نوع، مستوى، نص): "heading" أو "field" أو "text" أو "item"
+        self.blocks = []
+        self.text_chars = 0
+        # نص المتن فقط: JSON-LD من حقول CONTENT_KEYS، وباقي المصادر أيضاً من الفقرات خارج الحقول الوصفية
+        self.body_chars = 0
+        self._walk(payload, None, 0, None)
+
+    @property
+    def has_content(self):
+        return self.body_chars >= MIN_TEXT_CHARS
+
+    def covers(self, dom_chars):
+        """False إذا كان نص المحتوى الرئيسي في الصفحة أطول بوضوح من الحمولة (فتُحلل الصفحة بدلها)"""
+        return dom_chars <= self.text_chars * DOM_RATIO
+
+    def _count_body(self, text, key, in_body, prose):
+        if in_body or (key and key.lower() in CONTENT_KEYS):
+            self.body_chars += len(text)
+        elif self.source != JSON_LD and prose and not (key and key.lower() in META_KEYS):
+            self.body_chars += len(text)
+
+    def _add_link(self, value, anchor):
+        url = urljoin(self.base_url, value)
+        if url not in self._seen_links:
+            self._seen_links.add(url)
+            self.links.append((url, anchor))
+
+    def _walk(self, node, key, depth, anchor, in_body=False):
+        if depth > MAX_DEPTH:
+            return
+        if isinstance(node, dict):
+            title = next((node[k] for k in TITLE_KEYS if isinstance(node.get(k), str) and node[k].strip()), None)
+            heading = title or (_label(key) if key else None)
+            if heading:
+                if self.title is None and title:
+                    self.title = _clean_text(title)
+                self.blocks.append(("heading", min(depth + 1, 6), _clean_text(heading)))
+            for child_key, value in node.items():
+                if child_key.lower() in SKIP_KEYS or (title and value is title):
+                    continue
+                self._walk(value, child_key, depth + 1, title or anchor,
+                           in_body or child_key.lower() in CONTENT_KEYS)
+        elif isinstance(node, list):
+            words = [item.strip() for item in node[:MAX_ITEMS] if isinstance(item, str)]
+            if key and words and len(words) == len(node[:MAX_ITEMS]) and \
+                    all(len(word) < PROSE_CHARS and not _looks_like_url(word) for word in words):
+                # قائمة وسوم/تصنيفات قصيرة: حقل واحد
+                text = ", ".join(_clean_text(word) for word in words if word)
+                self.blocks.append(("field", depth, (_label(key), text)))
+                self.text_chars += len(text)
+                return
+            if key and any(isinstance(item, (dict, list)) for item in node[:MAX_ITEMS]):
+                self.blocks.append(("heading", min(depth + 1, 6), _label(key)))
+            for item in node[:MAX_ITEMS]:
+                if isinstance(item, str):
+                    if _looks_like_url(item):
+                        if not _is_asset(item):
+                            self._add_link(item, anchor)
+                    elif item.strip():
+                        text = _clean_text(item)
+                        self.blocks.append(("item", depth, text))
+                        self.text_chars += len(text)
+                        self._count_body(text, key, in_body, len(text) >= PROSE_CHARS and " " in text)
+                else:
+                    self._walk(item, None, depth, anchor, in_body)
+        elif isinstance(node, str):
+            if _looks_like_url(node):
+                if not _is_asset(node):
+                    self._add_link(node, anchor)
+                return
+            text = _clean_text(node)
+            if not text:
+                return
+            prose = len(text) >= PROSE_CHARS and " " in text
+            if prose:
+                if key and key.lower() not in BODY_KEYS:
+                    self.blocks.append(("heading", min(depth + 1, 6), _label(key)))
+                self.blocks.append(("text", depth, text))
+            elif key:
+                self.blocks.append(("field", depth, (_label(key), text)))
+            self.text_chars += len(text)
+            self._count_body(text, key, in_body, prose)
+        elif isinstance(node, (int, float)) and not isinstance(node, bool) and key:
+            self.blocks.append(("field", depth, (_label(key), str(node))))
+
+    def _compact(self):
+        """حذف العناوين التي لا يتبعها محتوى"""
+        blocks = []
+        for block in self.blocks:
+            if blocks and blocks[-1][0] == "heading" and block[0] == "heading" and block[1] <= blocks[-1][1]:
+                blocks.pop()
+            blocks.append(block)
+        while blocks and blocks[-1][0] == "heading":
+            blocks.pop()
+        return blocks
+
+    def to_markdown(self):
+        lines = []
+        for kind, level, value in self._compact():
+            if kind == "heading":
+                lines.append(f"\n{'#' * level} {value}\n")
+            elif kind == "field":
+                lines.append(f"- **{value[0]}:** {value[1]}")
+            elif kind == "item":
+                lines.append(f"- {value}")
+            else:
+                lines.append(f"\n{value}\n")
+        return re.sub(r"\n{3,}", "\n\n", "\n".join(lines)).strip() + "\n"
+
+    def to_html(self):
+        parts = [f"<html><head><meta charset='utf-8'><title>{html.escape(self.title or '')}</title></head><body>"]
+        for kind, level, value in self._compact():
+            if kind == "heading":
+                parts.append(f"<h{level}>{html.escape(value)}</h{level}>")
+            elif kind == "field":
+                parts.append(f"<p><strong>{html.escape(value[0])}:</strong> {html.escape(value[1])}</p>")
+            elif kind == "item":
+                parts.append(f"<ul><li>{html.escape(value)}</li></ul>")
+            else:
+                parts.append("".join(f"<p>{html.escape(line)}</p>" for line in value.split("\n") if line.strip()))
+        parts.append("</body></html>")
+        return "".join(parts)
+
+    def payload_json(self):
+        return json.dumps(self.payload, ensure_ascii=False, indent=2)
+
+
+def _next_data(html_text):
+    match = NEXT_DATA_SCRIPT.search(html_text)
+    if not match:
+        return None
+    data = _load_json(match.group(1))
+    if not isinstance(data, dict):
+        return None
+    # محتوى الصفحة في props.pageProps، والباقي إعدادات Next.js
+    props = data.get("props") or {}
+    return props.get("pageProps", props) or None
+
+
+def _json_ld(html_text):
+    items = []
+    for match in JSON_LD_SCRIPT.finditer(html_text):
+        data = _load_json(match.group(1))
+        if isinstance(data, dict) and isinstance(data.get("@graph"), list):
+            items.extend(data["@graph"])
+        elif isinstance(data, list):
+            items.extend(data)
+        elif isinstance(data, dict):
+            items.append(data)
+    return items or None
+
+
+def extract_embedded(html_text, base_url):
+    """
+    أول مصدر JSON مضمّن فيه متن كافٍ (__NEXT_DATA__ ثم JSON-LD)
+    يرجع EmbeddedPage أو None إذا لم يوجد أو كان بيانات وصفية فقط
+    (المستدعي يقارن بعدها بنص الصفحة نفسها عبر covers)
+    """
+    for source, loader in ((NEXT_DATA, _next_data), (JSON_LD, _json_ld)):
+        payload = loader(html_text)
+        if payload is None:
+            continue
+        page = EmbeddedPage(source, payload, base_url)
+        if page.has_content:
+            return page
+    return None
@@ -0,0 +1,253 @@
+"""
+محرك الجلب المتزامن (asyncio) المشترك بين واجهتي Flet و Streamlit
+يجلب عدة صفحات في نفس الوقت عبر تجمّع اتصالات requests ثم يمرر كل صفحة
+لخطوات الحفظ واستخراج الروابط الموجودة في التطبيق
+"""
+
+import asyncio
+import heapq
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlparse
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from .checkpoint import CHECKPOINT_INTERVAL, CHECKPOINT_EVERY
+from .frontier import Frontier
+from .retry import RetryLater
+
+# الحد الافتراضي لعدد الطلبات الجارية في نفس الوقت
+DEFAULT_MAX_IN_FLIGHT = 8
+
+# مدة الانتظار أثناء الإيقاف المؤقت أو عند عدم وجود نتائج جاهزة
+IDLE_INTERVAL = 0.2
+
+
+class ObservingAdapter(HTTPAdapter):
+    """محول اتصالات يُبلغ المراقبين (المجدول، قاطع الدائرة) بكل استجابة وكل خطأ شبكة"""
+
+    def __init__(self, observers, **kwargs):
+        self.observers = observers
+        super().__init__(**kwargs)
+
+    def send(self, request, **kwargs):
+        try:
+            response = super().send(request, **kwargs)
+        except (requests.exceptions.ConnectionError, requests.exceptions.Timeout):
+            host = urlparse(request.url).netloc
+            for observer in self.observers:
+                observer.record_error(host)
+            raise
+        for observer in self.observers:
+            observer.observe_response(response)
+        return response
+
+
+class FetchEngine:
+    """محرك جلب متزامن مع حد أقصى للطلبات الجارية"""
+
+    def __init__(self, session, fetch_page, max_in_flight=DEFAULT_MAX_IN_FLIGHT,
+                 thread_initializer=None, scheduler=None, breaker=None, frontier_factory=Frontier,
+                 local_page=None):
+        """
+        session: جلسة requests المستخدمة (تحمل الكوكيز)
+        fetch_page: دالة متزامنة تأخذ الرابط وترجع المحتوى أو None
+        thread_initializer: دالة تُنفذ في بداية كل خيط جلب (مثل ربط سياق Streamlit)
+        scheduler: مجدول مهذب لكل مضيف (HostScheduler) أو None
+        breaker: قاطع دائرة لكل مضيف (CircuitBreaker) أو None
+        frontier_factory(max_depth): ينشئ قائمة الانتظار (Frontier أو PriorityFrontier)
+        local_page: دالة ترجع نسخة محلية من الصفحة (مثل المخزن الخام) أو None - تُجرب قبل انتظار دور المضيف
+        """
+        self.session = session
+        self.fetch_page = fetch_page
+        self.scheduler = scheduler
+        self.breaker = breaker
+        self.frontier_factory = frontier_factory
+        self.local_page = local_page
+        self.max_in_flight = max(1, int(max_in_flight))
+        self.thread_initializer = thread_initializer
+        self.stats = {"fetched": 0, "failed": 0, "host_down": 0, "disallowed": 0, "local": 0,
+                      "retried": 0, "elapsed": 0.0}
+        self._mount_pool()
+
+    def _mount_pool(self):
+        """تجهيز تجمّع اتصالات يكفي لعدد الطلبات المتزامنة"""
+        observers = [observer for observer in (self.scheduler, self.breaker) if observer]
+        adapter = ObservingAdapter(
+            observers,
+            pool_connections=self.max_in_flight,
+            pool_maxsize=self.max_in_flight
+        )
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+    def crawl(self, seeds, handle_page, max_depth=None, should_stop=None, should_pause=None,
+              frontier=(), visited=(), checkpoint=None, max_pages=None, time_budget=None,
+              allow=None):
+        """
+        تشغيل الكشط حتى نفاد قائمة الانتظار أو الميزانية
+        seeds: روابط البداية (عمقها صفر)
+        handle_page(url, depth, content): تعالج الصفحة (content = None عند الفشل)
+            (fetch_page ترفع RetryLater لإعادة الرابط بعد مهلة بدل الانتظار في خيط الجلب)
+            وترجع الروابط الجديدة المكتشفة (رابط، أو زوج (رابط، نص الرابط))
+        max_depth: أقصى عمق (None = غير محدود)
+        max_pages / time_budget: ميزانية عدد الصفحات أو الثواني (None = بدون حد)
+        frontier: أزواج (url, depth) مستعادة من نقطة استئناف
+        visited: روابط مكتملة سابقاً لا يُعاد جلبها
+        checkpoint(frontier): تُستدعى دورياً بقائمة (url, depth) غير المكتملة لحفظها
+        allow(url): فلتر الروابط المكتشفة (مثل قواعد robots.txt) - None = الكل مسموح
+        """
+        user_stop = should_stop or (lambda: False)
+        should_pause = should_pause or (lambda: False)
+        started = time.monotonic()
+
+        def should_stop():
+            if max_pages and self.stats["fetched"] + self.stats["failed"] >= max_pages:
+                return True
+            if time_budget and time.monotonic() - started >= time_budget:
+                return True
+            return user_stop()
+
+        try:
+            asyncio.run(self._crawl(
+                seeds, handle_page, max_depth, should_stop, should_pause,
+                frontier, visited, checkpoint, allow
+            ))
+        finally:
+            self.stats["elapsed"] = time.monotonic() - started
+        return self.stats
+
+    async def _fetch(self, loop, executor, url):
+        """النسخة المحلية إن وُجدت (بدون طلب فلا تنتظر دور المضيف)، وإلا انتظار الدور ثم الجلب في خيط من التجمّع"""
+        if self.local_page:
+            content = await loop.run_in_executor(executor, self.local_page, url)
+            if content:
+                self.stats["local"] += 1
+                return content
+        if self.scheduler:
+            await self.scheduler.acquire(urlparse(url).netloc)
+        return await loop.run_in_executor(executor, self.fetch_page, url)
+
+    async def _crawl(self, seeds, handle_page, max_depth, should_stop, should_pause,
+                     frontier, visited, checkpoint, allow):
+        loop = asyncio.get_running_loop()
+        executor = ThreadPoolExecutor(
+            max_workers=self.max_in_flight,
+            thread_name_prefix="fetch",
+            initializer=self.thread_initializer
+        )
+
+        queue = self.frontier_factory(max_depth)
+        queue.mark_seen(visited)
+        # روابط مؤجلة لمضيفين دائرتهم مفتوحة
+        parked = {}
+        # مضيفون سُمح لهم بطلب تجريبي واحد
+        probes = set()
+        # إعادات محاولة تنتظر موعدها: (وقت السماح، الرابط، العمق)
+        delayed = []
+
+        def complete(url, depth, content):
+            if content:
+                self.stats["fetched"] += 1
+            else:
+                self.stats["failed"] += 1
+            for link in handle_page(url, depth, content) or []:
+                link, anchor = link if isinstance(link, tuple) else (link, None)
+                if allow and link not in queue and not allow(link):
+                    self.stats["disallowed"] += 1
+                    queue.mark_seen((link,))
+                    continue
+                queue.push(link, depth + 1, anchor)
+
+        def release_parked():
+            """إعادة روابط المضيفين المتاحين للقائمة، وإنهاء روابط المضيفين المتوقفين"""
+            for host in list(parked):
+                if self.breaker.is_dead(host):
+                    for url, depth in parked.pop(host):
+                        self.stats["host_down"] += 1
+                        complete(url, depth, None)
+                elif self.breaker.allow(host):
+                    # الرابط الأول هو الطلب التجريبي المسموح به الآن
+                    queue.push_front(parked.pop(host))
+                    probes.add(host)
+
+        for seed in seeds:
+            queue.push(seed, 0)
+        for url, depth in frontier:
+            queue.push(url, depth)
+
+        pending = {}
+
+        def snapshot():
+            """كل الروابط غير المكتملة: الجارية ثم المنتظرة ثم المؤجلة"""
+            items = list(pending.values()) + [(url, depth) for _, url, depth in delayed] + queue.items()
+            for host_items in parked.values():
+                items.extend(host_items)
+            return items
+
+        last_checkpoint = time.monotonic()
+        completed_since = 0
+        try:
+            while queue or pending or parked or delayed:
+                if should_stop():
+                    break
+
+                if parked:
+                    release_parked()
+
+                # إرسال طلبات جديدة حتى الحد الأقصى (إعادات المحاولة التي حان موعدها أولاً)
+                while len(pending) < self.max_in_flight and not should_pause():
+                    if delayed and delayed[0][0] <= time.monotonic():
+                        _, url, depth = heapq.heappop(delayed)
+                    elif queue:
+                        url, depth = queue.pop()
+                    else:
+                        break
+                    host = urlparse(url).netloc
+                    if host in probes:
+                        probes.discard(host)
+                    elif self.breaker and (host in parked or not self.breaker.allow(host)):
+                        parked.setdefault(host, deque()).append((url, depth))
+                        continue
+                    future = asyncio.ensure_future(self._fetch(loop, executor, url))
+                    pending[future] = (url, depth)
+
+                if not pending:
+                    await asyncio.sleep(IDLE_INTERVAL)
+                    continue
+
+                done, _ = await asyncio.wait(
+                    pending, timeout=IDLE_INTERVAL, return_when=asyncio.FIRST_COMPLETED
+                )
+
+                # معالجة الصفحات المكتملة في خيط المحرك (الحفظ واستخراج الروابط)
+                for future in done:
+                    url, depth = pending.pop(future)
+                    try:
+                        content = future.result()
+                    except RetryLater as retry:
+                        # تعود عبر مجدول المضيف بعد المهلة، وخيط الجلب متاح لروابط أخرى في أثنائها
+                        heapq.heappush(delayed, (time.monotonic() + retry.delay, url, depth))
+                        self.stats["retried"] += 1
+                        continue
+                    except Exception:
+                        content = None
+                    complete(url, depth, content)
+                    completed_since += 1
+
+                    if should_stop():
+                        break
+
+                if checkpoint and (completed_since >= CHECKPOINT_EVERY or
+                                   time.monotonic() - last_checkpoint >= CHECKPOINT_INTERVAL):
+                    checkpoint(snapshot())
+                    last_checkpoint = time.monotonic()
+                    completed_since = 0
+        finally:
+            if checkpoint:
+                checkpoint(snapshot())
+            for future in pending:
+                future.cancel()
+            executor.shutdown(wait=False, cancel_futures=True)
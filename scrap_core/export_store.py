@@ -0,0 +1,156 @@
+"""
+تخزين الملفات المصدّرة (Markdown / PDF / JSON) بعنونة المحتوى: كل محتوى يُكتب مرة واحدة في
+.scrap_cache/exports ويظهر في مجلدات الجلسات كرابط صلب (hardlink) - الجلسات المتكررة لا تكاد تستهلك مساحة
+(ونسخ عند عدم دعم الروابط الصلبة كما في نقل ملفات الكشط التزايدي)
+"""
+
+import os
+import shutil
+import threading
+import zipfile
+
+# امتدادات مضغوطة أصلاً: تُخزن في ZIP كما هي بدل ضغطها مرة أخرى بلا فائدة
+COMPRESSED_EXTENSIONS = {
+    ".pdf", ".zip", ".gz", ".zst", ".png", ".jpg", ".jpeg", ".gif", ".webp", ".mp4", ".mp3", ".woff2",
+}
+
+# أقصى حجم لمحتوى الملفات المتطابقة المحفوظ في الذاكرة أثناء الضغط (ما زاد يُقرأ من القرص لكل اسم)
+REPEAT_CACHE_BYTES = 64 * 1024 * 1024
+
+# ملف علامة: استُخدم النسخ بدل الروابط الصلبة، فعدد الروابط لم يعد يدل على الاستخدام
+COPIES_MARKER = ".copies"
+
+
+class ExportStore:
+    """ملفات مصدّرة بمفتاح المحتوى (بصمة مدخلاته) مع ربطها في مجلد الجلسة"""
+
+    def __init__(self, root):
+        self.root = root
+        os.makedirs(root, exist_ok=True)
+        self._lock = threading.Lock()
+        self.stats = {"written": 0, "reused": 0, "bytes_written": 0, "bytes_reused": 0, "copied": 0}
+
+    def _object_path(self, key, extension):
+        return os.path.join(self.root, key[:2], key + extension)
+
+    def _place(self, source, target):
+        """ربط صلب في مكان target (يستبدل الموجود بدون الكتابة عبر رابط قديم)"""
+        if os.path.exists(target) and os.path.samefile(source, target):
+            # rename بين اسمين لنفس الملف لا يفعل شيئاً ويترك الملف المؤقت
+            return
+        tmp_path = f"{target}.{threading.get_ident()}.tmp"
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        try:
+            os.link(source, tmp_path)
+        except OSError:
+            shutil.copy2(source, tmp_path)
+            self._mark_copies()
+        os.replace(tmp_path, target)
+
+    def _mark_copies(self):
+        with self._lock:
+            self.stats["copied"] += 1
+            if self.stats["copied"] == 1:
+                open(os.path.join(self.root, COPIES_MARKER), "a").close()
+
+    def reuse(self, key, extension, target):
+        """وضع المحتوى المحفوظ سابقاً بهذا المفتاح في target بدون توليده - False إن لم يوجد"""
+        path = self._object_path(key, extension)
+        if not os.path.exists(path):
+            return False
+        self._place(path, target)
+        with self._lock:
+            self.stats["reused"] += 1
+            self.stats["bytes_reused"] += os.path.getsize(path)
+        return True
+
+    def save(self, key, extension, target, write):
+        """
+        المحتوى بمفتاح key في target: رابط للنسخة المحفوظة إن وُجدت، وإلا write(path) يولّده مرة واحدة
+        يرجع True إذا أُعيد استخدام نسخة موجودة
+        """
+        if self.reuse(key, extension, target):
+            return True
+        path = self._object_path(key, extension)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.{threading.get_ident()}.tmp"
+        write(tmp_path)
+        os.replace(tmp_path, path)
+        self._place(path, target)
+        with self._lock:
+            self.stats["written"] += 1
+            self.stats["bytes_written"] += os.path.getsize(path)
+        return False
+
+    def save_text(self, key, extension, target, text):
+        def write(path):
+            with open(path, "w", encoding="utf-8") as f:
+                f.write(text)
+        return self.save(key, extension, target, write)
+
+    def prune(self):
+        """
+        حذف المحتوى الذي لم يعد أي مجلد جلسة يشير إليه (عدد الروابط 1) - يرجع عدد المحذوف
+        لا شيء يُحذف إذا استُخدم النسخ يوماً (النسخ لا تُحسب في عدد روابط الأصل)
+        """
+        if os.path.exists(os.path.join(self.root, COPIES_MARKER)):
+            return 0
+        removed = 0
+        for root, _, files in os.walk(self.root):
+            for name in files:
+                path = os.path.join(root, name)
+                try:
+                    if os.stat(path).st_nlink <= 1:
+                        os.remove(path)
+                        removed += 1
+                except OSError:
+                    continue
+        return removed
+
+    def summary(self):
+        return (f"{self.stats['written']} ملف جديد ({self.stats['bytes_written'] / 1024:.0f} KB)، "
+                f"{self.stats['reused']} ملف مكرر مربوط بدون كتابة ({self.stats['bytes_reused'] / 1024:.0f} KB)")
+
+
+def zip_directory(folder_path, zip_path):
+    """
+    ضغط مجلد مع الحفاظ على اسمه داخل الأرشيف
+    الملفات المضغوطة أصلاً (PDF، صور...) تُخزن كما هي، والملفات المتطابقة (نفس الرابط الصلب في نفس المجلد)
+    تُقرأ من القرص مرة واحدة وتُكتب من الذاكرة لباقي الأسماء
+    يرجع إحصاءات {files, stored, deflated, repeated}
+    """
+    stats = {"files": 0, "stored": 0, "deflated": 0, "repeated": 0}
+    parent = os.path.dirname(folder_path)
+    # (الجهاز، inode) ← محتوى الملف المقروء أول مرة
+    contents = {}
+    cached_bytes = 0
+    with zipfile.ZipFile(zip_path, "w", compression=zipfile.ZIP_DEFLATED) as zf:
+        for root, dirs, files in os.walk(folder_path):
+            dirs.sort()
+            for file in sorted(files):
+                full_path = os.path.join(root, file)
+                arcname = os.path.relpath(full_path, parent)
+                stats["files"] += 1
+                status = os.stat(full_path)
+                identity = (status.st_dev, status.st_ino)
+                extension = os.path.splitext(file)[1].lower()
+                compress_type = zipfile.ZIP_STORED if extension in COMPRESSED_EXTENSIONS else zipfile.ZIP_DEFLATED
+                if identity in contents:
+                    info = zipfile.ZipInfo.from_file(full_path, arcname)
+                    info.compress_type = compress_type
+                    zf.writestr(info, contents[identity])
+                    stats["repeated"] += 1
+                    continue
+                stats["stored" if compress_type == zipfile.ZIP_STORED else "deflated"] += 1
+                if status.st_nlink > 1 and cached_bytes + status.st_size <= REPEAT_CACHE_BYTES:
+                    with open(full_path, "rb") as f:
+                        data = f.read()
+                    contents[identity] = data
+                    cached_bytes += len(data)
+                    info = zipfile.ZipInfo.from_file(full_path, arcname)
+                    info.compress_type = compress_type
+                    zf.writestr(info, data)
+                    continue
+                zf.write(full_path, arcname=arcname, compress_type=compress_type)
+    return stats
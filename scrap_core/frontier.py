@@ -0,0 +1,63 @@
+"""
+قائمة انتظار الكشط (frontier) بعمليات O(1) للإضافة والسحب وفحص العضوية
+تحتفظ بأقل عمق اكتُشف به كل رابط
+"""
+
+from collections import deque
+
+
+class Frontier:
+    """قائمة انتظار BFS مع فهرس عضوية وأقل عمق لكل رابط"""
+
+    def __init__(self, max_depth=None):
+        self.max_depth = max_depth
+        self._queue = deque()
+        # الروابط المنتظرة ← أقل عمق معروف
+        self._depth = {}
+        # كل رابط دخل القائمة يوماً (منتظر أو مكتمل)
+        self._seen = set()
+
+    def __len__(self):
+        return len(self._queue)
+
+    def __bool__(self):
+        return bool(self._queue)
+
+    def __contains__(self, url):
+        return url in self._seen
+
+    def mark_seen(self, urls):
+        """تسجيل روابط مكتملة سابقاً حتى لا تُضاف مرة أخرى"""
+        self._seen.update(urls)
+
+    def push(self, url, depth, anchor=None):
+        """إضافة رابط جديد، أو تخفيض عمقه إن كان منتظراً بعمق أكبر (نص الرابط لا يؤثر في BFS)"""
+        if self.max_depth is not None and depth >= self.max_depth:
+            return False
+        queued_depth = self._depth.get(url)
+        if queued_depth is not None:
+            if depth < queued_depth:
+                self._depth[url] = depth
+            return False
+        if url in self._seen:
+            return False
+        self._seen.add(url)
+        self._depth[url] = depth
+        self._queue.append(url)
+        return True
+
+    def push_front(self, items):
+        """إعادة أزواج (url, depth) لمقدمة القائمة بنفس ترتيبها (روابط مؤجلة سابقاً)"""
+        for url, depth in reversed(list(items)):
+            self._seen.add(url)
+            self._depth[url] = min(depth, self._depth.get(url, depth))
+            self._queue.appendleft(url)
+
+    def pop(self):
+        """سحب الرابط التالي مع أقل عمق له"""
+        url = self._queue.popleft()
+        return url, self._depth.pop(url)
+
+    def items(self):
+        """نسخة من الروابط المنتظرة بترتيبها (لنقاط الاستئناف)"""
+        return [(url, self._depth[url]) for url in self._queue]
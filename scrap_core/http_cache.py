@@ -0,0 +1,132 @@
+"""
+ذاكرة HTTP دائمة لإعادة التحقق (ETag / Last-Modified) بين الجلسات
+تُرسل If-None-Match و If-Modified-Since ويُعاد استخدام المحتوى المحفوظ عند 304
+تحفظ المحددات وبصمة المحتوى فقط: المحتوى نفسه في المخزن الخام (RawStore) بحده الأقصى وحذفه LRU
+"""
+
+import sqlite3
+import threading
+import time
+
+from .canonical import canonicalize
+
+
+def cache_key(url):
+    """مفتاح الذاكرة = الرابط الموحد (نفس قواعد قائمة الانتظار الافتراضية)"""
+    return canonicalize(url)
+
+
+class CachedResponse:
+    """استجابة محفوظة مع محددات إعادة التحقق"""
+
+    def __init__(self, url, etag, last_modified, body, fetched_at):
+        self.url = url
+        self.etag = etag
+        self.last_modified = last_modified
+        self.body = body
+        self.fetched_at = fetched_at
+
+    def conditional_headers(self):
+        """ترويسات الطلب الشرطي"""
+        headers = {}
+        if self.etag:
+            headers["If-None-Match"] = self.etag
+        if self.last_modified:
+            headers["If-Modified-Since"] = self.last_modified
+        return headers
+
+
+class HttpCache:
+    """ذاكرة استجابات على القرص (SQLite) مفهرسة بالرابط الموحد"""
+
+    def __init__(self, path, bodies, key=cache_key):
+        """
+        bodies: المخزن الخام (RawStore) الذي يُقرأ منه المحتوى ببصمته
+        key: دالة توحيد الروابط (مثل UrlCanonicalizer.canonicalize بقواعد الموقع)
+        """
+        self.path = path
+        self.bodies = bodies
+        self.key = key
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        legacy = self._db.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'responses'"
+        ).fetchone()
+        self._db.execute(
+            """CREATE TABLE IF NOT EXISTS validators (
+                url TEXT PRIMARY KEY,
+                etag TEXT,
+                last_modified TEXT,
+                digest TEXT,
+                fetched_at REAL,
+                validated_at REAL
+            )"""
+        )
+        self._db.commit()
+        if legacy:
+            # الجدول القديم كان يحفظ نسخة مضغوطة ثانية من كل صفحة بلا حد
+            self._db.execute("DROP TABLE responses")
+            self._db.commit()
+            self._db.execute("VACUUM")
+        self.stats = {"revalidated": 0, "downloaded": 0, "stored": 0, "bytes_saved": 0}
+
+    def lookup(self, url):
+        """البحث عن استجابة محفوظة للرابط"""
+        with self._lock:
+            row = self._db.execute(
+                "SELECT etag, last_modified, digest, fetched_at FROM validators WHERE url = ?",
+                (self.key(url),)
+            ).fetchone()
+        if not row:
+            return None
+        etag, last_modified, digest, fetched_at = row
+        # محتوى حُذف من المخزن الخام (LRU): لا طلب شرطي لأن 304 لن يجد ما يُعاد استخدامه
+        body = self.bodies.get(digest)
+        if body is None:
+            return None
+        return CachedResponse(url, etag, last_modified, body, fetched_at)
+
+    def store(self, url, response, digest):
+        """حفظ محددات استجابة 200 مع بصمة محتواها في المخزن الخام (إذا كانت تحمل محددات إعادة تحقق)"""
+        etag = response.headers.get("ETag")
+        last_modified = response.headers.get("Last-Modified")
+        if not digest or (not etag and not last_modified):
+            with self._lock:
+                self.stats["downloaded"] += 1
+            return False
+
+        now = time.time()
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO validators VALUES (?, ?, ?, ?, ?, ?)",
+                (self.key(url), etag, last_modified, digest, now, now)
+            )
+            self._db.commit()
+            self.stats["downloaded"] += 1
+            self.stats["stored"] += 1
+        return True
+
+    def revalidated(self, cached, response):
+        """تسجيل استجابة 304 وتحديث المحددات إن أرسل الخادم قيماً جديدة"""
+        etag = response.headers.get("ETag") or cached.etag
+        last_modified = response.headers.get("Last-Modified") or cached.last_modified
+        with self._lock:
+            self._db.execute(
+                "UPDATE validators SET etag = ?, last_modified = ?, validated_at = ? WHERE url = ?",
+                (etag, last_modified, time.time(), self.key(cached.url))
+            )
+            self._db.commit()
+            self.stats["revalidated"] += 1
+            self.stats["bytes_saved"] += len(cached.body.encode("utf-8"))
+        return cached.body
+
+    def summary(self):
+        """ملخص نصي لإحصائيات الذاكرة"""
+        total = self.stats["revalidated"] + self.stats["downloaded"]
+        ratio = (self.stats["revalidated"] / total * 100) if total else 0
+        return (f"{self.stats['revalidated']} إعادة تحقق (304) من {total} "
+                f"({ratio:.0f}%)، توفير {self.stats['bytes_saved'] / 1024:.1f} KB")
+
+    def close(self):
+        with self._lock:
+            self._db.close()
@@ -0,0 +1,141 @@
+"""
+سجل ما حُفظ لكل رابط بين الجلسات (lastmod، الملفات، مجلد الجلسة)
+يسمح بالكشط التزايدي: جلب الصفحات الجديدة أو المعدلة فقط ونقل الباقي من الجلسة السابقة
+"""
+
+import gzip
+import json
+import os
+import shutil
+import time
+
+from .sitemap import parse_lastmod
+
+
+class SiteManifest:
+    """آخر نسخة محفوظة من كل صفحة في موقع واحد"""
+
+    def __init__(self, path):
+        self.path = path
+        self.pages = {}
+        # (المجلد، اسم الملف) ← الرابط الذي يملكه
+        self._owners = {}
+        self.stats = {"fetched": 0, "unchanged_lastmod": 0, "unchanged_304": 0}
+
+    def load(self):
+        """قراءة السجل (سجل فارغ إذا لم يوجد أو كان تالفاً)"""
+        try:
+            with gzip.open(self.path, "rt", encoding="utf-8") as f:
+                self.pages = json.load(f)
+        except (OSError, ValueError):
+            self.pages = {}
+        self._index()
+        return self
+
+    def _index(self):
+        """
+        فهرس مالكي الملفات؛ الملف المسجل لأكثر من رابط في نفس المجلد كُتب فوقه،
+        فلا يُعتمد لأي منها (سجلات قديمة كانت تحفظ كل الصفحات باسم واحد)
+        """
+        claims = {}
+        for url, entry in self.pages.items():
+            for key in self._keys(entry):
+                claims.setdefault(key, []).append(url)
+        shared = {url for urls in claims.values() if len(urls) > 1 for url in urls}
+        for url in shared:
+            del self.pages[url]
+        self._owners = {key: urls[0] for key, urls in claims.items() if len(urls) == 1}
+
+    @staticmethod
+    def _keys(entry):
+        folder = os.path.abspath(entry["session_folder"])
+        return [(folder, name) for name in entry["files"]]
+
+    def save(self):
+        """كتابة ذرية كما في نقاط الاستئناف"""
+        tmp_path = self.path + ".tmp"
+        with gzip.open(tmp_path, "wt", encoding="utf-8") as f:
+            json.dump(self.pages, f, ensure_ascii=False, separators=(",", ":"))
+        os.replace(tmp_path, self.path)
+
+    def record(self, url, session_folder, files, lastmod=None):
+        """تسجيل ملفات صفحة جُلبت وحُفظت في مجلد الجلسة (مسارات نسبية)"""
+        self._set(url, session_folder, files, lastmod)
+        self.stats["fetched"] += 1
+
+    def _set(self, url, session_folder, files, lastmod):
+        old = self.pages.get(url)
+        if old:
+            for key in self._keys(old):
+                if self._owners.get(key) == url:
+                    del self._owners[key]
+        entry = self.pages[url] = {
+            "session_folder": session_folder,
+            "files": list(files),
+            "lastmod": lastmod,
+            "saved_at": time.time(),
+        }
+        for key in self._keys(entry):
+            # رابط آخر كان يملك نفس الملف: كُتب فوق ملفه فلم يعد محفوظاً
+            previous = self._owners.get(key)
+            if previous and previous != url:
+                self.pages.pop(previous, None)
+            self._owners[key] = url
+
+    def session_files(self, session_folder):
+        """{رابط: ملفاته} للصفحات المحفوظة أو المنقولة إلى مجلد الجلسة (بدون الفاشلة والمتخطاة)"""
+        folder = os.path.abspath(session_folder)
+        return {
+            url: entry["files"] for url, entry in self.pages.items()
+            if os.path.abspath(entry["session_folder"]) == folder
+        }
+
+    def _files_exist(self, entry):
+        return bool(entry["files"]) and all(
+            os.path.exists(os.path.join(entry["session_folder"], name)) for name in entry["files"]
+        )
+
+    def is_unchanged(self, url, lastmod):
+        """الصفحة لم تتغير حسب lastmod الخريطة وملفاتها السابقة ما زالت موجودة"""
+        entry = self.pages.get(url)
+        if not entry or not lastmod:
+            return False
+        new_time, old_time = parse_lastmod(lastmod), parse_lastmod(entry.get("lastmod"))
+        if new_time is None or old_time is None or new_time > old_time:
+            return False
+        return self._files_exist(entry)
+
+    def has_files(self, url):
+        entry = self.pages.get(url)
+        return bool(entry) and self._files_exist(entry)
+
+    def carry_forward(self, url, session_folder, reason, lastmod=None):
+        """
+        نقل ملفات صفحة غير متغيرة من مجلد جلستها السابقة إلى مجلد الجلسة الحالية
+        (رابط صلب إن أمكن وإلا نسخ) وتحديث السجل؛ reason: "lastmod" أو "304"
+        يرجع None بدون نقل شيء إذا شغل ملف آخر مكان أحد الملفات: تُجلب الصفحة وتُحفظ من جديد
+        """
+        entry = self.pages[url]
+        if os.path.abspath(entry["session_folder"]) != os.path.abspath(session_folder):
+            pending = []
+            for name in entry["files"]:
+                source = os.path.join(entry["session_folder"], name)
+                target = os.path.join(session_folder, name)
+                if not os.path.exists(target):
+                    pending.append((source, target))
+                elif not os.path.samefile(source, target):
+                    return None
+            for source, target in pending:
+                os.makedirs(os.path.dirname(target), exist_ok=True)
+                try:
+                    os.link(source, target)
+                except OSError:
+                    shutil.copy2(source, target)
+        self._set(url, session_folder, entry["files"], lastmod or entry.get("lastmod"))
+        self.stats[f"unchanged_{reason}"] += 1
+        return entry["files"]
+
+    def summary(self):
+        carried = self.stats["unchanged_lastmod"] + self.stats["unchanged_304"]
+        return (f"{self.stats['fetched']} صفحة جديدة/معدلة، {carried} غير متغيرة نُقلت من الجلسة السابقة "
+                f"({self.stats['unchanged_lastmod']} حسب lastmod، {self.stats['unchanged_304']} حسب 304)")
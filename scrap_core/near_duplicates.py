@@ -0,0 +1,118 @@
+"""
+كشف الصفحات شبه المكررة (صفحات الترقيم، نسخ الطباعة، روابط التتبع) قبل مرحلة التصدير المكلفة
+بصمة SimHash (64 بت) من كلمات النص المنظف، وفهرس مسافة Hamming بتقسيم البصمة إلى شرائح:
+بصمتان على مسافة ≤ k تتطابقان حتماً في شريحة واحدة على الأقل من k+1 شرائح، فالبحث بقواميس لا بمقارنة الكل
+"""
+
+import hashlib
+import re
+import threading
+from collections import Counter
+
+FINGERPRINT_BITS = 64
+
+# أقصى عدد بتات مختلفة لاعتبار صفحتين شبه مكررتين (تعديل 1-3% من الكلمات يغير 1-7 بتات غالباً،
+# والنصوص غير المرتبطة تختلف في ~32 بتاً)
+MAX_DISTANCE = 6
+
+# طول المقاطع (كلمات متتالية)، وأقل عدد كلمات لحساب بصمة موثوقة
+SHINGLE_WORDS = 3
+MIN_WORDS = 50
+
+WORDS = re.compile(r"\w+")
+
+# مواقع البتات المضاءة في كل بايت (لجمع أوزان البصمة بدون فحص 64 بتاً لكل مقطع)
+BYTE_BITS = [[bit for bit in range(8) if value >> bit & 1] for value in range(256)]
+
+
+def simhash(text):
+    """بصمة SimHash للنص، أو None إذا كان أقصر من MIN_WORDS كلمة"""
+    words = WORDS.findall(text.lower())
+    if len(words) < MIN_WORDS:
+        return None
+    shingles = Counter(" ".join(words[i:i + SHINGLE_WORDS]) for i in range(len(words) - SHINGLE_WORDS + 1))
+    # set_weight[bit] = مجموع أوزان المقاطع التي بتها مضاء
+    set_weight = [0] * FINGERPRINT_BITS
+    for shingle, weight in shingles.items():
+        digest = hashlib.blake2b(shingle.encode("utf-8"), digest_size=8).digest()
+        for index, value in enumerate(digest):
+            offset = index * 8
+            for bit in BYTE_BITS[value]:
+                set_weight[offset + bit] += weight
+    half = sum(shingles.values()) / 2
+    fingerprint = 0
+    for bit, weight in enumerate(set_weight):
+        if weight > half:
+            fingerprint |= 1 << bit
+    return fingerprint
+
+
+def hamming(a, b):
+    return bin(a ^ b).count("1")
+
+
+class NearDuplicateIndex:
+    """
+    بصمات الصفحات المصدّرة في الجلسة؛ check ترجع الصفحة الأصلية لصفحة شبه مكررة (أو None وتُضاف الصفحة للفهرس)
+    يقدّر التوفير من متوسط زمن وحجم تصدير الصفحات الفعلية
+    """
+
+    def __init__(self, max_distance=MAX_DISTANCE):
+        self.max_distance = max_distance
+        bands = max_distance + 1
+        width = FINGERPRINT_BITS // bands
+        self._bands = [
+            (index * width, (FINGERPRINT_BITS if index == bands - 1 else (index + 1) * width) - index * width)
+            for index in range(bands)
+        ]
+        self._tables = [{} for _ in self._bands]
+        self._lock = threading.Lock()
+        self.canonical = {}
+        self._exports = 0
+        self._export_seconds = 0.0
+        self._export_bytes = 0
+        self.stats = {"indexed": 0, "near_duplicates": 0, "too_short": 0,
+                      "export_seconds_saved": 0.0, "bytes_saved": 0}
+
+    def _keys(self, fingerprint):
+        return [(fingerprint >> start) & ((1 << width) - 1) for start, width in self._bands]
+
+    def _find(self, fingerprint):
+        best = None
+        for table, key in zip(self._tables, self._keys(fingerprint)):
+            for other, url in table.get(key, ()):
+                distance = hamming(fingerprint, other)
+                if distance <= self.max_distance and (best is None or distance < best[1]):
+                    best = (url, distance)
+        return best
+
+    def check(self, url, text):
+        """الصفحة الأصلية التي تكاد تطابقها url، أو None (وتُسجل url كأصل لما بعدها)"""
+        fingerprint = simhash(text)
+        with self._lock:
+            if fingerprint is None:
+                self.stats["too_short"] += 1
+                return None
+            match = self._find(fingerprint)
+            if match:
+                self.canonical[url] = match[0]
+                self.stats["near_duplicates"] += 1
+                if self._exports:
+                    self.stats["export_seconds_saved"] += self._export_seconds / self._exports
+                    self.stats["bytes_saved"] += self._export_bytes // self._exports
+                return match[0]
+            for table, key in zip(self._tables, self._keys(fingerprint)):
+                table.setdefault(key, []).append((fingerprint, url))
+            self.stats["indexed"] += 1
+            return None
+
+    def note_export(self, seconds, size):
+        """زمن وحجم تصدير صفحة فعلية (لتقدير التوفير)"""
+        with self._lock:
+            self._exports += 1
+            self._export_seconds += seconds
+            self._export_bytes += size
+
+    def summary(self):
+        return (f"{self.stats['near_duplicates']} صفحة شبه مكررة لم تُصدّر "
+                f"(توفير ~{self.stats['export_seconds_saved']:.1f} ث و {self.stats['bytes_saved'] / 1024:.0f} KB)")
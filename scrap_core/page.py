@@ -0,0 +1,51 @@
+"""
+تحليل صفحة HTML مرة واحدة ومشاركة الشجرة بين استخراج الروابط والتنظيف وكل المصدّرات
+(كان كل من استخراج الروابط و Markdown و PDF يحلل الصفحة وحده، والتنظيف يتكرر لكل تنسيق)
+"""
+
+from .content_score import best_content
+from .parsers import default_backend
+
+
+class ParsedPage:
+    """
+    صفحة واحدة: تُحلل عند أول طلب للشجرة وتُنظف مرة واحدة
+    الروابط تُقرأ قبل التنظيف لأن التنظيف يحذف عناصر من نفس الشجرة (القوائم، التذييل...)
+    """
+
+    def __init__(self, url, html, backend=None):
+        self.url = url
+        self.html = html
+        self.backend = backend or default_backend
+        self._soup = None
+        self._cleaned = None
+        self._cleaned_html = None
+
+    @property
+    def soup(self):
+        if self._soup is None:
+            self._soup = self.backend.make_soup(self.html)
+        return self._soup
+
+    @property
+    def is_cleaned(self):
+        return self._cleaned is not None
+
+    def cleaned(self, clean=None):
+        """
+        المحتوى بعد التنظيف clean(soup, url) - يُنفذ مرة واحدة ويُعاد نفس العنصر لكل المصدّرات
+        بدون clean تُعاد الشجرة كما هي
+        """
+        if self._cleaned is None:
+            self._cleaned = clean(self.soup, self.url) if clean else self.soup
+        return self._cleaned
+
+    def main_text_chars(self):
+        """طول نص المحتوى الرئيسي في الشجرة قبل التنظيف (للمقارنة بالبيانات المضمّنة)"""
+        return len(best_content(self.soup).get_text(" ", strip=True))
+
+    def cleaned_html(self, clean=None):
+        """HTML المحتوى المنظف كنص (يُحسب مرة واحدة لـ html2text و WeasyPrint)"""
+        if self._cleaned_html is None:
+            self._cleaned_html = str(self.cleaned(clean))
+        return self._cleaned_html
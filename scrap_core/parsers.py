@@ -0,0 +1,128 @@
+"""
+محللات HTML قابلة للاختيار مع رجوع تلقائي
+- BeautifulSoup يستخدم lxml (مكتوب بـ C) إن كان مثبتاً بدل html.parser البطيء
+- selectolax (محرك lexbor) مسار سريع لاستخراج الروابط والبحث عن المحتوى الرئيسي بدون بناء شجرة BeautifulSoup
+"""
+
+from bs4 import BeautifulSoup
+
+try:
+    import lxml  # noqa: F401
+    LXML_AVAILABLE = True
+except ImportError:
+    LXML_AVAILABLE = False
+
+try:
+    from selectolax.lexbor import LexborHTMLParser as FastHTMLParser
+except ImportError:
+    try:
+        from selectolax.parser import HTMLParser as FastHTMLParser
+    except ImportError:
+        FastHTMLParser = None
+
+SELECTOLAX_AVAILABLE = FastHTMLParser is not None
+
+# الخيارات المعروضة في الواجهة
+PARSER_CHOICES = {
+    "auto": "⚡ تلقائي (الأسرع المتاح)",
+    "lxml": "lxml",
+    "html.parser": "html.parser (بايثون فقط)",
+}
+
+# وسوم لا تدخل في نص الصفحة
+NON_TEXT_TAGS = ["script", "style", "noscript", "template"]
+
+
+def scope_selectors(scope):
+    """محددات حاوية الروابط بالترتيب: المعرف، ثم class، ثم scope كمحدد CSS"""
+    escaped = scope.replace("\\", "\\\\").replace('"', '\\"')
+    return [f'[id="{escaped}"]', f'[class~="{escaped}"]', scope]
+
+
+class ParserBackend:
+    """المحلل المختار: اسم محلل BeautifulSoup، وهل يُستخدم مسار selectolax السريع"""
+
+    def __init__(self, preferred="auto"):
+        self.preferred = preferred if preferred in PARSER_CHOICES else "auto"
+        use_lxml = self.preferred in ("auto", "lxml") and LXML_AVAILABLE
+        self.soup_parser = "lxml" if use_lxml else "html.parser"
+        self.fast = self.preferred == "auto" and SELECTOLAX_AVAILABLE
+        self.stats = {"fallbacks": 0}
+
+    @property
+    def name(self):
+        return self.soup_parser + (" + selectolax" if self.fast else "")
+
+    def make_soup(self, html):
+        """شجرة BeautifulSoup بالمحلل المختار، ورجوع لـ html.parser إن فشل"""
+        if self.soup_parser != "html.parser":
+            try:
+                return BeautifulSoup(html, self.soup_parser)
+            except Exception:
+                self.stats["fallbacks"] += 1
+        return BeautifulSoup(html, "html.parser")
+
+    def _fast_tree(self, html):
+        try:
+            return FastHTMLParser(html)
+        except Exception:
+            return None
+
+    def find_links(self, html, scope=None, selectors=None, on_scope=None):
+        """
+        أزواج (href، نص الرابط) بالمسار السريع بنفس ترتيب الظهور ونفس تنظيف النص في BeautifulSoup
+        scope: معرف أو class أو محدد CSS لحصر البحث (كما في extract_links)
+        selectors: محددات الحاوية بالترتيب بدل scope_selectors(scope) (مثل محدد محفوظ في ملف تعريف الموقع)
+        on_scope(selector): يُستدعى بالمحدد الذي وُجدت به الحاوية
+        ترجع [] إذا لم يوجد العنصر، و None إذا لم يتوفر المسار السريع (يُستخدم BeautifulSoup)
+        """
+        if not self.fast:
+            return None
+        tree = self._fast_tree(html)
+        if tree is None:
+            return None
+        area = tree.root
+        if scope or selectors:
+            area = self._find_scope(tree, selectors or scope_selectors(scope), on_scope)
+            if area is None:
+                return []
+        if area is None:
+            return []
+        return [
+            ((node.attributes.get("href") or "").strip(), node.text(separator=" ", strip=True))
+            for node in area.css("a[href]")
+        ]
+
+    @staticmethod
+    def _find_scope(tree, selectors, on_scope=None):
+        """أول عنصر يطابق أحد المحددات بالترتيب"""
+        for selector in selectors:
+            try:
+                node = tree.css_first(selector)
+            except Exception:
+                continue
+            if node is not None:
+                if on_scope:
+                    on_scope(selector)
+                return node
+        return None
+
+    def main_text_length(self, html, selectors):
+        """طول نص أول حاوية موجودة من selectors (أو body) بعد حذف السكربتات، أو None بدون المسار السريع"""
+        if not self.fast:
+            return None
+        tree = self._fast_tree(html)
+        if tree is None:
+            return None
+        tree.strip_tags(NON_TEXT_TAGS)
+        container = None
+        for selector in selectors:
+            container = tree.css_first(selector)
+            if container is not None:
+                break
+        container = container or tree.body or tree.root
+        return len(container.text(separator=" ", strip=True)) if container is not None else 0
+
+
+# المحلل الافتراضي لمن لا يمرر محللاً
+default_backend = ParserBackend()
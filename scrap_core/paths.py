@@ -0,0 +1,23 @@
+"""
+مسارات التخزين الدائم المشتركة (الذاكرة المؤقتة، نقاط الاستئناف...)
+تُحفظ داخل مجلد الحفظ الرئيسي حتى تبقى بين الجلسات
+"""
+
+import os
+
+# مجلد مخفي داخل مجلد الحفظ الرئيسي
+CACHE_DIR_NAME = ".scrap_cache"
+
+
+def cache_path(root, *parts):
+    """إرجاع مسار داخل مجلد الذاكرة الدائمة مع إنشاء المجلدات اللازمة"""
+    path = os.path.join(root, CACHE_DIR_NAME, *parts)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    return path
+
+
+def cache_dir(root, *parts):
+    """إرجاع مجلد داخل مجلد الذاكرة الدائمة بعد إنشائه"""
+    path = os.path.join(root, CACHE_DIR_NAME, *parts)
+    os.makedirs(path, exist_ok=True)
+    return path
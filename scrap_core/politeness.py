@@ -0,0 +1,220 @@
+"""
+جدولة مهذبة لكل مضيف (host) بدلاً من التأخير الثابت
+كل مضيف له دلو رموز (token bucket) يتكيف معدله مع زمن الاستجابة ونسبة الأخطاء
+ورموز 429/503 وترويسة Retry-After
+"""
+
+import asyncio
+import threading
+import time
+from email.utils import parsedate_to_datetime
+from urllib.parse import urlparse
+
+# حدود المعدل (طلب في الثانية)
+DEFAULT_RATE = 1.0
+MIN_RATE = 0.1
+MAX_RATE = 10.0
+
+# سعة الدلو (أقصى دفعة متتالية)
+BURST = 2.0
+
+# زمن الاستجابة المستهدف: أسرع منه نزيد المعدل، أبطأ من ضعفه نخفضه
+TARGET_LATENCY = 1.0
+
+# الزيادة الجمعية عند النجاح والتخفيض الضربي عند الخطأ
+RATE_INCREASE = 0.25
+ERROR_FACTOR = 0.7
+THROTTLE_FACTOR = 0.5
+SLOW_FACTOR = 0.85
+
+# وزن المتوسط المتحرك الأُسّي لزمن الاستجابة ونسبة الأخطاء
+EWMA_ALPHA = 0.3
+
+# التراجع عند 429/503 بدون Retry-After
+BASE_BACKOFF = 2.0
+MAX_BACKOFF = 300.0
+
+THROTTLE_STATUSES = (429, 503)
+
+
+def parse_retry_after(value):
+    """تحويل ترويسة Retry-After (ثوانٍ أو تاريخ HTTP) إلى عدد ثوانٍ"""
+    if not value:
+        return None
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    return max(0.0, retry_at.timestamp() - time.time())
+
+
+class HostState:
+    """حالة مضيف واحد: الدلو والمعدل والتراجع"""
+
+    def __init__(self, rate=DEFAULT_RATE, max_rate=MAX_RATE):
+        self.rate = rate
+        # سقف خاص بالمضيف (مثل Crawl-delay في robots.txt) وسعة دلوه
+        self.max_rate = max_rate
+        self.burst = BURST
+        self.tokens = BURST
+        self.last_refill = time.monotonic()
+        self.backoff_until = 0.0
+        self.throttle_streak = 0
+        self.latency = None
+        self.error_rate = 0.0
+        self.requests = 0
+        self.throttled = 0
+        self.errors = 0
+
+    def refill(self, now):
+        self.tokens = min(self.burst, self.tokens + (now - self.last_refill) * self.rate)
+        self.last_refill = now
+
+    def wait_time(self, now):
+        """المدة اللازمة قبل السماح بطلب جديد (صفر = مسموح الآن)"""
+        if now < self.backoff_until:
+            return self.backoff_until - now
+        self.refill(now)
+        if self.tokens >= 1:
+            return 0.0
+        return (1 - self.tokens) / self.rate
+
+
+class HostScheduler:
+    """مجدول مهذب يتكيف مع كل مضيف على حدة"""
+
+    def __init__(self, initial_rate=DEFAULT_RATE, min_rate=MIN_RATE, max_rate=MAX_RATE):
+        self.initial_rate = initial_rate
+        self.min_rate = min_rate
+        self.max_rate = max_rate
+        self.hosts = {}
+        self._lock = threading.Lock()
+
+    def _host(self, host):
+        state = self.hosts.get(host)
+        if state is None:
+            state = self.hosts[host] = HostState(self.initial_rate, self.max_rate)
+        return state
+
+    def set_crawl_delay(self, host, delay):
+        """احترام Crawl-delay: طلب واحد كل delay ثانية على الأكثر وبدون دفعات"""
+        if not delay or delay <= 0:
+            return
+        with self._lock:
+            state = self._host(host)
+            state.max_rate = min(self.max_rate, 1.0 / delay)
+            state.rate = min(state.rate, state.max_rate)
+            state.burst = 1.0
+            state.tokens = min(state.tokens, 1.0)
+
+    def _take(self, host):
+        """استهلاك رمز إن أمكن (صفر)، وإلا المدة اللازمة قبل المحاولة مرة أخرى"""
+        with self._lock:
+            state = self._host(host)
+            delay = state.wait_time(time.monotonic())
+            if delay <= 0:
+                state.tokens -= 1
+                state.requests += 1
+            return delay
+
+    async def acquire(self, host):
+        """انتظار دور المضيف ثم استهلاك رمز"""
+        while True:
+            delay = self._take(host)
+            if delay <= 0:
+                return
+            await asyncio.sleep(delay)
+
+    def wait(self, host):
+        """مثل acquire لطلبات إضافية من خيوط الجلب نفسها (مثل اكتشاف واجهات API)"""
+        while True:
+            delay = self._take(host)
+            if delay <= 0:
+                return
+            time.sleep(delay)
+
+    def observe_response(self, response, *args, **kwargs):
+        """تحديث حالة المضيف حسب رمز الاستجابة وزمنها"""
+        host = urlparse(response.url).netloc
+        status = response.status_code
+        latency = response.elapsed.total_seconds()
+
+        with self._lock:
+            state = self._host(host)
+            self._update_latency(state, latency)
+
+            if status in THROTTLE_STATUSES:
+                self._throttle(state, response.headers.get("Retry-After"))
+            elif status >= 500:
+                self._error(state)
+            else:
+                self._success(state)
+        return response
+
+    def record_error(self, host):
+        """تسجيل خطأ شبكة (مهلة، انقطاع اتصال)"""
+        with self._lock:
+            self._error(self._host(host))
+
+    def _update_latency(self, state, latency):
+        if state.latency is None:
+            state.latency = latency
+        else:
+            state.latency += EWMA_ALPHA * (latency - state.latency)
+
+    def _success(self, state):
+        state.throttle_streak = 0
+        state.error_rate *= (1 - EWMA_ALPHA)
+        if state.latency is not None and state.latency > 2 * TARGET_LATENCY:
+            state.rate = max(min(self.min_rate, state.max_rate), state.rate * SLOW_FACTOR)
+        elif state.latency is None or state.latency < TARGET_LATENCY:
+            state.rate = min(state.max_rate, state.rate + RATE_INCREASE)
+
+    def _error(self, state):
+        state.errors += 1
+        state.error_rate += EWMA_ALPHA * (1 - state.error_rate)
+        state.rate = max(min(self.min_rate, state.max_rate), state.rate * ERROR_FACTOR)
+
+    def _throttle(self, state, retry_after):
+        state.throttled += 1
+        state.throttle_streak += 1
+        state.error_rate += EWMA_ALPHA * (1 - state.error_rate)
+        state.rate = max(min(self.min_rate, state.max_rate), state.rate * THROTTLE_FACTOR)
+
+        delay = parse_retry_after(retry_after)
+        if delay is None:
+            delay = BASE_BACKOFF * (2 ** (state.throttle_streak - 1))
+        delay = min(delay, MAX_BACKOFF)
+
+        state.backoff_until = max(state.backoff_until, time.monotonic() + delay)
+        state.tokens = 0
+
+    def snapshot(self):
+        """ملخص حالة كل مضيف للعرض في قسم الإحصائيات"""
+        now = time.monotonic()
+        with self._lock:
+            return {
+                host: {
+                    "rate": round(state.rate, 2),
+                    "backoff": round(max(0.0, state.backoff_until - now), 1),
+                    "latency": round(state.latency, 2) if state.latency is not None else None,
+                    "error_rate": round(state.error_rate, 2),
+                    "requests": state.requests,
+                    "throttled": state.throttled,
+                    "errors": state.errors,
+                }
+                for host, state in self.hosts.items()
+            }
+
+    def describe(self):
+        """نص مختصر لحالة المضيفين"""
+        parts = []
+        for host, info in self.snapshot().items():
+            text = f"🚦 {host}: {info['rate']} طلب/ث"
+            if info["backoff"] > 0:
+                text += f" | ⏳ تراجع {info['backoff']} ث"
+            parts.append(text)
+        return "   ".join(parts)
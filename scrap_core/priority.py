@@ -0,0 +1,166 @@
+"""
+قائمة انتظار أفضل-أولاً (best-first) مع دوال تقييم قابلة للتوصيل
+تُسحب الروابط الأعلى قيمة أولاً حتى تُصرف ميزانية الصفحات أو الوقت على صفحات المحتوى
+"""
+
+import heapq
+import itertools
+import math
+import re
+
+# أقصى عدد نصوص روابط تُحفظ لكل رابط منتظر
+MAX_ANCHORS = 5
+
+# أنماط صفحات التنقل والوسوم والترقيم (تُخفض أولويتها افتراضياً)
+NAVIGATION_PATTERNS = [
+    r"[?&](page|p|offset|sort|order)=",
+    r"/page/\d+",
+    r"/tags?/",
+    r"/categor(y|ies)/",
+    r"/(login|signin|signup|register|search|account|cart)\b",
+]
+
+# نصوص روابط التنقل الشائعة
+NAVIGATION_ANCHORS = {
+    "next", "previous", "prev", "more", "older", "newer", "home", "menu", "login",
+    "التالي", "السابق", "المزيد", "الرئيسية", "دخول",
+}
+
+
+class LinkInfo:
+    """ما نعرفه عن رابط منتظر: أقل عمق، نصوص الروابط، وعدد الصفحات التي تشير إليه"""
+
+    __slots__ = ("depth", "anchors", "inlinks", "seq")
+
+    def __init__(self, depth):
+        self.depth = depth
+        self.anchors = []
+        self.inlinks = 0
+        self.seq = None
+
+
+def depth_scorer(weight=1.0):
+    """الأقل عمقاً أولاً"""
+    def score(url, info):
+        return -weight * info.depth
+    return score
+
+
+def pattern_scorer(patterns, weight=1.0):
+    """
+    patterns: قائمة (نمط regex، قيمة) تُضاف قيمتها إذا طابق الرابط النمط
+    """
+    compiled = [(re.compile(pattern, re.IGNORECASE), value) for pattern, value in patterns]
+
+    def score(url, info):
+        return weight * sum(value for regex, value in compiled if regex.search(url))
+    return score
+
+
+def anchor_text_scorer(keywords=(), weight=1.0):
+    """نص الرابط: الكلمات المفتاحية ترفع الأولوية، والنصوص الوصفية الطويلة أفضل من روابط التنقل"""
+    keywords = [keyword.lower() for keyword in keywords if keyword]
+
+    def score(url, info):
+        best = 0.0
+        for anchor in info.anchors:
+            text = anchor.lower().strip()
+            if not text or text in NAVIGATION_ANCHORS or text.isdigit():
+                value = -1.0
+            else:
+                value = min(len(text.split()), 8) / 8
+                value += sum(2.0 for keyword in keywords if keyword in text)
+            best = max(best, value)
+        return weight * best
+    return score
+
+
+def inlink_scorer(weight=1.0):
+    """الصفحات التي تشير إليها صفحات كثيرة أهم (بمقياس لوغاريتمي)"""
+    def score(url, info):
+        return weight * math.log1p(info.inlinks)
+    return score
+
+
+def default_scorers(priority_patterns=(), keywords=()):
+    """التركيبة الافتراضية: العمق + الأنماط + نص الرابط + الروابط الواردة"""
+    patterns = [(pattern, -3.0) for pattern in NAVIGATION_PATTERNS]
+    patterns += [(pattern, 5.0) for pattern in priority_patterns if pattern]
+    return [
+        depth_scorer(1.0),
+        pattern_scorer(patterns),
+        anchor_text_scorer(keywords),
+        inlink_scorer(1.0),
+    ]
+
+
+class PriorityFrontier:
+    """قائمة انتظار أفضل-أولاً بنفس واجهة Frontier (كومة مع حذف كسول للمدخلات القديمة)"""
+
+    def __init__(self, max_depth=None, scorers=None):
+        self.max_depth = max_depth
+        self.scorers = scorers if scorers is not None else default_scorers()
+        self._heap = []
+        self._info = {}
+        self._seen = set()
+        self._counter = itertools.count()
+
+    def __len__(self):
+        return len(self._info)
+
+    def __bool__(self):
+        return bool(self._info)
+
+    def __contains__(self, url):
+        return url in self._seen
+
+    def mark_seen(self, urls):
+        self._seen.update(urls)
+
+    def score(self, url, info):
+        return sum(scorer(url, info) for scorer in self.scorers)
+
+    def _schedule(self, url, info, priority):
+        info.seq = next(self._counter)
+        heapq.heappush(self._heap, (-priority, info.seq, url))
+
+    def push(self, url, depth, anchor=None):
+        """إضافة رابط أو تحديث أولويته عند اكتشافه من صفحة أخرى"""
+        if self.max_depth is not None and depth >= self.max_depth:
+            return False
+        info = self._info.get(url)
+        is_new = info is None
+        if is_new:
+            if url in self._seen:
+                return False
+            self._seen.add(url)
+            info = self._info[url] = LinkInfo(depth)
+        info.depth = min(info.depth, depth)
+        info.inlinks += 1
+        if anchor and len(info.anchors) < MAX_ANCHORS:
+            info.anchors.append(anchor)
+        self._schedule(url, info, self.score(url, info))
+        return is_new
+
+    def push_front(self, items):
+        """إعادة روابط مؤجلة بأعلى أولوية وبنفس ترتيبها"""
+        for url, depth in items:
+            self._seen.add(url)
+            info = self._info.setdefault(url, LinkInfo(depth))
+            self._schedule(url, info, math.inf)
+
+    def pop(self):
+        """سحب الرابط الأعلى أولوية (تُتجاهل المدخلات التي تجاوزها تحديث أحدث)"""
+        while self._heap:
+            _, seq, url = heapq.heappop(self._heap)
+            info = self._info.get(url)
+            if info is not None and info.seq == seq:
+                del self._info[url]
+                return url, info.depth
+        raise IndexError("pop from an empty frontier")
+
+    def items(self):
+        """الروابط المنتظرة مرتبة حسب الأولوية (لنقاط الاستئناف)"""
+        live = sorted(entry for entry in self._heap
+                      if entry[2] in self._info and self._info[entry[2]].seq == entry[1])
+        return [(url, self._info[url].depth) for _, _, url in live]
@@ -0,0 +1,172 @@
+"""
+مخزن دائم لمحتوى HTML الخام مفهرس ببصمة المحتوى (SHA-256)
+كل محتوى يُحفظ مرة واحدة مضغوطاً (zstd إن توفرت المكتبة وإلا gzip)
+مع حد أقصى للحجم وحذف الأقدم استخداماً (LRU)
+يُقرأ منه عند "إعادة التصدير بدون جلب": تحليل وتصدير الصفحات المحفوظة بإعدادات التنظيف والتصدير الحالية
+"""
+
+import gzip
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+# الحد الافتراضي لحجم المخزن (ميجابايت) ويمكن تغييره بمتغير البيئة
+DEFAULT_MAX_MB = int(os.environ.get("SCRAP_RAW_STORE_MB", 200))
+
+# عند تجاوز الحد نحذف حتى نصل لهذه النسبة منه لتجنب الحذف مع كل إضافة
+EVICT_TARGET = 0.9
+
+ZSTD_LEVEL = 9
+GZIP_LEVEL = 6
+
+
+def content_hash(text):
+    """بصمة المحتوى"""
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+class RawStore:
+    """مخزن HTML خام مضغوط بعنونة المحتوى وحذف LRU"""
+
+    def __init__(self, root, max_bytes=DEFAULT_MAX_MB * 1024 * 1024):
+        self.root = root
+        self.max_bytes = max_bytes
+        self.codec = "zst" if zstandard else "gz"
+        os.makedirs(os.path.join(root, "objects"), exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(os.path.join(root, "index.sqlite"), check_same_thread=False)
+        self._db.executescript(
+            """CREATE TABLE IF NOT EXISTS objects (
+                digest TEXT PRIMARY KEY,
+                codec TEXT,
+                size INTEGER,
+                last_access REAL
+            );
+            CREATE TABLE IF NOT EXISTS urls (
+                url TEXT PRIMARY KEY,
+                digest TEXT,
+                stored_at REAL
+            );
+            CREATE INDEX IF NOT EXISTS objects_lru ON objects (last_access);"""
+        )
+        self._db.commit()
+        self.total_bytes = self._db.execute("SELECT COALESCE(SUM(size), 0) FROM objects").fetchone()[0]
+        self.stats = {"stored": 0, "deduplicated": 0, "evicted": 0, "served": 0}
+
+    def _object_path(self, digest, codec):
+        return os.path.join(self.root, "objects", digest[:2], f"{digest}.html.{codec}")
+
+    def _compress(self, data):
+        if self.codec == "zst":
+            return zstandard.ZstdCompressor(level=ZSTD_LEVEL).compress(data)
+        return gzip.compress(data, compresslevel=GZIP_LEVEL)
+
+    @staticmethod
+    def _decompress(data, codec):
+        if codec == "zst":
+            if not zstandard:
+                raise RuntimeError("مكتبة zstandard غير مثبتة لقراءة هذا الملف")
+            return zstandard.ZstdDecompressor().decompress(data)
+        return gzip.decompress(data)
+
+    def put(self, url, text):
+        """حفظ محتوى الرابط (مرة واحدة لكل بصمة) وإرجاع البصمة"""
+        digest = content_hash(text)
+        now = time.time()
+        with self._lock:
+            row = self._db.execute("SELECT codec FROM objects WHERE digest = ?", (digest,)).fetchone()
+            if row:
+                self._db.execute("UPDATE objects SET last_access = ? WHERE digest = ?", (now, digest))
+                self.stats["deduplicated"] += 1
+            else:
+                data = self._compress(text.encode("utf-8"))
+                path = self._object_path(digest, self.codec)
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                with open(path, "wb") as f:
+                    f.write(data)
+                self._db.execute(
+                    "INSERT INTO objects VALUES (?, ?, ?, ?)",
+                    (digest, self.codec, len(data), now)
+                )
+                self.total_bytes += len(data)
+                self.stats["stored"] += 1
+
+            self._db.execute("INSERT OR REPLACE INTO urls VALUES (?, ?, ?)", (url, digest, now))
+            if self.total_bytes > self.max_bytes:
+                self._evict()
+            self._db.commit()
+        return digest
+
+    def get(self, digest):
+        """قراءة محتوى بالبصمة (None إذا حُذف أو غير موجود)"""
+        with self._lock:
+            row = self._db.execute("SELECT codec FROM objects WHERE digest = ?", (digest,)).fetchone()
+            if not row:
+                return None
+            self._db.execute("UPDATE objects SET last_access = ? WHERE digest = ?", (time.time(), digest))
+            self._db.commit()
+        codec = row[0]
+        try:
+            with open(self._object_path(digest, codec), "rb") as f:
+                return self._decompress(f.read(), codec).decode("utf-8")
+        except FileNotFoundError:
+            return None
+
+    def get_url(self, url):
+        """قراءة آخر محتوى محفوظ للرابط لإعادة التصدير بدون جلب"""
+        with self._lock:
+            row = self._db.execute("SELECT digest FROM urls WHERE url = ?", (url,)).fetchone()
+        text = self.get(row[0]) if row else None
+        if text is not None:
+            with self._lock:
+                self.stats["served"] += 1
+        return text
+
+    def iter_pages(self, limit=None):
+        """(الرابط، المحتوى) لكل صفحة محفوظة - للقياس وإعادة التصدير بدون تعديل ترتيب LRU"""
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT urls.url, objects.digest, objects.codec FROM urls JOIN objects USING (digest) LIMIT ?",
+                (limit if limit else -1,)
+            ).fetchall()
+        for url, digest, codec in rows:
+            try:
+                with open(self._object_path(digest, codec), "rb") as f:
+                    yield url, self._decompress(f.read(), codec).decode("utf-8")
+            except FileNotFoundError:
+                continue
+
+    def _evict(self):
+        """حذف الأقدم استخداماً حتى النزول تحت الحد (يُستدعى والقفل مأخوذ)"""
+        target = self.max_bytes * EVICT_TARGET
+        rows = self._db.execute("SELECT digest, codec, size FROM objects ORDER BY last_access").fetchall()
+        for digest, codec, size in rows:
+            if self.total_bytes <= target:
+                break
+            try:
+                os.remove(self._object_path(digest, codec))
+            except FileNotFoundError:
+                pass
+            self._db.execute("DELETE FROM objects WHERE digest = ?", (digest,))
+            self._db.execute("DELETE FROM urls WHERE digest = ?", (digest,))
+            self.total_bytes -= size
+            self.stats["evicted"] += 1
+
+    def summary(self):
+        """ملخص نصي لحالة المخزن"""
+        return (f"{self.stats['stored']} جديد، {self.stats['deduplicated']} مكرر، "
+                f"{self.stats['served']} أُعيد تصديره بدون جلب، "
+                f"{self.stats['evicted']} محذوف، الحجم {self.total_bytes / (1024 * 1024):.1f}/"
+                f"{self.max_bytes / (1024 * 1024):.0f} MB ({self.codec})")
+
+    def close(self):
+        with self._lock:
+            self._db.close()
@@ -0,0 +1,241 @@
+"""
+عرض صفحات JavaScript بمتصفح Chrome خفي كخطوة احتياطية
+يُستخدم فقط عندما يرجع الجلب العادي صفحة شبه فارغة (محتوى يُبنى في المتصفح)
+المتصفحات تُعاد استخدامها من مجموعة صغيرة، مع حظر الصور والخطوط والوسائط لتسريع التحميل
+"""
+
+import threading
+import time
+
+from .parsers import default_backend
+
+try:
+    from selenium import webdriver
+    from selenium.common.exceptions import WebDriverException, TimeoutException
+    from selenium.webdriver.chrome.service import Service
+    from selenium.webdriver.support.ui import WebDriverWait
+except ImportError:
+    webdriver = None
+
+try:
+    from webdriver_manager.chrome import ChromeDriverManager
+except ImportError:
+    ChromeDriverManager = None
+
+RENDERING_AVAILABLE = webdriver is not None
+
+# عدد المتصفحات في المجموعة (كل متصفح يستهلك مئات الميغابايتات)
+DEFAULT_POOL_SIZE = 2
+
+# أقل طول لنص المحتوى الرئيسي قبل اعتبار الصفحة مبنية بـ JavaScript
+MIN_TEXT_CHARS = 200
+
+# مهلة تحميل الصفحة في المتصفح (ثوانٍ)
+PAGE_TIMEOUT = 30
+
+# انتظار قصير بعد اكتمال التحميل حتى تصل طلبات XHR ويُبنى المحتوى
+SETTLE_DELAY = 0.5
+
+# أقصى انتظار لمتصفح متاح من المجموعة (ثوانٍ) قبل التخلي عن عرض الصفحة
+ACQUIRE_TIMEOUT = 2 * PAGE_TIMEOUT
+
+# الموارد المحظورة في المتصفح (لا تؤثر على نص الصفحة)
+BLOCKED_URL_PATTERNS = [
+    "*.png", "*.jpg", "*.jpeg", "*.gif", "*.webp", "*.avif", "*.svg", "*.ico", "*.bmp",
+    "*.woff", "*.woff2", "*.ttf", "*.otf", "*.eot",
+    "*.mp4", "*.webm", "*.m3u8", "*.mp3", "*.ogg", "*.wav", "*.m4a", "*.mov", "*.avi",
+]
+
+# حاويات المحتوى الرئيسي بترتيب الأفضلية
+MAIN_SELECTORS = ("main", "article", "[role=main]", "#content", "#root", "#app", "#__next")
+
+
+def needs_rendering(html, min_chars=MIN_TEXT_CHARS, backend=None):
+    """الصفحة تحتاج متصفحاً إذا كان نص محتواها الرئيسي (بدون السكربتات) أقصر من min_chars"""
+    backend = backend or default_backend
+    length = backend.main_text_length(html, MAIN_SELECTORS)
+    if length is not None:
+        return length < min_chars
+    soup = backend.make_soup(html)
+    for tag in soup(["script", "style", "noscript", "template"]):
+        tag.decompose()
+    container = None
+    for selector in MAIN_SELECTORS:
+        container = soup.select_one(selector)
+        if container:
+            break
+    container = container or soup.body or soup
+    return len(container.get_text(" ", strip=True)) < min_chars
+
+
+class BrowserPool:
+    """مجموعة متصفحات Chrome خفية تُنشأ عند الحاجة وتُعاد استخدامها بين الصفحات"""
+
+    def __init__(self, size=DEFAULT_POOL_SIZE, page_timeout=PAGE_TIMEOUT, settle=SETTLE_DELAY, user_agent=None,
+                 acquire_timeout=ACQUIRE_TIMEOUT):
+        if not RENDERING_AVAILABLE:
+            raise ImportError("selenium غير مثبت")
+        self.size = max(1, int(size))
+        self.page_timeout = page_timeout
+        self.settle = settle
+        self.user_agent = user_agent
+        self.acquire_timeout = acquire_timeout
+        # الشرط يحمي كل الحالة: المتصفحات الخاملة، والحية (مع التي قيد التشغيل)، والإغلاق
+        self._lock = threading.Condition()
+        self._idle = []
+        self._drivers = []
+        self._live = 0
+        # بصمة الكوكيز المضافة لكل متصفح (لا تُعاد إضافتها إن لم تتغير)
+        self._cookie_marks = {}
+        self._closed = False
+        self.stats = {"rendered": 0, "failed": 0, "browsers": 0}
+
+    def _launch(self):
+        options = webdriver.ChromeOptions()
+        for argument in ("--headless=new", "--disable-gpu", "--no-sandbox", "--disable-dev-shm-usage",
+                         "--mute-audio", "--blink-settings=imagesEnabled=false"):
+            options.add_argument(argument)
+        if self.user_agent:
+            options.add_argument(f"--user-agent={self.user_agent}")
+        options.add_experimental_option("prefs", {"profile.managed_default_content_settings.images": 2})
+
+        # webdriver-manager إن وُجد، وإلا Selenium Manager المدمج
+        service = Service(ChromeDriverManager().install()) if ChromeDriverManager else Service()
+        driver = webdriver.Chrome(service=service, options=options)
+        driver.set_page_load_timeout(self.page_timeout)
+        driver.execute_cdp_cmd("Network.enable", {})
+        driver.execute_cdp_cmd("Network.setBlockedURLs", {"urls": BLOCKED_URL_PATTERNS})
+        return driver
+
+    def _acquire(self):
+        """
+        متصفح خامل، أو متصفح جديد ما دام العدد أقل من الحد، وإلا انتظار تحرر مكان
+        يرفع TimeoutError بعد acquire_timeout، و RuntimeError إذا أُغلقت المجموعة
+        """
+        deadline = time.monotonic() + self.acquire_timeout
+        with self._lock:
+            while True:
+                if self._closed:
+                    raise RuntimeError("مجموعة المتصفحات مغلقة")
+                if self._idle:
+                    return self._idle.pop()
+                if self._live < self.size:
+                    # حجز المكان قبل التشغيل البطيء حتى لا تتجاوز الخيوط الحد
+                    self._live += 1
+                    break
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    raise TimeoutError("لا يوجد متصفح متاح في المجموعة")
+                self._lock.wait(remaining)
+        try:
+            driver = self._launch()
+        except Exception:
+            with self._lock:
+                self._live -= 1
+                self._lock.notify()
+            raise
+        with self._lock:
+            closed = self._closed
+            if not closed:
+                self._drivers.append(driver)
+                self.stats["browsers"] += 1
+        if closed:
+            # أُغلقت المجموعة أثناء التشغيل
+            self._quit(driver)
+            raise RuntimeError("مجموعة المتصفحات مغلقة")
+        return driver
+
+    @staticmethod
+    def _quit(driver):
+        try:
+            driver.quit()
+        except Exception:
+            pass
+
+    def _release(self, driver, broken=False):
+        with self._lock:
+            discard = broken or self._closed
+            if not discard:
+                self._idle.append(driver)
+            elif driver in self._drivers:
+                # متصفح من المجموعة الحالية (بعد close لم يعد محسوباً)
+                self._drivers.remove(driver)
+                self._live -= 1
+            if discard:
+                self._cookie_marks.pop(id(driver), None)
+            self._lock.notify()
+        if discard:
+            self._quit(driver)
+
+    def _apply_cookies(self, driver, cookies):
+        """نقل كوكيز جلسة requests للمتصفح عبر CDP (بدون فتح صفحة من النطاق أولاً)"""
+        cookies = list(cookies)
+        mark = hash(tuple(sorted((c.domain, c.path, c.name, c.value) for c in cookies)))
+        if self._cookie_marks.get(id(driver)) == mark:
+            return
+        for cookie in cookies:
+            params = {
+                "name": cookie.name,
+                "value": cookie.value or "",
+                "domain": cookie.domain,
+                "path": cookie.path or "/",
+                "secure": bool(cookie.secure),
+            }
+            if cookie.expires:
+                params["expires"] = cookie.expires
+            driver.execute_cdp_cmd("Network.setCookie", params)
+        self._cookie_marks[id(driver)] = mark
+
+    def render(self, url, cookies=()):
+        """HTML الصفحة بعد تنفيذ JavaScript، أو None عند الفشل"""
+        return self.run(url, lambda driver: driver.page_source, cookies)
+
+    def run(self, url, collect, cookies=()):
+        """فتح الصفحة في متصفح من المجموعة ثم collect(driver)، أو None عند الفشل"""
+        try:
+            driver = self._acquire()
+        except TimeoutError:
+            with self._lock:
+                self.stats["failed"] += 1
+            return None
+        broken = False
+        try:
+            self._apply_cookies(driver, cookies)
+            try:
+                driver.get(url)
+            except TimeoutException:
+                # انتهت المهلة قبل حدث load: المحتوى المبني حتى الآن يكفي غالباً
+                driver.execute_script("window.stop();")
+            WebDriverWait(driver, self.page_timeout).until(
+                lambda d: d.execute_script("return document.readyState") != "loading"
+            )
+            time.sleep(self.settle)
+            result = collect(driver)
+            with self._lock:
+                self.stats["rendered"] += 1
+            return result
+        except WebDriverException:
+            # متصفح تعطل أو انقطع: يُغلق ويُنشأ غيره عند الحاجة
+            broken = True
+            with self._lock:
+                self.stats["failed"] += 1
+            return None
+        finally:
+            self._release(driver, broken)
+
+    def close(self):
+        """إغلاق كل المتصفحات وإيقاظ المنتظرين (يرفعون RuntimeError، والمتصفحات المستخدمة تُغلق عند تحريرها)"""
+        with self._lock:
+            self._closed = True
+            drivers = self._idle
+            self._idle = []
+            self._drivers = []
+            self._live = 0
+            self._cookie_marks.clear()
+            self._lock.notify_all()
+        for driver in drivers:
+            self._quit(driver)
+
+    def summary(self):
+        return (f"{self.stats['rendered']} صفحة بمتصفح خفي ({self.stats['browsers']} متصفح)، "
+                f"{self.stats['failed']} فشل")
@@ -0,0 +1,102 @@
+"""
+إعادة المحاولة مع تراجع أُسّي وعشوائية (jitter) حسب نوع الخطأ
+لا انتظار في خيط الجلب: RetryLater تُعيد الرابط لمحرك الجلب ليجلبه بعد المهلة عبر مجدول المضيف
+"""
+
+import random
+
+import requests
+
+from .politeness import parse_retry_after
+
+
+class RetryPolicy:
+    """سياسة إعادة محاولة لنوع واحد من الأخطاء"""
+
+    def __init__(self, max_retries, base_delay, max_delay=60.0):
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+
+    def delay(self, retry_number):
+        """تراجع أُسّي مع عشوائية كاملة (full jitter)"""
+        ceiling = min(self.max_delay, self.base_delay * (2 ** retry_number))
+        return random.uniform(0, ceiling)
+
+
+# السياسات الافتراضية لكل نوع خطأ (الأخطاء 4xx غير 429 لا تُعاد)
+DEFAULT_POLICIES = {
+    "timeout": RetryPolicy(max_retries=2, base_delay=2.0),
+    "connection": RetryPolicy(max_retries=3, base_delay=1.0),
+    "server": RetryPolicy(max_retries=2, base_delay=1.0),
+    "throttle": RetryPolicy(max_retries=3, base_delay=5.0, max_delay=120.0),
+}
+
+
+class RetryLater(Exception):
+    """الطلب يُعاد بعد delay ثانية؛ retries: عدد المحاولات لكل نوع خطأ (يُمرر للمحاولة التالية)"""
+
+    def __init__(self, kind, delay, retries):
+        super().__init__(f"{kind}: إعادة المحاولة بعد {delay:.1f} ث")
+        self.kind = kind
+        self.delay = delay
+        self.retries = retries
+
+
+def classify_exception(error):
+    """تصنيف استثناء الشبكة (None = لا يُعاد)"""
+    if isinstance(error, requests.exceptions.Timeout):
+        return "timeout"
+    if isinstance(error, requests.exceptions.ConnectionError):
+        return "connection"
+    return None
+
+
+def classify_response(response):
+    """تصنيف الاستجابة (None = نجاح أو خطأ لا يُعاد)"""
+    if response.status_code in (429, 503):
+        return "throttle"
+    if response.status_code >= 500:
+        return "server"
+    return None
+
+
+def fetch_with_retry(send, policies=None, can_retry=None, on_retry=None, retries=None):
+    """
+    تنفيذ send() مرة واحدة وتحديد هل يُعاد حسب نوع الخطأ
+    send: دالة تنفذ الطلب وترجع الاستجابة (بدون raise_for_status)
+    can_retry: دالة ترجع False لإيقاف الإعادة (مثل قاطع دائرة مفتوح)
+    on_retry(kind, retry_number, delay): للتسجيل
+    retries: عدد المحاولات السابقة لكل نوع (من RetryLater.retries للرابط نفسه)
+    ترجع الاستجابة، أو ترفع RetryLater إن كان للنوع محاولات متبقية، أو آخر استثناء عند نفادها
+    """
+    policies = policies or DEFAULT_POLICIES
+    retries = dict(retries or {})
+
+    retry_after = None
+    try:
+        response = send()
+    except requests.exceptions.RequestException as error:
+        kind = classify_exception(error)
+        outcome = error
+    else:
+        kind = classify_response(response)
+        outcome = response
+        if kind == "throttle":
+            retry_after = parse_retry_after(response.headers.get("Retry-After"))
+
+    policy = policies.get(kind)
+    count = retries.get(kind, 0)
+    if policy is None or count >= policy.max_retries or (can_retry and not can_retry()):
+        if isinstance(outcome, Exception):
+            raise outcome
+        return outcome
+
+    delay = policy.delay(count)
+    if retry_after is not None:
+        delay = max(delay, min(retry_after, policy.max_delay))
+    retries[kind] = count + 1
+
+    if on_retry:
+        on_retry(kind, count + 1, delay)
+    raise RetryLater(kind, delay, retries)
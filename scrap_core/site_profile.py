@@ -0,0 +1,250 @@
+"""
+ملف تعريف لكل نطاق يُحفظ بين الجلسات: ما نجح في الموقع حتى لا يُعاد اكتشافه في كل صفحة وكل جلسة
+- محدد المحتوى الرئيسي (بعد أن يفوز في عدة صفحات متتالية يُستخدم مباشرة بدل تقييم كل العقد)
+- محدد حاوية الروابط لكل element_id (بدل تجربة id ثم class ثم CSS)
+- المحلل الذي اختاره الوضع التلقائي، واستراتيجية الجلب (عادي / متصفح خفي)، وقوالب الواجهات وبصمات القالب
+القرارات المحفوظة تُعاد مراجعتها على عينة من صفحات كل جلسة حتى لا تبقى بعد تغير الموقع
+"""
+
+import itertools
+import json
+import os
+import re
+import threading
+import time
+
+import soupsieve
+
+# المحدد يُعتمد بعد أن يختار التقييم نفس العقدة في هذا العدد من الصفحات وبهذه النسبة من الأصوات
+PROMOTE_VOTES = 3
+PROMOTE_SHARE = 0.8
+
+# عدد الصفحات المتتالية التي لا يجد فيها المحدد المعتمد محتوى قبل إسقاطه
+MAX_MISSES = 3
+
+# أسماء class/id بدون أرقام (المولّدة مثل css-1x2y3z تتغير بين الصفحات والإصدارات)
+STABLE_NAME = re.compile(r"^[A-Za-z_-]{2,40}$")
+
+# الوسوم التي تكفي وحدها كمحدد إن لم يكن للعقدة id أو class ثابت
+LANDMARK_TAGS = ("main", "article")
+
+FETCH_STATIC = "static"
+FETCH_RENDER = "render"
+
+# أقل عدد صفحات مفحوصة في الجلسة للحكم على استراتيجية الجلب
+MIN_PAGES_FOR_STRATEGY = 5
+
+# مع استراتيجية محفوظة تُفحص صفحة من كل هذا العدد فحصاً كاملاً (مراجعة القرار)
+REVALIDATE_EVERY = 5
+
+
+def selector_for(node, root):
+    """محدد CSS ثابت يختار node كأول نتيجة في root، أو None"""
+    name = node.name
+    node_id = node.get("id")
+    classes = node.get("class") or []
+    if isinstance(classes, str):
+        classes = classes.split()
+    candidates = []
+    if node_id and STABLE_NAME.match(node_id):
+        candidates.append(f"{name}#{soupsieve.escape(node_id)}")
+    stable = [c for c in classes if STABLE_NAME.match(c)]
+    if stable:
+        candidates.append(name + "".join(f".{soupsieve.escape(c)}" for c in stable))
+    if name in LANDMARK_TAGS:
+        candidates.append(name)
+    for selector in candidates:
+        try:
+            if root.select_one(selector) is node:
+                return selector
+        except Exception:
+            continue
+    return None
+
+
+class SiteProfile:
+    """ما تعلمناه عن نطاق واحد (ملف JSON في .scrap_cache/profiles)"""
+
+    def __init__(self, path):
+        self.path = path
+        self.data = self._empty()
+        self._misses = 0
+        self._fetch_counter = itertools.count()
+        self._lock = threading.Lock()
+        # فحوص الحاجة للمتصفح في هذه الجلسة (كل الصفحات بدون قرار، وعينة مع قرار محفوظ)
+        self._render_checks = {"checked": 0, "needed": 0}
+        self.stats = {"content_hits": 0, "content_misses": 0, "content_scored": 0, "scope_reused": 0}
+
+    @staticmethod
+    def _empty():
+        return {
+            "content_selector": None,
+            "content_votes": {},
+            "link_scopes": {},
+            "parser": None,
+            "parser_auto": False,
+            "fetch": None,
+            "api_routes": [],
+            "boilerplate": {},
+            "updated_at": None,
+        }
+
+    def load(self):
+        """قراءة الملف (ملف فارغ إذا لم يوجد أو كان تالفاً)"""
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                loaded = json.load(f)
+        except (OSError, ValueError):
+            loaded = {}
+        self.data = self._empty()
+        if isinstance(loaded, dict):
+            self.data.update({key: value for key, value in loaded.items() if key in self.data})
+        if self.data["fetch"] not in (FETCH_STATIC, FETCH_RENDER):
+            self.data["fetch"] = None
+        return self
+
+    def save(self):
+        """كتابة ذرية كما في السجل ونقاط الاستئناف"""
+        self.data["updated_at"] = time.time()
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self.data, f, ensure_ascii=False, indent=2)
+        os.replace(tmp_path, self.path)
+
+    # المحتوى الرئيسي
+
+    @property
+    def content_selector(self):
+        return self.data["content_selector"]
+
+    def content_node(self, soup, choose, min_chars=100):
+        """
+        المحتوى الرئيسي: المحدد المعتمد مباشرة إن وُجد ونصه كافٍ، وإلا choose(soup) (التقييم الكامل)
+        مع التصويت لمحدد العقدة المختارة حتى يُعتمد
+        """
+        selector = self.data["content_selector"]
+        if selector:
+            try:
+                node = soup.select_one(selector)
+            except Exception:
+                node = None
+            if node is not None and len(node.get_text(strip=True)) > min_chars:
+                self._misses = 0
+                self.stats["content_hits"] += 1
+                return node
+            self._misses += 1
+            self.stats["content_misses"] += 1
+            if self._misses >= MAX_MISSES:
+                # تغير قالب الموقع: إعادة التعلم من جديد
+                self.data["content_selector"] = None
+                self.data["content_votes"] = {}
+                self._misses = 0
+
+        node = choose(soup)
+        self.stats["content_scored"] += 1
+        self._vote(selector_for(node, soup) if node is not soup else None)
+        return node
+
+    def _vote(self, selector):
+        if not selector or self.data["content_selector"]:
+            return
+        votes = self.data["content_votes"]
+        votes[selector] = votes.get(selector, 0) + 1
+        if votes[selector] >= PROMOTE_VOTES and votes[selector] >= PROMOTE_SHARE * sum(votes.values()):
+            self.data["content_selector"] = selector
+            self._misses = 0
+
+    # حاوية الروابط
+
+    def link_scope(self, element_id):
+        """المحدد الذي وُجدت به حاوية element_id سابقاً، أو None"""
+        return self.data["link_scopes"].get(element_id)
+
+    def remember_scope(self, element_id, selector):
+        if self.data["link_scopes"].get(element_id) == selector:
+            self.stats["scope_reused"] += 1
+        self.data["link_scopes"][element_id] = selector
+
+    # المحلل
+
+    @property
+    def parser(self):
+        """المحلل الذي اختاره الوضع التلقائي لهذا الموقع (اختيار المستخدم اليدوي لا يُحفظ)"""
+        return self.data["parser"] if self.data["parser_auto"] else None
+
+    def remember_parser(self, backend, choice):
+        """
+        choice: اختيار المستخدم - يُحفظ فقط ما قرره الوضع التلقائي:
+        المحلل المستخدم، أو html.parser إذا فشل المحلل المختار في صفحات هذا الموقع
+        """
+        if choice != "auto":
+            return
+        if backend.stats["fallbacks"] and backend.soup_parser != "html.parser":
+            self.data["parser"] = "html.parser"
+        else:
+            self.data["parser"] = backend.preferred
+        self.data["parser_auto"] = True
+
+    # استراتيجية الجلب
+
+    @property
+    def fetch(self):
+        return self.data["fetch"]
+
+    def needs_render(self, check):
+        """
+        هل تُعرض الصفحة بمتصفح خفي؟ القرار المحفوظ مباشرة، إلا في عينة من الصفحات (وكل الصفحات بدون قرار)
+        حيث يُنفذ الفحص الكامل check() وتُسجل نتيجته لمراجعة القرار في remember_fetch
+        """
+        strategy = self.data["fetch"]
+        if strategy and next(self._fetch_counter) % REVALIDATE_EVERY:
+            return strategy == FETCH_RENDER
+        needed = check()
+        with self._lock:
+            self._render_checks["checked"] += 1
+            self._render_checks["needed"] += bool(needed)
+        return needed
+
+    def remember_fetch(self):
+        """
+        الحكم من الصفحات المفحوصة في الجلسة: أغلبها احتاج متصفحاً، أو لم تحتجه أي صفحة، أو خليط (فحص كل صفحة)
+        بدون فحوص كافية (العرض غير مفعل أو جلسة قصيرة) يبقى القرار السابق
+        """
+        checked, needed = self._render_checks["checked"], self._render_checks["needed"]
+        if checked < MIN_PAGES_FOR_STRATEGY:
+            return
+        if needed * 2 >= checked:
+            self.data["fetch"] = FETCH_RENDER
+        elif needed == 0:
+            self.data["fetch"] = FETCH_STATIC
+        else:
+            self.data["fetch"] = None
+
+    # قوالب الواجهات وبصمات القالب
+
+    @property
+    def api_routes(self):
+        return self.data["api_routes"]
+
+    def remember_api_routes(self, routes):
+        if routes:
+            self.data["api_routes"] = routes
+
+    @property
+    def boilerplate(self):
+        return self.data["boilerplate"]
+
+    def remember_boilerplate(self, learned):
+        self.data["boilerplate"].update(learned)
+
+    def summary(self):
+        parts = []
+        if self.data["content_selector"]:
+            parts.append(f"المحتوى: {self.data['content_selector']} ({self.stats['content_hits']} صفحة مباشرة)")
+        if self.stats["content_scored"]:
+            parts.append(f"{self.stats['content_scored']} صفحة بالتقييم")
+        if self.data["fetch"]:
+            parts.append(f"الجلب: {self.data['fetch']}")
+        if self.data["parser"]:
+            parts.append(f"المحلل: {self.data['parser']}")
+        return "، ".join(parts) or "لا شيء بعد"
@@ -0,0 +1,209 @@
+"""
+اكتشاف الصفحات من robots.txt وخرائط الموقع (sitemap) بدلاً من تحليل كل صفحة HTML
+تُقرأ الخرائط وفهارسها (ومنها المضغوطة gzip) كتدفق حتى لا تُحمّل كاملة في الذاكرة
+"""
+
+import xml.etree.ElementTree as ET
+import zlib
+from datetime import datetime, timezone
+from urllib.parse import urljoin, urlsplit
+from urllib.robotparser import RobotFileParser
+
+import requests
+
+# أقصى عدد ملفات خرائط تُقرأ في الجلسة (الفهارس قد تشير لمئات الملفات)
+MAX_SITEMAPS = 50
+
+# علامة بداية ملفات gzip
+GZIP_MAGIC = b"\x1f\x8b"
+
+# حجم الدفعة المقروءة من الشبكة
+CHUNK_SIZE = 64 * 1024
+
+# مساحات أسماء بروتوكول الخرائط (والقديمة من Google) - الوسوم بدون مساحة أسماء مقبولة أيضاً
+SITEMAP_NAMESPACES = {
+    "http://www.sitemaps.org/schemas/sitemap/0.9",
+    "http://www.google.com/schemas/sitemap/0.9",
+    "http://www.google.com/schemas/sitemap/0.84",
+}
+
+
+def parse_lastmod(value):
+    """تحويل lastmod (تاريخ W3C) إلى طابع زمني UTC، أو None إذا لم يكن صالحاً"""
+    if not value:
+        return None
+    value = value.strip()
+    if value.endswith(("Z", "z")):
+        value = value[:-1] + "+00:00"
+    try:
+        moment = datetime.fromisoformat(value)
+    except ValueError:
+        return None
+    if moment.tzinfo is None:
+        moment = moment.replace(tzinfo=timezone.utc)
+    return moment.timestamp()
+
+
+def _sitemap_name(tag):
+    """
+    اسم الوسم بدون مساحة الأسماء {http://www.sitemaps.org/...}، أو None لوسوم الامتدادات
+    (<image:loc> و <video:loc> داخل <url> ليست رابط الصفحة)
+    """
+    namespace, _, name = tag.rpartition("}")
+    if namespace and namespace.lstrip("{") not in SITEMAP_NAMESPACES:
+        return None
+    return name
+
+
+def _crawl_delays(text):
+    """Crawl-delay لكل وكيل (robotparser لا يقبل القيم العشرية مثل 0.5)"""
+    delays = {}
+    agents = []
+    in_rules = False
+    for line in text.splitlines():
+        line = line.split("#", 1)[0].strip()
+        if ":" not in line:
+            continue
+        field, value = (part.strip() for part in line.split(":", 1))
+        field = field.lower()
+        if field == "user-agent":
+            if in_rules:
+                agents = []
+                in_rules = False
+            agents.append(value.lower())
+            continue
+        in_rules = True
+        if field == "crawl-delay":
+            try:
+                delay = float(value)
+            except ValueError:
+                continue
+            for agent in agents:
+                delays[agent] = delay
+    return delays
+
+
+class RobotsRules:
+    """قواعد robots.txt لموقع: المسموح والممنوع، Crawl-delay، والخرائط المعلنة"""
+
+    def __init__(self, text="", user_agent="*"):
+        self.user_agent = user_agent
+        self._parser = RobotFileParser()
+        self._parser.parse(text.splitlines())
+        self.sitemaps = list(self._parser.site_maps() or [])
+        self._delays = _crawl_delays(text)
+
+    @classmethod
+    def fetch(cls, session, base_url, timeout=15, user_agent="*"):
+        """جلب robots.txt للموقع (ملف غير موجود = كل شيء مسموح)"""
+        robots_url = urljoin(base_url, "/robots.txt")
+        try:
+            response = session.get(robots_url, timeout=timeout)
+        except requests.exceptions.RequestException:
+            return cls(user_agent=user_agent)
+        if response.status_code != 200:
+            return cls(user_agent=user_agent)
+        return cls(response.text, user_agent)
+
+    @property
+    def crawl_delay(self):
+        delay = self._delays.get(self.user_agent.lower(), self._delays.get("*"))
+        return delay or None
+
+    def allowed(self, url):
+        return self._parser.can_fetch(self.user_agent, url)
+
+
+def discover_sitemaps(base_url, robots=None):
+    """الخرائط المعلنة في robots.txt، أو /sitemap.xml إن لم يُعلن شيء"""
+    if robots and robots.sitemaps:
+        return list(robots.sitemaps)
+    return [urljoin(base_url, "/sitemap.xml")]
+
+
+class SitemapReader:
+    """قارئ تدفقي لخرائط الموقع وفهارسها يُرجع أزواج (الرابط، lastmod)"""
+
+    def __init__(self, session, timeout=15, max_sitemaps=MAX_SITEMAPS):
+        self.session = session
+        self.timeout = timeout
+        self.max_sitemaps = max_sitemaps
+        self.stats = {"sitemaps": 0, "urls": 0, "errors": 0}
+        # (رابط الخريطة، سبب الفشل) لعرضها في السجل
+        self.errors = []
+
+    def _chunks(self, url):
+        """دفعات بايتات الخريطة مع فك gzip تدريجياً (ملف ‎.gz؛ ترويسة Content-Encoding يفكها requests)"""
+        response = self.session.get(url, stream=True, timeout=self.timeout)
+        try:
+            response.raise_for_status()
+            decompressor = None
+            for chunk in response.iter_content(CHUNK_SIZE):
+                if decompressor is None:
+                    decompressor = zlib.decompressobj(31) if chunk[:2] == GZIP_MAGIC else False
+                yield decompressor.decompress(chunk) if decompressor else chunk
+            if decompressor:
+                yield decompressor.flush()
+        finally:
+            response.close()
+
+    def _parse(self, url):
+        """قراءة ملف واحد: ('url', loc, lastmod) للصفحات و ('sitemap', loc, lastmod) للفهارس"""
+        parser = ET.XMLPullParser(events=("end",))
+        entry = {}
+        for chunk in self._chunks(url):
+            parser.feed(chunk)
+            for _, element in parser.read_events():
+                name = _sitemap_name(element.tag)
+                if name in ("loc", "lastmod"):
+                    entry[name] = (element.text or "").strip()
+                elif name in ("url", "sitemap"):
+                    if entry.get("loc"):
+                        yield name, entry["loc"], entry.get("lastmod")
+                    entry = {}
+                    # تحرير العناصر المقروءة حتى يبقى استهلاك الذاكرة ثابتاً
+                    element.clear()
+        parser.close()
+
+    def iter_urls(self, sitemap_urls):
+        """كل روابط الصفحات في الخرائط (مع تتبع الفهارس المتداخلة مرة واحدة لكل ملف)"""
+        pending = list(sitemap_urls)
+        visited = set()
+        while pending and self.stats["sitemaps"] < self.max_sitemaps:
+            sitemap_url = pending.pop(0)
+            if sitemap_url in visited:
+                continue
+            visited.add(sitemap_url)
+            self.stats["sitemaps"] += 1
+            try:
+                for kind, loc, lastmod in self._parse(sitemap_url):
+                    if kind == "sitemap":
+                        pending.append(urljoin(sitemap_url, loc))
+                    else:
+                        self.stats["urls"] += 1
+                        yield urljoin(sitemap_url, loc), lastmod
+            except (requests.exceptions.RequestException, ET.ParseError, zlib.error) as e:
+                self.stats["errors"] += 1
+                self.errors.append((sitemap_url, str(e)))
+
+    def summary(self):
+        return f"{self.stats['urls']} رابط من {self.stats['sitemaps']} خريطة"
+
+
+def sitemap_seeds(session, base_url, robots=None, canonicalize=None, timeout=15):
+    """
+    روابط نفس مضيف base_url (رابط موحد) من خرائط الموقع مع lastmod، بعد التوحيد واستبعاد ما يمنعه robots.txt
+    ترجع (قاموس {رابط: lastmod}، القارئ) - القاموس يحفظ ترتيب الخرائط
+    """
+    canonicalize = canonicalize or (lambda url: url)
+    host = urlsplit(base_url).netloc.lower()
+    reader = SitemapReader(session, timeout=timeout)
+    seeds = {}
+    for loc, lastmod in reader.iter_urls(discover_sitemaps(base_url, robots)):
+        url = canonicalize(loc)
+        if urlsplit(url).netloc != host:
+            continue
+        if robots and not robots.allowed(url):
+            continue
+        seeds[url] = lastmod
+    return seeds, reader
@@ -0,0 +1,133 @@
+"""
+كشف صفحات جدار الدخول (login/paywall) وصفحات الخطأ الناعمة (soft-404) التي ترجع 200
+حتى لا تُحفظ وتُحوّل مئات النسخ من نفس صفحة الدخول بعد انتهاء الكوكيز
+الفحص سريع: تعابير نمطية على بداية الصفحة بدون تحليل HTML كامل + بصمة للنص المتكرر
+"""
+
+import hashlib
+import re
+import threading
+from urllib.parse import urlsplit
+
+LOGIN_WALL = "login_wall"
+SOFT_404 = "soft_404"
+REPEATED_PAGE = "repeated_page"
+
+# أوصاف الأنواع لرسائل السجل
+SOFT_ERROR_LABELS = {
+    LOGIN_WALL: "صفحة تسجيل دخول",
+    SOFT_404: "صفحة غير موجودة (soft-404)",
+    REPEATED_PAGE: "صفحة مكررة لروابط مختلفة",
+}
+
+# عدد الأحرف المفحوصة من بداية الصفحة
+SCAN_CHARS = 200_000
+
+# علامات جدار الدخول والاشتراك (نص أو عنوان الصفحة)
+LOGIN_MARKERS = (
+    "sign in to continue", "log in to continue", "please log in", "please sign in",
+    "login required", "you must be logged in", "subscribe to continue", "subscribe to read",
+    "create a free account", "members only", "session expired", "session has expired",
+    "تسجيل الدخول للمتابعة", "يرجى تسجيل الدخول", "سجل الدخول", "انتهت الجلسة", "للمشتركين فقط",
+)
+
+# علامات صفحات "غير موجود" في العنوان أو العنوان الرئيسي
+NOT_FOUND_MARKERS = (
+    "page not found", "not found", "error 404", "404 error", "doesn't exist", "does not exist",
+    "no longer available",
+    "الصفحة غير موجودة", "غير موجود", "لم يتم العثور",
+)
+
+# مسارات صفحات الدخول عند إعادة التوجيه
+LOGIN_PATH = re.compile(r"/(login|signin|sign-in|sign_in|auth|account/login|sso)\b", re.IGNORECASE)
+
+PASSWORD_INPUT = re.compile(r"<input[^>]+type\s*=\s*[\"']?password", re.IGNORECASE)
+TITLE = re.compile(r"<title[^>]*>(.*?)</title>", re.IGNORECASE | re.DOTALL)
+HEADING = re.compile(r"<h1[^>]*>(.*?)</h1>", re.IGNORECASE | re.DOTALL)
+SCRIPTS = re.compile(r"<(script|style|noscript)[^>]*>.*?</\1>", re.IGNORECASE | re.DOTALL)
+TAGS = re.compile(r"<[^>]+>")
+SPACES = re.compile(r"\s+")
+DIGITS = re.compile(r"\d+")
+
+# الصفحات القصيرة (نصاً) مع علامة دخول أو "غير موجود" تُعد صفحة حائط أو خطأ
+SHORT_PAGE_CHARS = 1500
+
+# نفس البصمة لعدد من الروابط المختلفة = صفحة عامة (دخول/خطأ) وليست محتوى
+REPEAT_THRESHOLD = 3
+
+# عدد صفحات الدخول المتتالية قبل طلب إيقاف الكشط
+LOGIN_STREAK_LIMIT = 3
+
+
+def _plain(fragment):
+    return SPACES.sub(" ", TAGS.sub(" ", fragment)).strip().lower()
+
+
+class PageClassifier:
+    """يصنف الصفحة: None للمحتوى العادي، أو LOGIN_WALL / SOFT_404 / REPEATED_PAGE"""
+
+    def __init__(self, login_markers=(), not_found_markers=(), streak_limit=LOGIN_STREAK_LIMIT):
+        """login_markers / not_found_markers: علامات إضافية خاصة بالموقع"""
+        self.login_markers = tuple(LOGIN_MARKERS) + tuple(m.lower() for m in login_markers if m)
+        self.not_found_markers = tuple(NOT_FOUND_MARKERS) + tuple(m.lower() for m in not_found_markers if m)
+        self.streak_limit = streak_limit
+        self._lock = threading.Lock()
+        # البصمة ← عدد الروابط التي أرجعتها (كل رابط يُجلب مرة واحدة)
+        self._fingerprints = {}
+        self.login_streak = 0
+        self.stats = {LOGIN_WALL: 0, SOFT_404: 0, REPEATED_PAGE: 0}
+
+    def fingerprint(self, text):
+        """بصمة النص المرئي بعد حذف الأرقام (تتجاهل الطوابع الزمنية ومعرفات الطلب)"""
+        return hashlib.sha1(DIGITS.sub("", text).encode("utf-8")).hexdigest()
+
+    def _detect(self, url, html, final_url):
+        head = html[:SCAN_CHARS]
+        title_match = TITLE.search(head)
+        title = _plain(title_match.group(1)) if title_match else ""
+        heading_match = HEADING.search(head)
+        heading = _plain(heading_match.group(1)) if heading_match else ""
+        text = _plain(SCRIPTS.sub(" ", head))
+
+        # إعادة توجيه لصفحة دخول من رابط ليس صفحة دخول
+        if final_url and final_url != url and LOGIN_PATH.search(urlsplit(final_url).path) \
+                and not LOGIN_PATH.search(urlsplit(url).path):
+            return LOGIN_WALL, text
+
+        short = len(text) < SHORT_PAGE_CHARS
+        has_password = bool(PASSWORD_INPUT.search(head))
+        login_marker = any(marker in title or marker in heading for marker in self.login_markers) or \
+            (short and any(marker in text for marker in self.login_markers))
+        if login_marker or (has_password and short):
+            return LOGIN_WALL, text
+
+        if short and any(marker in title or marker in heading for marker in self.not_found_markers):
+            return SOFT_404, text
+
+        return None, text
+
+    def classify(self, url, html, final_url=None):
+        """تصنيف الصفحة وتحديث الإحصائيات وسلسلة صفحات الدخول المتتالية"""
+        kind, text = self._detect(url, html, final_url)
+        digest = self.fingerprint(text)
+        with self._lock:
+            repeats = self._fingerprints[digest] = self._fingerprints.get(digest, 0) + 1
+            if kind is None and repeats >= REPEAT_THRESHOLD and text:
+                kind = REPEATED_PAGE
+            if kind:
+                self.stats[kind] += 1
+            self.login_streak = self.login_streak + 1 if kind == LOGIN_WALL else 0
+        return kind
+
+    def should_halt(self):
+        """عدة صفحات دخول متتالية = انتهت الكوكيز غالباً، ولا فائدة من متابعة الكشط"""
+        return self.login_streak >= self.streak_limit
+
+    def reset_streak(self):
+        """بعد إيقاف الكشط وتحديث الكوكيز تبدأ السلسلة من جديد"""
+        with self._lock:
+            self.login_streak = 0
+
+    def summary(self):
+        return (f"{self.stats[LOGIN_WALL]} صفحة دخول، {self.stats[SOFT_404]} صفحة غير موجودة، "
+                f"{self.stats[REPEATED_PAGE]} صفحة مكررة")
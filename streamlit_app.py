@@ -6,18 +6,29 @@
 
 import streamlit as st
 import requests
-from bs4 import BeautifulSoup
 import os
 from pathlib import Path
 import pandas as pd
 from datetime import datetime
 import time
-import browser_cookie3
+import threading
 import json
-import zipfile
+import re
 import smtplib
 import ssl
 from email.message import EmailMessage
+from streamlit.runtime.scriptrunner import add_script_run_ctx, get_script_run_ctx
+from scrap_core import (
+    FetchEngine, DEFAULT_MAX_IN_FLIGHT, HostScheduler, HttpCache, RawStore, cache_path,
+    cache_dir, CircuitBreaker, fetch_with_retry, RetryLater, CrawlCheckpoint, STATUS_RUNNING, STATUS_COMPLETED,
+    Frontier, PriorityFrontier, default_scorers, UrlCanonicalizer, RULES_FILE_NAME,
+    RobotsRules, sitemap_seeds, SiteManifest, load_browser_cookies, load_cookie_jar,
+    load_cookie_bytes, cookie_jar_bytes, apply_cookies, expiry_warning, COOKIES_FILE_ENV,
+    PageClassifier, SOFT_ERROR_LABELS, BrowserPool, needs_rendering, RENDERING_AVAILABLE,
+    DEFAULT_POOL_SIZE, extract_embedded, ApiReplayer, ParsedPage,
+    ParserBackend, PARSER_CHOICES, SiteProfile, scope_selectors,
+    NearDuplicateIndex, ExportStore, zip_directory, content_hash
+)
 
 # إعدادات الصفحة
 st.set_page_config(
@@ -69,6 +80,29 @@ class StreamlitScraperApp:
         self.scraped_urls = set()
         self.failed_urls = set()
         self.archives = []  # لحفظ بيانات الأرشيفات
+        self.scheduler = HostScheduler()  # مجدول مهذب لكل مضيف
+        self.breaker = CircuitBreaker()  # قاطع دائرة لكل مضيف
+        self.http_cache = None  # ذاكرة HTTP لإعادة التحقق
+        self.raw_store = None  # مخزن HTML الخام المضغوط
+        self.canonicalizer = UrlCanonicalizer()  # توحيد الروابط قبل إضافتها للقائمة
+        self.robots = None  # قواعد robots.txt للجلسة الحالية
+        self.sitemap_lastmod = {}  # روابط خرائط الموقع ← lastmod
+        self.manifest = None  # سجل الصفحات المحفوظة بين الجلسات (للكشط التزايدي)
+        self.not_modified = set()  # صفحات ردت 304 في الجلسة الحالية
+        self.page_files = {}  # ملفات كل صفحة محفوظة في الجلسة الحالية
+        self.file_names = {}  # اسم ملف الصفحة (بدون امتداد) ← الرابط الذي يملكه في الجلسة الحالية
+        self.page_classifier = PageClassifier()  # كشف صفحات الدخول والأخطاء الناعمة قبل الحفظ
+        self.failure_reasons = {}  # الرابط ← سبب التخطي (صفحة دخول / غير موجودة / مكررة)
+        self.retry_counts = {}  # الرابط ← عدد المحاولات لكل نوع خطأ (حتى يعود من المحرك بعد المهلة)
+        self.browser_pool = None  # متصفحات خفية لصفحات JavaScript (عند تفعيل الخيار فقط)
+        self.api_replayer = None  # وضع API: قوالب واجهات JSON المكتشفة لكل نمط روابط
+        self.parser_backend = ParserBackend()  # محلل HTML (lxml / selectolax مع رجوع لـ html.parser)
+        self.parser_choice = "auto"  # اختيار المستخدم (المحلل المحفوظ في ملف تعريف الموقع يُطبق على "تلقائي" فقط)
+        self.site_profile = None  # ملف تعريف النطاق بين الجلسات (حاوية الروابط، المحلل، استراتيجية الجلب)
+        self.near_duplicates = None  # بصمات SimHash للصفحات المصدّرة لتخطي الصفحات شبه المكررة
+        self.export_store = None  # الملفات المصدّرة بعنونة المحتوى (تُكتب مرة وتُربط في مجلدات المشاريع)
+        self.reexport = False  # HTML الصفحات من المخزن الخام بدل الجلب
+        self.embedded_stats = {}  # صفحات حُفظت من JSON المضمّن (__NEXT_DATA__ / JSON-LD) حسب المصدر
 
     def main(self):
         """الواجهة الرئيسية"""
@@ -116,10 +150,61 @@ class StreamlitScraperApp:
             help="البحث التلقائي موصى به"
         )
 
+        # ملف كوكيز محدد في البيئة (للتشغيل على Render بدون متصفح)
+        env_cookies = os.environ.get(COOKIES_FILE_ENV)
+        if env_cookies:
+            self.import_cookies(env_cookies, announce=not st.session_state.get("env_cookies_loaded"))
+            st.session_state.env_cookies_loaded = True
+
+        # ملف كوكيز مرفوع (cookies.txt بصيغة Netscape أو JSON)
+        uploaded = st.file_uploader(
+            "📥 استيراد ملف كوكيز",
+            type=["txt", "json"],
+            help="ملف مُصدّر من جهاز فيه متصفح مسجل الدخول"
+        )
+        if uploaded is not None:
+            upload_key = (uploaded.name, uploaded.size)
+            self.import_cookies(
+                uploaded.name,
+                data=uploaded.getvalue(),
+                announce=st.session_state.get("cookies_upload") != upload_key
+            )
+            st.session_state.cookies_upload = upload_key
+
         # زر استخراج الكوكيز
         if st.button("🔐 استخراج Cookies واختبار الاتصال", type="primary"):
             self.extract_cookies_and_test()
 
+        # تصدير كوكيز الجلسة لاستخدامها لاحقاً على الخادم
+        if len(self.session.cookies):
+            export_name = st.selectbox("صيغة التصدير", ["cookies.txt", "cookies.json"])
+            st.download_button(
+                "📤 تصدير كوكيز الجلسة",
+                data=cookie_jar_bytes(self.session.cookies, export_name),
+                file_name=export_name
+            )
+
+    def import_cookies(self, path, data=None, announce=True):
+        """تحميل ملف كوكيز (مسار أو بايتات مرفوعة) في الجلسة مع استبعاد المنتهي منها"""
+        try:
+            if data is not None:
+                cookies, expired = load_cookie_bytes(data, path)
+            else:
+                cookies, expired = load_cookie_jar(path)
+        except (OSError, ValueError) as e:
+            if announce:
+                self.log(f"❌ تعذر قراءة ملف الكوكيز: {str(e)}", "error")
+            return False
+        apply_cookies(self.session, cookies)
+        if announce:
+            if expired:
+                self.log(f"⏰ تم تجاهل {expired} كوكي منتهية الصلاحية", "warning")
+            self.log(f"📥 تم تحميل {len(cookies)} كوكي من {os.path.basename(path)}", "success")
+            warning = expiry_warning(cookies)
+            if warning:
+                self.log(warning, "warning")
+        return bool(cookies)
+
     def show_main_interface(self):
         """الواجهة الرئيسية"""
         st.subheader("🔍 إعدادات الكشط")
@@ -154,6 +239,99 @@ class StreamlitScraperApp:
                 help="تنسيق حفظ المحتوى"
             )
 
+            self.max_in_flight = st.selectbox(
+                "الطلبات المتزامنة",
+                [1, 4, 8, 16],
+                index=[1, 4, 8, 16].index(DEFAULT_MAX_IN_FLIGHT),
+                help="عدد الصفحات التي تُجلب في نفس الوقت"
+            )
+
+            parser_choice = st.selectbox(
+                "🧬 محلل HTML",
+                list(PARSER_CHOICES),
+                format_func=PARSER_CHOICES.get,
+                help="تلقائي: lxml للتحليل و selectolax لاستخراج الروابط إن كانا مثبتين، وإلا html.parser"
+            )
+            self.parser_backend = ParserBackend(parser_choice)
+            self.parser_choice = parser_choice
+
+        # استئناف الجلسة السابقة بعد إعادة تشغيل العملية
+        self.resume = st.checkbox(
+            "♻️ استئناف الجلسة السابقة غير المكتملة",
+            value=False,
+            help="متابعة الكشط من نقطة الاستئناف بدون إعادة جلب الصفحات المكتملة"
+        )
+
+        # اكتشاف الصفحات من robots.txt وخريطة الموقع
+        robots_col, sitemap_col = st.columns(2)
+        with robots_col:
+            self.respect_robots = st.checkbox(
+                "🤖 احترام robots.txt",
+                value=True,
+                help="تخطي الروابط الممنوعة (Disallow) واحترام Crawl-delay"
+            )
+        with sitemap_col:
+            self.use_sitemap = st.checkbox(
+                "🗺️ اكتشاف الصفحات من خريطة الموقع",
+                value=False,
+                help="إضافة روابط sitemap.xml (ومنها المضغوطة) للقائمة مباشرة بدون تحليل الصفحات"
+            )
+        self.incremental = st.checkbox(
+            "🔁 كشط تزايدي (الجديد أو المعدل فقط)",
+            value=False,
+            help="تخطي صفحات الخريطة التي لم يتغير lastmod لها والصفحات التي ترد 304 منذ الجلسة السابقة"
+        )
+        self.skip_near_duplicates = st.checkbox(
+            "🪞 تخطي تصدير الصفحات شبه المكررة",
+            value=False,
+            help="صفحات الترقيم ونسخ الطباعة وروابط التتبع التي يكاد نصها يطابق صفحة محفوظة لا تُحول ولا تُضغط"
+        )
+        self.reexport = st.checkbox(
+            "♻️ إعادة التصدير من HTML المحفوظ بدون جلب",
+            value=False,
+            help="الصفحات المحفوظة في المخزن الخام تُحلل وتُصدّر بالإعدادات الحالية بدون طلبات، وغير المحفوظة تُجلب"
+        )
+        self.render_js = st.checkbox(
+            "🧭 عرض صفحات JavaScript بمتصفح خفي",
+            value=False,
+            disabled=not RENDERING_AVAILABLE,
+            help="يُستخدم Chrome خفي (بدون صور وخطوط ووسائط) فقط للصفحات التي يرجع محتواها فارغاً بالجلب العادي"
+        )
+        self.api_replay = st.checkbox(
+            "⚡ وضع API",
+            value=False,
+            help="اكتشاف طلبات JSON التي تستدعيها الصفحات (من HTML وملفات JS والمتصفح الخفي) واستدعاؤها مباشرة لباقي الصفحات المشابهة"
+        )
+
+        # أولوية الكشط والميزانية
+        with st.expander("🎯 أولوية الكشط والميزانية"):
+            self.strategy = st.selectbox(
+                "الاستراتيجية",
+                ["bfs", "best"],
+                format_func=lambda value: {"bfs": "🌊 بالعرض (BFS)", "best": "🎯 الأهم أولاً"}[value],
+                help="الأهم أولاً: تقديم صفحات المحتوى على صفحات التنقل والوسوم"
+            )
+            self.priority_terms = st.text_input(
+                "كلمات/أنماط الصفحات المهمة",
+                value="idea",
+                help="أفصل بفاصلة - تُطابق الرابط (regex) ونص الرابط"
+            )
+            budget_col1, budget_col2 = st.columns(2)
+            with budget_col1:
+                self.max_pages = st.number_input("📄 حد الصفحات (0 = بدون حد)", min_value=0, value=0, step=10)
+            with budget_col2:
+                self.time_budget = st.number_input("⏱️ حد الوقت بالدقائق (0 = بدون حد)", min_value=0, value=0)
+            self.ignore_params = st.text_input(
+                "🔗 معاملات رابط إضافية للتجاهل",
+                value="",
+                help="أفصل بفاصلة - تُحذف من روابط الموقع قبل الجلب (معاملات التتبع utm_* و fbclid تُحذف دائماً)"
+            )
+            self.login_markers = st.text_input(
+                "🔐 علامات إضافية لصفحة الدخول",
+                value="",
+                help="أفصل بفاصلة - نص يظهر في صفحة الدخول لهذا الموقع؛ يتوقف الكشط عند تكرار صفحات الدخول (انتهاء الكوكيز)"
+            )
+
         # مجلد الحفظ
         self.save_folder = st.text_input(
             "مجلد الحفظ",
@@ -197,6 +375,24 @@ class StreamlitScraperApp:
                 success_rate = (len(self.scraped_urls) / (len(self.scraped_urls) + len(self.failed_urls))) * 100
             st.metric("نسبة النجاح", ".1f")
 
+        # حالة الجدولة لكل مضيف
+        host_states = self.scheduler.snapshot()
+        circuits = self.breaker.snapshot()
+        if host_states:
+            st.subheader("🚦 معدل الطلبات لكل مضيف")
+            st.dataframe(pd.DataFrame([
+                {
+                    "المضيف": host,
+                    "المعدل (طلب/ث)": info["rate"],
+                    "التراجع (ث)": info["backoff"],
+                    "زمن الاستجابة (ث)": info["latency"],
+                    "نسبة الأخطاء": info["error_rate"],
+                    "429/503": info["throttled"],
+                    "الدائرة": circuits.get(host, {}).get("state", "closed"),
+                }
+                for host, info in host_states.items()
+            ]), use_container_width=True)
+
         # قائمة الروابط
         if self.scraped_urls:
             st.subheader("✅ الصفحات المكشوطة بنجاح")
@@ -238,68 +434,19 @@ class StreamlitScraperApp:
         """استخراج الكوكيز واختبار الاتصال"""
         with st.spinner("🔄 استخراج الكوكيز..."):
             try:
-                # استخراج الكوكيز
-                if self.browser == "auto":
-                    browsers = ["chrome", "firefox", "edge", "safari", "opera"]
-                    cookies_found = False
-                    for browser_name in browsers:
-                        try:
-                            if browser_name == "chrome":
-                                cookies = browser_cookie3.chrome(domain_name=self.domain)
-                            elif browser_name == "firefox":
-                                cookies = browser_cookie3.firefox(domain_name=self.domain)
-                            elif browser_name == "edge":
-                                cookies = browser_cookie3.edge(domain_name=self.domain)
-                            elif browser_name == "safari":
-                                cookies = browser_cookie3.safari(domain_name=self.domain)
-                            elif browser_name == "opera":
-                                cookies = browser_cookie3.opera(domain_name=self.domain)
-
-                            cookies_list = list(cookies)
-                            if cookies_list:
-                                # إضافة الكوكيز للجلسة
-                                for cookie in cookies_list:
-                                    self.session.cookies.set(
-                                        cookie.name,
-                                        cookie.value,
-                                        domain=cookie.domain,
-                                        path=cookie.path
-                                    )
-                                self.log(f"✅ تم العثور على {len(cookies_list)} كوكي في {browser_name}", "success")
-                                cookies_found = True
-                                break
-                        except:
-                            continue
-
-                    if not cookies_found:
-                        self.log("❌ لم يتم العثور على كوكيز", "error")
-                        return
-                else:
-                    # استخراج من متصفح محدد
-                    try:
-                        if self.browser == "chrome":
-                            cookies = browser_cookie3.chrome(domain_name=self.domain)
-                        elif self.browser == "firefox":
-                            cookies = browser_cookie3.firefox(domain_name=self.domain)
-                        elif self.browser == "edge":
-                            cookies = browser_cookie3.edge(domain_name=self.domain)
-                        elif self.browser == "safari":
-                            cookies = browser_cookie3.safari(domain_name=self.domain)
-                        elif self.browser == "opera":
-                            cookies = browser_cookie3.opera(domain_name=self.domain)
-
-                        cookies_list = list(cookies)
-                        for cookie in cookies_list:
-                            self.session.cookies.set(
-                                cookie.name,
-                                cookie.value,
-                                domain=cookie.domain,
-                                path=cookie.path
-                            )
-                        self.log(f"✅ تم استخراج {len(cookies_list)} كوكي", "success")
-                    except Exception as e:
-                        self.log(f"❌ خطأ في استخراج الكوكيز: {str(e)}", "error")
-                        return
+                # استخراج الكوكيز بالتوازي مع ذاكرة لكل نطاق (تبقى بين إعادات تشغيل Streamlit
+                # ولا يُعاد فك التشفير إلا إذا تغيرت قاعدة بيانات المتصفح)
+                try:
+                    browser_name, cookies_list = load_browser_cookies(self.domain, self.browser)
+                except Exception as e:
+                    self.log(f"❌ خطأ في استخراج الكوكيز: {str(e)}", "error")
+                    return
+                if not cookies_list:
+                    self.log("❌ لم يتم العثور على كوكيز", "error")
+                    return
+                # إضافة الكوكيز للجلسة (مع تاريخ انتهائها حتى يبقى عند التصدير)
+                apply_cookies(self.session, cookies_list)
+                self.log(f"✅ تم العثور على {len(cookies_list)} كوكي في {browser_name}", "success")
 
                 # اختبار الاتصال
                 test_url = f"https://{self.domain}"
@@ -333,38 +480,193 @@ class StreamlitScraperApp:
                 # اسم مجلد المشروع = اسم النطاق بدون www وبدون بروتوكول
                 from urllib.parse import urlparse
                 domain = urlparse(self.main_url).netloc.replace('www.', '')
+                # قواعد توحيد الروابط (العامة + الخاصة بالمواقع + معاملات المستخدم)
+                self.canonicalizer = self.build_canonicalizer(save_root, domain)
+                seed_url = self.canonicalizer.canonicalize(self.main_url)
+                self.main_url = seed_url
+                # ذاكرة HTTP الدائمة (ETag / Last-Modified) بين الجلسات
+                self.raw_store = RawStore(cache_dir(save_root, "raw"))
+                self.http_cache = HttpCache(
+                    cache_path(save_root, "http_cache.sqlite"),
+                    self.raw_store,
+                    key=self.canonicalizer.canonicalize
+                )
+                self.export_store = ExportStore(cache_dir(save_root, "exports"))
+                pruned = self.export_store.prune()
+                if pruned:
+                    self.log(f"🧹 حُذف {pruned} ملف مصدّر لم تعد أي جلسة تستخدمه", "info")
                 project_folder = os.path.join(save_root, domain)
                 os.makedirs(project_folder, exist_ok=True)
-                # قائمة انتظار مع مستوى العمق
-                urls_queue = [(self.main_url, 0)]
+                # ما تعلمناه عن الموقع في الجلسات السابقة
+                self.site_profile = SiteProfile(cache_path(save_root, "profiles", f"{domain}.json")).load()
+                if self.site_profile.data["updated_at"]:
+                    self.log(f"📇 ملف تعريف الموقع: {self.site_profile.summary()}", "info")
+                if self.parser_choice == "auto" and self.site_profile.parser:
+                    self.parser_backend = ParserBackend(self.site_profile.parser)
+                # استراتيجية قائمة الانتظار
+                frontier_factory = self.build_frontier_factory()
+                if frontier_factory is None:
+                    return
+                # قاطع الدائرة يبدأ كل كشط من جديد (مضيف توقف في كشط سابق قد عاد)
+                self.breaker.reset()
+                # محرك الجلب المتزامن (خيوط الجلب تحمل سياق Streamlit لكتابة السجل)
+                script_ctx = get_script_run_ctx()
+                engine = FetchEngine(
+                    self.session,
+                    self.get_page_content,
+                    max_in_flight=self.max_in_flight,
+                    thread_initializer=lambda: add_script_run_ctx(threading.current_thread(), script_ctx),
+                    scheduler=self.scheduler,
+                    breaker=self.breaker,
+                    frontier_factory=frontier_factory,
+                    local_page=self.stored_page if self.reexport and self.raw_store else None
+                )
                 processed_count = 0
                 max_depth = self.depth
-                visited = set()
-                while urls_queue:
-                    current_url, depth = urls_queue.pop(0)
-                    if max_depth != "unlimited" and int(depth) >= int(max_depth):
-                        continue
-                    if current_url in visited:
-                        continue
+                # متصفحات خفية للصفحات التي يبنيها JavaScript (لا تُشغّل إلا عند أول صفحة تحتاجها)
+                if self.render_js and RENDERING_AVAILABLE:
+                    self.browser_pool = BrowserPool(
+                        size=min(self.max_in_flight, DEFAULT_POOL_SIZE),
+                        user_agent=self.session.headers.get("User-Agent")
+                    )
+                # وضع API: الاكتشاف من HTML وملفات JS (ومن طلبات المتصفح الخفي إن كان مفعلاً)
+                if self.api_replay:
+                    self.api_replayer = ApiReplayer(
+                        self.session, self.browser_pool, scheduler=self.scheduler, breaker=self.breaker
+                    )
+                    self.api_replayer.preload(self.site_profile.api_routes)
+
+                # نقطة الاستئناف لهذا النطاق
+                checkpoint = CrawlCheckpoint(cache_path(save_root, "checkpoints", f"{domain}.json.gz"))
+                resume_state = checkpoint.load() if self.resume and checkpoint.is_unfinished() else None
+                if resume_state:
+                    self.scraped_urls.update(resume_state["scraped"])
+                    self.failed_urls.update(resume_state["failed"])
+                    processed_count = resume_state["processed_count"]
+                    max_depth = resume_state["max_depth"]
+                    self.log(f"♻️ استئناف الجلسة: {len(self.scraped_urls)} صفحة مكتملة، "
+                             f"{len(resume_state['frontier'])} في الانتظار", "info")
+                elif self.resume:
+                    self.log("ℹ️ لا توجد جلسة غير مكتملة لهذا النطاق، سيتم بدء جلسة جديدة", "warning")
+
+                # قواعد robots.txt وروابط خرائط الموقع (قبل أي جلب)
+                self.manifest = SiteManifest(cache_path(save_root, "manifests", f"{domain}.json.gz")).load()
+                self.not_modified.clear()
+                self.page_files.clear()
+                self.file_names.clear()
+                self.failure_reasons.clear()
+                self.retry_counts.clear()
+                self.embedded_stats = {}
+                self.near_duplicates = NearDuplicateIndex() if self.skip_near_duplicates else None
+                self.page_classifier = PageClassifier(
+                    login_markers=[m.strip() for m in self.login_markers.split(",")]
+                )
+                seeds = self.discover_site(seed_url, max_depth, skip_sitemaps=bool(resume_state))
+                if self.incremental and not resume_state:
+                    seeds = self.skip_unchanged(seeds, project_folder)
+
+                def save_checkpoint(frontier, status=STATUS_RUNNING):
+                    checkpoint.save({
+                        "status": status,
+                        "main_url": self.main_url,
+                        "max_depth": max_depth,
+                        "frontier": frontier,
+                        "scraped": list(self.scraped_urls),
+                        "failed": list(self.failed_urls),
+                        "processed_count": processed_count,
+                    })
+
+                def handle_page(current_url, depth, content):
+                    nonlocal processed_count
                     processed_count += 1
-                    visited.add(current_url)
-                    content = self.get_page_content(current_url)
                     if not content:
                         self.failed_urls.add(current_url)
-                        continue
-                    success = self.save_content(current_url, content, project_folder)
-                    if success:
+                        return []
+                    # تحليل الصفحة مرة واحدة يُشارك بين استخراج الروابط وكل المصدّرات
+                    page = ParsedPage(current_url, content, self.parser_backend)
+                    # محتوى JSON مضمّن (__NEXT_DATA__ / JSON-LD) يُغني عن تحليل الصفحة للحفظ
+                    # إلا إذا كان نص محتواها الرئيسي أطول منه بوضوح
+                    embedded = extract_embedded(content, current_url)
+                    if embedded and not embedded.covers(page.main_text_chars()):
+                        embedded = None
+                    if embedded:
+                        self.embedded_stats[embedded.source] = self.embedded_stats.get(embedded.source, 0) + 1
+                    # الكشط التزايدي: ملفات الصفحة غير المتغيرة (304) تُنقل من الجلسة السابقة
+                    # (إلا إذا شغل ملف آخر مكانها فتُحفظ من جديد)
+                    not_modified = (self.incremental and current_url in self.not_modified
+                                    and self.manifest.has_files(current_url)
+                                    and self.manifest.carry_forward(current_url, project_folder, "304"))
+                    duplicate_of = None if not_modified else self.near_duplicate_of(current_url, embedded, page)
+                    export_started = time.perf_counter()
+                    if not_modified:
                         self.scraped_urls.add(current_url)
+                        self.log(f"♻️ لم تتغير الصفحة (304): {current_url}", "info")
+                    elif duplicate_of:
+                        # صفحة شبه مكررة: لا تُحول ولا تُضغط مرة أخرى
+                        self.scraped_urls.add(current_url)
+                        self.log(f"🪞 صفحة شبه مكررة لـ {duplicate_of}: {current_url}", "info")
+                    elif self.save_content(current_url, content, project_folder, embedded, page):
+                        self.scraped_urls.add(current_url)
+                        files = self.page_files.pop(current_url, [])
+                        if self.near_duplicates:
+                            self.near_duplicates.note_export(
+                                time.perf_counter() - export_started,
+                                sum(os.path.getsize(os.path.join(project_folder, name)) for name in files)
+                            )
+                        self.manifest.record(current_url, project_folder, files, self.sitemap_lastmod.get(current_url))
                         self.log(f"💾 تم حفظ المحتوى [{processed_count}]: {current_url}", "success")
                     else:
                         self.failed_urls.add(current_url)
                         self.log(f"❌ فشل في حفظ المحتوى: {current_url}", "error")
                     # استخراج الروابط من الصفحة الرئيسية فقط أو كل صفحة حسب العمق
                     if depth == 0:
-                        new_links = self.extract_links(content, current_url, self.element_id)
-                        for link in new_links:
-                            if link not in visited:
-                                urls_queue.append((link, depth + 1))
+                        anchors = {}
+                        links = self.extract_links(content, current_url, self.element_id, anchors, page)
+                        return [(link, anchors.get(link)) for link in links]
+                    return []
+
+                engine.crawl(
+                    [] if resume_state else [seed_url],
+                    handle_page,
+                    max_depth=None if max_depth == "unlimited" else int(max_depth),
+                    should_stop=self.page_classifier.should_halt,
+                    frontier=[tuple(item) for item in resume_state["frontier"]] if resume_state else seeds,
+                    visited=self.scraped_urls | self.failed_urls,
+                    checkpoint=save_checkpoint,
+                    max_pages=int(self.max_pages) or None,
+                    time_budget=int(self.time_budget) * 60 or None,
+                    allow=self.robots.allowed if self.robots else None
+                )
+                if self.page_classifier.should_halt():
+                    # تبقى نقطة الاستئناف غير مكتملة لمتابعة الكشط بعد تحديث الكوكيز
+                    self.log("🔐 عدة صفحات دخول متتالية - يبدو أن الكوكيز انتهت، حدّثها ثم استأنف الكشط", "error")
+                else:
+                    save_checkpoint([], STATUS_COMPLETED)
+                self.manifest.save()
+                self.remember_site_profile()
+                if self.failure_reasons:
+                    self.log(f"🛡️ صفحات تم تخطيها: {self.page_classifier.summary()}", "warning")
+                if self.incremental:
+                    self.log(f"🔁 الكشط التزايدي: {self.manifest.summary()}", "info")
+                self.log(f"⏱️ مدة الجلب: {engine.stats['elapsed']:.1f} ثانية", "info")
+                if engine.stats["host_down"]:
+                    self.log(f"🔌 {engine.stats['host_down']} رابط لم يُجلب لتوقف المضيف", "warning")
+                if engine.stats["disallowed"]:
+                    self.log(f"🤖 {engine.stats['disallowed']} رابط تم تخطيه حسب robots.txt", "info")
+                self.log(f"🔗 توحيد الروابط: {self.canonicalizer.summary()}", "info")
+                self.log(f"♻️ ذاكرة HTTP: {self.http_cache.summary()}", "info")
+                self.log(f"🗃️ مخزن HTML الخام: {self.raw_store.summary()}", "info")
+                if self.browser_pool:
+                    self.log(f"🧭 المتصفح الخفي: {self.browser_pool.summary()}", "info")
+                if self.api_replayer:
+                    self.log(f"⚡ وضع API: {self.api_replayer.summary()}", "info")
+                if self.near_duplicates and self.near_duplicates.canonical:
+                    self.log(f"🪞 {self.near_duplicates.summary()}", "info")
+                if self.export_store.stats["reused"]:
+                    self.log(f"🔗 الملفات المصدّرة: {self.export_store.summary()}", "info")
+                if self.embedded_stats:
+                    embedded_summary = "، ".join(f"{count} من {source}" for source, count in self.embedded_stats.items())
+                    self.log(f"🧩 صفحات من البيانات المضمّنة: {embedded_summary}", "info")
                 # ضغط المجلد بعد الكشط
                 zip_path = self.zip_folder(project_folder)
                 st.success(f"🗜️ تم ضغط الملفات: {zip_path}")
@@ -381,30 +683,169 @@ class StreamlitScraperApp:
             except Exception as e:
                 self.log(f"💥 خطأ في الكشط: {str(e)}", "error")
                 st.error(f"💥 خطأ في الكشط: {str(e)}")
+            finally:
+                if self.http_cache:
+                    self.http_cache.close()
+                    self.http_cache = None
+                if self.raw_store:
+                    self.raw_store.close()
+                    self.raw_store = None
+                if self.browser_pool:
+                    self.browser_pool.close()
+                    self.browser_pool = None
+
+    def render_page(self, url):
+        """HTML الصفحة من المتصفح الخفي، أو None (مع تعطيل العرض إذا تعذر تشغيل المتصفح)"""
+        pool = self.browser_pool
+        try:
+            html = pool.render(url, self.session.cookies)
+        except Exception as e:
+            self.log(f"⚠️ تعذر تشغيل المتصفح الخفي، سيتم الاكتفاء بالجلب العادي: {str(e)}", "warning")
+            self.browser_pool = None
+            pool.close()
+            return None
+        if html:
+            self.log(f"🧭 تم عرض الصفحة بمتصفح خفي: {url}", "info")
+        return html
+
+    def discover_site(self, url, max_depth, skip_sitemaps=False):
+        """
+        قراءة robots.txt (Crawl-delay للمجدول، Disallow للفلتر) ثم روابط خرائط الموقع بعمق 1
+        (العمق الأقصى 1 يقتصر على صفحة البداية فلا تُضاف روابط الخريطة للقائمة)
+        """
+        from urllib.parse import urlparse
+        self.robots = None
+        self.sitemap_lastmod = {}
+        if self.respect_robots:
+            self.robots = RobotsRules.fetch(self.session, url)
+            if self.robots.crawl_delay:
+                self.scheduler.set_crawl_delay(urlparse(url).netloc, self.robots.crawl_delay)
+                self.log(f"🤖 robots.txt: Crawl-delay = {self.robots.crawl_delay} ث", "info")
+        if skip_sitemaps or not (self.use_sitemap or self.incremental):
+            return []
+        self.sitemap_lastmod, reader = sitemap_seeds(
+            self.session, url, self.robots, self.canonicalizer.record
+        )
+        self.sitemap_lastmod.pop(url, None)
+        for sitemap_url, error in reader.errors:
+            self.log(f"⚠️ تعذرت قراءة الخريطة {sitemap_url}: {error}", "warning")
+        if max_depth != "unlimited" and int(max_depth) <= 1:
+            self.log(f"🗺️ خرائط الموقع: {reader.summary()}، لم يُضف شيء للقائمة (العمق الأقصى 1)", "warning")
+            return []
+        self.log(f"🗺️ خرائط الموقع: {reader.summary()}، {len(self.sitemap_lastmod)} رابط أُضيف للقائمة", "success")
+        return [(link, 1) for link in self.sitemap_lastmod]
+
+    def skip_unchanged(self, seeds, project_folder):
+        """روابط الخريطة التي لم يتغير lastmod لها لا تُجلب (ملفاتها محفوظة من الجلسة السابقة)"""
+        remaining = []
+        for link, depth in seeds:
+            if (self.manifest.is_unchanged(link, self.sitemap_lastmod.get(link))
+                    and self.manifest.carry_forward(link, project_folder, "lastmod")):
+                self.scraped_urls.add(link)
+            else:
+                remaining.append((link, depth))
+        if len(remaining) < len(seeds):
+            self.log(f"🔁 {len(seeds) - len(remaining)} صفحة لم تتغير منذ الجلسة السابقة، "
+                     f"{len(remaining)} للجلب", "success")
+        return remaining
+
+    def build_canonicalizer(self, save_root, domain):
+        """محول الروابط: قواعد canonical_rules.json في مجلد الذاكرة + المعاملات المدخلة للموقع الحالي"""
+        try:
+            canonicalizer = UrlCanonicalizer.from_file(cache_path(save_root, RULES_FILE_NAME))
+        except (OSError, ValueError) as e:
+            self.log(f"⚠️ تعذر قراءة قواعد توحيد الروابط: {str(e)}", "warning")
+            canonicalizer = UrlCanonicalizer()
+        params = [param.strip() for param in self.ignore_params.split(',') if param.strip()]
+        if params:
+            canonicalizer.add_site_rules(domain, {"extra_strip_params": params})
+            self.log(f"🔗 معاملات متجاهلة لـ {domain}: {', '.join(params)}", "info")
+        return canonicalizer
+
+    def build_frontier_factory(self):
+        """إنشاء قائمة الانتظار حسب الاستراتيجية المختارة (None عند نمط غير صالح)"""
+        if self.strategy != "best":
+            return Frontier
+        terms = [term.strip() for term in self.priority_terms.split(',') if term.strip()]
+        try:
+            scorers = default_scorers(priority_patterns=terms, keywords=terms)
+        except re.error as e:
+            self.log(f"❌ نمط أولوية غير صالح: {str(e)}", "error")
+            st.error(f"❌ نمط أولوية غير صالح: {str(e)}")
+            return None
+        self.log(f"🎯 الكشط حسب الأهمية: {', '.join(terms) or 'الإعدادات الافتراضية'}", "info")
+        return lambda depth_limit: PriorityFrontier(depth_limit, scorers)
 
-    def extract_links(self, html, base_url, element_id):
-        """استخراج الروابط من الصفحة الرئيسية فقط"""
-        soup = BeautifulSoup(html, 'html.parser')
+    def near_duplicate_of(self, url, embedded, page):
+        """الصفحة الأصلية إذا كان نص هذه الصفحة يكاد يطابقها، وإلا None"""
+        if not self.near_duplicates:
+            return None
+        try:
+            text = embedded.to_markdown() if embedded else page.cleaned().get_text(" ", strip=True)
+        except Exception:
+            return None
+        return self.near_duplicates.check(url, text)
+
+    def remember_site_profile(self):
+        """حفظ ما نجح في هذه الجلسة في ملف تعريف الموقع"""
+        profile = self.site_profile
+        profile.remember_parser(self.parser_backend, self.parser_choice)
+        profile.remember_fetch()
+        if self.api_replayer:
+            profile.remember_api_routes(self.api_replayer.export_routes())
+        try:
+            profile.save()
+        except OSError as e:
+            self.log(f"⚠️ تعذر حفظ ملف تعريف الموقع: {str(e)}", "warning")
+            return
+        self.log(f"📇 ملف تعريف الموقع: {profile.summary()}", "info")
+
+    def extract_links(self, html, base_url, element_id, anchors=None, page=None):
+        """استخراج الروابط من الصفحة الرئيسية فقط (anchors: قاموس يُملأ بنص كل رابط إن مُرر)"""
         links = []
-        # البحث عن العنصر المحدد
-        element = soup.find(id=element_id) or soup.find(class_=element_id)
-        if not element:
-            try:
-                element = soup.select_one(element_id)
-            except Exception:
-                pass
-        if not element:
-            return links
-        for link_tag in element.find_all('a', href=True):
-            href = link_tag.get('href', '').strip()
+        # حاوية الروابط: المحدد المحفوظ في ملف تعريف الموقع أولاً ثم id ثم class ثم CSS
+        selectors = scope_selectors(element_id)
+        stored = self.site_profile.link_scope(element_id) if self.site_profile else None
+        if stored:
+            selectors = [stored] + [selector for selector in selectors if selector != stored]
+
+        def remember(selector):
+            if self.site_profile:
+                self.site_profile.remember_scope(element_id, selector)
+
+        # المسار السريع (selectolax) بدون بناء شجرة BeautifulSoup
+        candidates = self.parser_backend.find_links(html, selectors=selectors, on_scope=remember)
+        if candidates is None:
+            soup = page.soup if page else self.parser_backend.make_soup(html)
+            # البحث عن العنصر المحدد
+            element = None
+            for selector in selectors:
+                try:
+                    element = soup.select_one(selector)
+                except Exception:
+                    continue
+                if element:
+                    remember(selector)
+                    break
+            if not element:
+                return links
+            candidates = (
+                (link_tag.get('href', '').strip(), link_tag.get_text(" ", strip=True))
+                for link_tag in element.find_all('a', href=True)
+            )
+        seen_links = set()
+        for href, anchor_text in candidates:
             if not href or href.startswith('#') or href.startswith('javascript:') or href.startswith('mailto:'):
                 continue
             full_url = requests.compat.urljoin(base_url, href)
-            if requests.utils.urlparse(full_url).netloc == requests.utils.urlparse(base_url).netloc:
-                clean_url = full_url.split('#')[0].rstrip('/')
-                if clean_url not in links and clean_url != base_url:
+            clean_url = self.canonicalizer.record(full_url)
+            if requests.utils.urlparse(clean_url).netloc == requests.utils.urlparse(base_url).netloc:
+                if clean_url not in seen_links and clean_url != base_url:
+                    seen_links.add(clean_url)
                     links.append(clean_url)
-        return list(set(links))
+                    if anchors is not None:
+                        anchors[clean_url] = anchor_text
+        return links
 
     def zip_folder(self, folder_path):
         """ضغط المجلد المحدد إلى ملف ZIP داخل ScrapContent"""
@@ -413,14 +854,10 @@ class StreamlitScraperApp:
         base, ext = os.path.splitext(zip_path)
         i = 1
         while os.path.exists(zip_path):
-            zip_path = f"{base}_{i}{ext}"
+            zip_path = f"{base}_                    {ext}"
             i += 1
-        with zipfile.ZipFile(zip_path, "w", compression=zipfile.ZIP_DEFLATED) as zf:
-            for root, dirs, files in os.walk(folder_path):
-                for file in files:
-                    full_path = os.path.join(root, file)
-                    rel_path = os.path.relpath(full_path, os.path.dirname(folder_path))
-                    zf.write(full_path, arcname=rel_path)
+        # PDF يُخزن بدون إعادة ضغط، والملفات المربوطة بنفس المحتوى تُضغط مرة
+        zip_directory(folder_path, zip_path)
         return zip_path
 
     def send_email_with_attachment(self, file_path):
@@ -479,6 +916,10 @@ Web Scraper Pro
         else:
             st.info("لا توجد أرشيفات محفوظة بعد.")
 
+    def stored_page(self, url):
+        """إعادة التصدير: آخر HTML محفوظ للصفحة يُحلل ويُصدّر بالإعدادات الحالية بدون طلب"""
+        return self.raw_store.get_url(url)
+
     def get_page_content(self, url):
         """جلب محتوى الصفحة"""
         try:
@@ -488,29 +929,88 @@ Web Scraper Pro
                 'Accept-Language': 'ar,en-US,en;q=0.5',
             }
 
-            response = self.session.get(url, headers=headers, timeout=15)
-            response.raise_for_status()
-            return response.text
-
+            # وضع API: صفحة من نمط معروف تُجلب كـ JSON مباشرة بدل HTML
+            if self.api_replayer and url != self.main_url:
+                replayed = self.api_replayer.fetch(url)
+                if replayed:
+                    if self.raw_store:
+                        self.raw_store.put(url, replayed)
+                    return replayed
+
+            # طلب شرطي إذا كانت الصفحة محفوظة من جلسة سابقة
+            cached = self.http_cache.lookup(url) if self.http_cache else None
+            if cached:
+                headers.update(cached.conditional_headers())
+
+            # إعادة المحاولة مع تراجع أُسّي حسب نوع الخطأ (ما دامت دائرة المضيف مغلقة)
+            host = requests.utils.urlparse(url).netloc
+            response = fetch_with_retry(
+                lambda: self.session.get(url, headers=headers, timeout=15),
+                can_retry=lambda: not self.breaker.is_open(host),
+                on_retry=lambda kind, attempt, delay: self.log(
+                    f"🔁 إعادة المحاولة {attempt} ({kind}) بعد {delay:.1f} ث: {url}", "warning"
+                ),
+                retries=self.retry_counts.pop(url, None)
+            )
+            revalidated = response.status_code == 304 and cached
+            if revalidated:
+                content = self.http_cache.revalidated(cached, response)
+                self.not_modified.add(url)
+            else:
+                response.raise_for_status()
+                content = response.text
+
+            # محتوى يُبنى بـ JavaScript: إعادة عرض الصفحة بمتصفح خفي من المجموعة
+            # (ملف تعريف الموقع يحسم الفحص: كل صفحاته تحتاج متصفحاً، أو لا تحتاجه أبداً - مع فحص عينة للمراجعة)
+            # يسبق فحص الأخطاء المقنّعة: هياكل JS المتطابقة تبدو صفحة مكررة قبل عرضها
+            if self.browser_pool:
+                check = lambda: needs_rendering(content, backend=self.parser_backend)
+                if self.site_profile.needs_render(check) if self.site_profile else check():
+                    content = self.render_page(url) or content
+
+            if not revalidated:
+                # صفحة دخول أو "غير موجود" بحالة 200 (بعد العرض): لا تُخزن ولا تُحفظ
+                kind = self.page_classifier.classify(url, content, response.url)
+                if kind:
+                    self.failure_reasons[url] = kind
+                    self.log(f"🛡️ تم تخطي {url}: {SOFT_ERROR_LABELS[kind]}", "warning")
+                    return None
+
+            # وضع API: اكتشاف واجهة JSON لنمط هذه الصفحة (مرة واحدة لكل نمط)
+            if self.api_replayer and url != self.main_url:
+                if self.api_replayer.learn(url, content):
+                    self.log(f"⚡ تم اكتشاف واجهة JSON لصفحات مثل: {url}", "success")
+
+            # حفظ المحتوى الخام في المخزن الدائم (وبصمته مع محددات ذاكرة HTTP بدل نسخة ثانية منه)
+            digest = self.raw_store.put(url, content) if self.raw_store else None
+            if self.http_cache and not revalidated:
+                self.http_cache.store(url, response, digest)
+            return content
+
+        except RetryLater as retry:
+            # المحرك يعيد الرابط عبر مجدول المضيف بعد المهلة (بدون انتظار في خيط الجلب)
+            self.retry_counts[url] = retry.retries
+            raise
         except Exception as e:
             self.log(f"❌ خطأ في جلب {url}: {str(e)}", "error")
             return None
 
-    def save_content(self, url, content, folder):
-        """حفظ المحتوى"""
+    def save_content(self, url, content, folder, embedded=None, page=None):
+        """حفظ المحتوى (embedded: محتوى JSON مضمّن يُغني عن تحليل الصفحة، page: تحليل مشترك بين التنسيقات)"""
         try:
+            page = page or ParsedPage(url, content, self.parser_backend)
             # إنشاء المجلد إذا لم يكن موجوداً
             os.makedirs(folder, exist_ok=True)
 
             # حفظ كـ Markdown
             if self.export_format in ["markdown", "both"]:
-                success_md = self.save_as_markdown(url, content, folder)
+                success_md = self.save_as_markdown(url, content, folder, embedded, page)
             else:
                 success_md = True
 
             # حفظ كـ PDF (إذا كان متاحاً)
             if self.export_format in ["pdf", "both"]:
-                success_pdf = self.save_as_pdf(url, content, folder)
+                success_pdf = self.save_as_pdf(url, content, folder, embedded, page)
             else:
                 success_pdf = True
 
@@ -520,66 +1020,92 @@ Web Scraper Pro
             self.log(f"❌ خطأ في حفظ المحتوى: {str(e)}", "error")
             return False
 
-    def save_as_markdown(self, url, content, folder):
+    def url_to_filename(self, url, extension):
+        """
+        اسم ملف الصفحة من مسار الرابط (نفس الاسم للرابط في كل جلسة)
+        رابط آخر بنفس الاسم في الجلسة (مثل /a/b و /a_b أو اختلاف الاستعلام) يُضاف له جزء من بصمة الرابط
+        """
+        from urllib.parse import urlparse
+
+        if url == self.main_url:
+            name = "main_page"
+        else:
+            path = urlparse(url).path.strip('/')
+            name = "".join(c for c in path.replace('/', '_').replace('\\', '_') if c.isalnum() or c in ['_', '-', '.'])
+            name = name or "index"
+            if urlparse(url).query:
+                name = f"{name}_{content_hash(url)[:8]}"
+        owner = self.file_names.setdefault(name, url)
+        if owner != url:
+            name = f"{name}_{content_hash(url)[:8]}"
+            self.file_names.setdefault(name, url)
+        return f"{name}.{extension}"
+
+    def save_as_markdown(self, url, content, folder, embedded=None, page=None):
         """حفظ كـ Markdown"""
         try:
-            from urllib.parse import urlparse
             import html2text
 
-            # تحليل HTML
-            soup = BeautifulSoup(content, 'html.parser')
-
-            # إنشاء اسم الملف
-            parsed_url = urlparse(url)
-            if url == self.main_url:
-                filename = "main_page.md"
-            else:
-                filename = "page.md"
+            # اسم ملف خاص بالصفحة (السجل التزايدي يعتمد أن لكل رابط ملفاته)
+            filename = self.url_to_filename(url, "md")
 
             filepath = os.path.join(folder, filename)
 
-            # تحويل إلى Markdown
-            h = html2text.HTML2Text()
-            h.ignore_links = False
-            h.ignore_images = False
-            markdown_content = h.handle(str(soup))
-
-            # حفظ الملف
-            with open(filepath, 'w', encoding='utf-8') as f:
-                f.write(markdown_content)
+            if embedded:
+                # المسار السريع: الحمولة المضمّنة مباشرة بدون تحليل الصفحة و html2text
+                markdown_content = embedded.to_markdown()
+            else:
+                # HTML المحلل المشترك مع PDF
+                page = page or ParsedPage(url, content, self.parser_backend)
+
+                # تحويل إلى Markdown
+                h = html2text.HTML2Text()
+                h.ignore_links = False
+                h.ignore_images = False
+                markdown_content = h.handle(page.cleaned_html())
+
+            # حفظ الملف (رابط صلب لنسخة سابقة بنفس المحتوى إن وُجدت)
+            reused = self.export_store.save_text(content_hash(markdown_content), ".md", filepath, markdown_content)
+            self.page_files.setdefault(url, []).append(filename)
+
+            # الحقول المنظمة كما هي بجانب ملف Markdown
+            if embedded:
+                json_name = os.path.splitext(filename)[0] + ".json"
+                payload = embedded.payload_json()
+                self.export_store.save_text(content_hash(payload), ".json", os.path.join(folder, json_name), payload)
+                self.page_files[url].append(json_name)
 
             file_size = os.path.getsize(filepath) / 1024
-            self.log(f"📝 تم حفظ Markdown: {filename} ({file_size:.1f} KB)", "success")
+            self.log(f"📝 تم حفظ Markdown: {filename} ({file_size:.1f} KB)"
+                     + (" 🔗 مطابق لملف سابق" if reused else ""), "success")
             return True
 
         except Exception as e:
             self.log(f"❌ خطأ في حفظ Markdown: {str(e)}", "error")
             return False
 
-    def save_as_pdf(self, url, content, folder):
+    def save_as_pdf(self, url, content, folder, embedded=None, page=None):
         """حفظ كـ PDF"""
         try:
             from weasyprint import HTML
-            from urllib.parse import urlparse
 
-            # تحليل HTML
-            soup = BeautifulSoup(content, 'html.parser')
+            # HTML المحلل المشترك مع Markdown (أو HTML مبني من الحمولة المضمّنة)
+            page_html = embedded.to_html() if embedded else (page or ParsedPage(url, content, self.parser_backend)).cleaned_html()
 
-            # إنشاء اسم الملف
-            parsed_url = urlparse(url)
-            if url == self.main_url:
-                filename = "main_page.pdf"
-            else:
-                filename = "page.pdf"
+            # اسم ملف خاص بالصفحة (نفس اسم ملف Markdown)
+            filename = self.url_to_filename(url, "pdf")
 
             filepath = os.path.join(folder, filename)
 
-            # تحويل إلى PDF
-            html_doc = HTML(string=str(soup))
-            html_doc.write_pdf(filepath)
+            # تحويل إلى PDF (المحتوى المطابق لأي رابط أو جلسة سابقة يُربط بدون WeasyPrint)
+            reused = self.export_store.save(
+                content_hash(page_html), ".pdf", filepath, lambda path: HTML(string=page_html).write_pdf(path)
+            )
+            self.page_files.setdefault(url, []).append(filename)
 
             file_size = os.path.getsize(filepath) / 1024
-            self.log(f"📄 تم حفظ PDF: {filename} ({file_size:.1f} KB)", "success")
+            self.log(f"📄 تم حفظ PDF: {filename} ({file_size:.1f} KB)"
+                     + (" 🔗 مطابق لملف سابق" if reused else ""), "success")
             return True
 
         except Exception as e:
@@ -0,0 +1,44 @@
+import time
+from types import SimpleNamespace
+
+from scrap_core import browser_cookies
+from scrap_core.browser_cookies import BrowserCookieCache
+
+
+class StubCookie:
+    def __init__(self, name, expires):
+        self.name = name
+        self.expires = expires
+
+    def is_expired(self, now=None):
+        return self.expires < (now or time.time())
+
+
+class SafariReader:
+    """مثل browser_cookie3.Safari: لا خاصية cookie_file (المحتوى في مخزن داخلي)"""
+
+    loads = 0
+
+    def __init__(self, cookie_file=None, domain_name=""):
+        self._buffer = b"cookies"
+        self.domain_name = domain_name
+
+    def load(self):
+        SafariReader.loads += 1
+        return [StubCookie("session", time.time() + 3600)]
+
+
+def test_reader_without_cookie_file(monkeypatch):
+    monkeypatch.setattr(browser_cookies, "browser_cookie3", SimpleNamespace(Safari=SafariReader))
+    SafariReader.loads = 0
+    cache = BrowserCookieCache(browsers=("safari",))
+
+    label, cookies = cache.get("example.com", "safari")
+    assert label == "Safari"
+    assert [cookie.name for cookie in cookies] == ["session"]
+
+    # الوضع التلقائي يجد كوكيز Safari، والنتيجة من الذاكرة بدون قراءة ثانية
+    label, cookies = cache.get("example.com")
+    assert label == "Safari" and len(cookies) == 1
+    assert SafariReader.loads == 1
+    assert cache.stats == {"hits": 1, "misses": 1}
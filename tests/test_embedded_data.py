@@ -0,0 +1,68 @@
+import json
+
+from scrap_core import ParsedPage, extract_embedded
+
+URL = "https://blog.example.com/2024/05/faster-builds"
+
+# كتلة JSON-LD حقيقية الشكل (Yoast / WordPress): بيانات وصفية فقط بدون articleBody
+BLOG_POSTING = {
+    "@context": "https://schema.org",
+    "@type": "BlogPosting",
+    "headline": "How we cut our CI build times in half",
+    "description": "A walkthrough of the caching, test sharding and dependency pinning changes "
+                   "that took our median pipeline from 24 to 11 minutes.",
+    "datePublished": "2024-05-14T09:30:00+00:00",
+    "dateModified": "2024-05-20T16:05:00+00:00",
+    "author": {"@type": "Person", "name": "Sam Rivera", "url": "https://blog.example.com/authors/sam"},
+    "publisher": {
+        "@type": "Organization",
+        "name": "Example Engineering",
+        "logo": {"@type": "ImageObject", "url": "https://blog.example.com/logo.png"},
+    },
+    "mainEntityOfPage": {"@type": "WebPage", "@id": URL},
+    "image": "https://blog.example.com/images/ci.png",
+    "keywords": ["ci", "build performance", "caching", "monorepo"],
+    "inLanguage": "en-US",
+}
+
+PARAGRAPH = ("We started by measuring where the time actually went, splitting each job into setup, "
+             "dependency install, compilation and test phases, and logging every step. ")
+
+
+def page_html(json_ld, paragraphs=60):
+    body = "".join(f"<p>{PARAGRAPH}</p>" for _ in range(paragraphs))
+    return (
+        "<html><head><title>Faster builds</title>"
+        f"<script type=\"application/ld+json\">{json.dumps(json_ld)}</script></head>"
+        f"<body><nav><a href=\"/\">Home</a></nav><article><h1>Faster builds</h1>{body}"
+        "<a href=\"/2024/05/next-post\">Next post</a></article></body></html>"
+    )
+
+
+def test_metadata_only_json_ld_is_not_used():
+    assert extract_embedded(page_html(BLOG_POSTING), URL) is None
+
+
+def test_article_body_is_used():
+    posting = dict(BLOG_POSTING, articleBody=PARAGRAPH * 10)
+    html = page_html(posting, paragraphs=10)
+    embedded = extract_embedded(html, URL)
+    assert embedded is not None
+    assert embedded.covers(ParsedPage(URL, html).main_text_chars())
+
+
+def test_longer_dom_content_wins():
+    # متن قصير (مقتطف) في JSON-LD وصفحة بمقال كامل: المقال أطول بوضوح فتُحلل الصفحة
+    posting = dict(BLOG_POSTING, articleBody=PARAGRAPH * 2)
+    html = page_html(posting)
+    embedded = extract_embedded(html, URL)
+    assert embedded is not None
+    assert not embedded.covers(ParsedPage(URL, html).main_text_chars())
+
+
+def test_next_data_page_props_prose():
+    next_data = {"props": {"pageProps": {"post": {"title": "Faster builds", "sections": [PARAGRAPH] * 4}}}}
+    html = ("<html><body><div id=\"__next\"></div><script id=\"__NEXT_DATA__\" type=\"application/json\">"
+            f"{json.dumps(next_data)}</script></body></html>")
+    embedded = extract_embedded(html, URL)
+    assert embedded is not None and embedded.source == "next_data"
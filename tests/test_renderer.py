@@ -0,0 +1,56 @@
+import threading
+
+import scrap_core.renderer as renderer
+
+
+class FailingPool(renderer.BrowserPool):
+    def _launch(self):
+        raise RuntimeError("chrome غير متاح")
+
+
+class FakeDriver:
+    def quit(self):
+        pass
+
+
+class FakePool(renderer.BrowserPool):
+    def _launch(self):
+        return FakeDriver()
+
+
+def run_threads(pool, count):
+    errors = []
+
+    def work():
+        try:
+            pool.run("https://example.com/", lambda driver: None)
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=work) for _ in range(count)]
+    for thread in threads:
+        thread.start()
+    return threads, errors
+
+
+def test_launch_failure_wakes_waiters(monkeypatch):
+    monkeypatch.setattr(renderer, "RENDERING_AVAILABLE", True)
+    pool = FailingPool(size=2, acquire_timeout=5)
+    threads, errors = run_threads(pool, 5)
+    for thread in threads:
+        thread.join(10)
+    assert not any(thread.is_alive() for thread in threads)
+    assert len(errors) == 5
+
+
+def test_close_wakes_waiters(monkeypatch):
+    monkeypatch.setattr(renderer, "RENDERING_AVAILABLE", True)
+    pool = FakePool(size=1, acquire_timeout=30)
+    driver = pool._acquire()
+    threads, errors = run_threads(pool, 3)
+    pool.close()
+    pool._release(driver)
+    for thread in threads:
+        thread.join(10)
+    assert not any(thread.is_alive() for thread in threads)
+    assert all(isinstance(e, RuntimeError) for e in errors)
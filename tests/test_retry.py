@@ -0,0 +1,28 @@
+import pytest
+import requests
+
+from scrap_core import RetryLater, RetryPolicy, fetch_with_retry
+
+POLICIES = {"server": RetryPolicy(max_retries=2, base_delay=1.0)}
+
+
+def response(status):
+    result = requests.Response()
+    result.status_code = status
+    return result
+
+
+def test_retry_is_handed_back_instead_of_sleeping():
+    with pytest.raises(RetryLater) as first:
+        fetch_with_retry(lambda: response(500), POLICIES)
+    assert first.value.kind == "server" and 0 <= first.value.delay <= 1.0
+    with pytest.raises(RetryLater) as second:
+        fetch_with_retry(lambda: response(500), POLICIES, retries=first.value.retries)
+    # المحاولات نفدت: ترجع آخر استجابة
+    last = fetch_with_retry(lambda: response(500), POLICIES, retries=second.value.retries)
+    assert last.status_code == 500
+
+
+def test_open_circuit_stops_retries():
+    last = fetch_with_retry(lambda: response(500), POLICIES, can_retry=lambda: False)
+    assert last.status_code == 500
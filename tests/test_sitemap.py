@@ -0,0 +1,50 @@
+from scrap_core import SitemapReader
+
+SITEMAP = b"""<?xml version="1.0" encoding="UTF-8"?>
+<urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9"
+        xmlns:image="http://www.google.com/schemas/sitemap-image/1.1"
+        xmlns:video="http://www.google.com/schemas/sitemap-video/1.1">
+  <url>
+    <loc>https://shop.example.com/products/kettle</loc>
+    <lastmod>2024-06-01</lastmod>
+    <image:image>
+      <image:loc>https://cdn.example.com/kettle.jpg</image:loc>
+    </image:image>
+    <video:video>
+      <video:content_loc>https://cdn.example.com/kettle.mp4</video:content_loc>
+    </video:video>
+  </url>
+  <url>
+    <loc>https://shop.example.com/products/toaster</loc>
+  </url>
+</urlset>
+"""
+
+
+class FakeResponse:
+    def __init__(self, body):
+        self.body = body
+
+    def raise_for_status(self):
+        pass
+
+    def iter_content(self, size):
+        for start in range(0, len(self.body), size):
+            yield self.body[start:start + size]
+
+    def close(self):
+        pass
+
+
+class FakeSession:
+    def get(self, url, **kwargs):
+        return FakeResponse(SITEMAP)
+
+
+def test_extension_locations_are_ignored():
+    reader = SitemapReader(FakeSession())
+    urls = list(reader.iter_urls(["https://shop.example.com/sitemap.xml"]))
+    assert urls == [
+        ("https://shop.example.com/products/kettle", "2024-06-01"),
+        ("https://shop.example.com/products/toaster", None),
+    ]